@@ -0,0 +1,539 @@
+"""
+Bulk Scoring
+Offline HealthAnalyzer scoring of a whole HealthData export.
+
+Streams a JSONL (mongoexport) or CSV export sorted by userId, groups each
+user's entries, scores users in batches on a process pool and writes one
+JSON line per user, in input order:
+
+    {"userId": ..., "entries": 30, "healthScore": 72, "recommendations": [...], "insights": "...",
+     "anomalies": [...], "trends": {...}, "forecast": [...]}
+    {"userId": ..., "entries": 0, "error": "..."}
+
+Entries are checked against the bounds of the API's HealthDataEntry
+(services.health_ingest.ENTRY_LIMITS), as /api/analyze/batch checks them;
+a user with an invalid entry gets an error line instead of a score.
+
+"forecast" (projected daily health scores, see services.forecaster) is only
+written with --forecast-days, e.g. for a nightly dashboard refresh.
+
+Memory stays bounded: the export is read a line at a time, only
+`max_in_flight` batches exist at once, and optional profiles (a users
+export sorted by _id) are merge-joined as the export is read.
+
+Progress is checkpointed next to the output file. After an interruption
+(Ctrl-C, a crash or a killed job) the same command resumes from the last
+checkpoint: the output is truncated to the last checkpointed batch and
+reading continues from the matching input offset.
+
+Usage (from ai-service/app):
+    mongoexport -c healthdatas --sort '{userId: 1, date: 1}' -o export.jsonl
+    python bulk_score.py export.jsonl -o scores.jsonl [--profiles users.jsonl] [--workers 8]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import json
+import os
+import signal
+import sys
+import time
+from collections import deque
+
+import tasks
+from services.health_ingest import ENTRY_LIMITS, IngestError, build_series_batch
+from utils.responses import dumps
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+FORMATS = ('jsonl', 'csv')
+CHECKPOINT_VERSION = 1
+
+ENTRY_DEFAULTS = {'steps': 0, 'sleepHours': 0.0, 'waterIntake': 0.0, 'calories': 0, 'mood': 'okay'}
+PROFILE_FIELDS = {'age': int, 'gender': str, 'height': float, 'weight': float}
+
+
+class ExportError(ValueError):
+    """The export can't be read as a userId-sorted HealthData export"""
+
+
+def loads(line: bytes) -> Any:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def _plain(value: Any) -> Any:
+    """Unwrap MongoDB extended JSON ({"$oid": ...}, {"$date": ...}, {"$numberLong": ...})"""
+    if isinstance(value, dict) and len(value) == 1:
+        inner = next(iter(value.values()))
+        return _plain(inner) if isinstance(inner, dict) else inner
+    return value
+
+
+def _number(value: Any, cast: Callable) -> Any:
+    value = _plain(value)
+    return cast(float(value)) if isinstance(value, str) else cast(value)
+
+
+def to_entry(document: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    HealthData document -> analyzer entry; missing fields take the schema defaults
+
+    Numbers are only unwrapped (CSV values stay strings); score_batch()
+    parses and checks them as the API does.
+    """
+    entry = {'date': str(_plain(document.get('date', '')))[:10]}
+    for field, default in ENTRY_DEFAULTS.items():
+        value = document.get(field)
+        if value in (None, ''):
+            entry[field] = default
+        elif field == 'mood':
+            entry[field] = str(value)
+        else:
+            entry[field] = _plain(value)
+    return entry
+
+
+def to_profile(document: Dict[str, Any]) -> Dict[str, Any]:
+    """User document -> analyzer profile"""
+    profile = {}
+    for field, cast in PROFILE_FIELDS.items():
+        value = document.get(field)
+        profile[field] = None if value in (None, '') else (str(value) if cast is str else _number(value, cast))
+    return profile
+
+
+def read_documents(path: str, fmt: str, offset: int = 0) -> Iterator[Tuple[int, int, Dict[str, Any]]]:
+    """
+    Documents of an export with their byte range
+
+    Yields:
+        (start offset, end offset, document); reading again from an end
+        offset continues with the next document
+    """
+    with open(path, 'rb') as source:
+        if fmt == 'jsonl':
+            source.seek(offset)
+            position = offset
+            for line in source:
+                start, position = position, position + len(line)
+                if line.strip():
+                    yield start, position, loads(line)
+            return
+
+        # CSV: count the bytes csv.reader pulls, so quoted multi-line fields stay intact
+        consumed = 0
+
+        def lines():
+            nonlocal consumed
+            for line in source:
+                consumed += len(line)
+                yield line.decode('utf-8-sig' if consumed == len(line) else 'utf-8')
+
+        reader = csv.reader(lines())
+        header = next(reader, None)
+        if header is None:
+            return
+        if offset:
+            source.seek(offset)
+            consumed = offset
+        while True:
+            start = consumed
+            row = next(reader, None)
+            if row is None:
+                return
+            if row:
+                yield start, consumed, dict(zip(header, row))
+
+
+def read_users(path: str, fmt: str, offset: int = 0) -> Iterator[Tuple[str, List[Dict[str, Any]], int]]:
+    """
+    Entries grouped by user
+
+    Yields:
+        (user id, entries sorted by date, offset where the next user starts)
+
+    Raises:
+        ExportError: When the export is not sorted by userId
+    """
+    user_id = None
+    entries: List[Dict[str, Any]] = []
+    for start, end, document in read_documents(path, fmt, offset):
+        current = str(_plain(document.get('userId', '')))
+        if current != user_id:
+            if user_id is not None:
+                if current < user_id:
+                    raise ExportError(
+                        f"{path} is not sorted by userId ({current!r} after {user_id!r} at byte {start}); "
+                        f"export with --sort '{{userId: 1, date: 1}}'"
+                    )
+                entries.sort(key=lambda entry: entry['date'])
+                yield user_id, entries, start
+            user_id, entries = current, []
+        try:
+            entries.append(to_entry(document))
+        except (TypeError, ValueError) as e:
+            raise ExportError(f"{path}: unreadable entry at byte {start}: {e}")
+
+    if user_id is not None:
+        entries.sort(key=lambda entry: entry['date'])
+        yield user_id, entries, end
+
+
+class ProfileJoin:
+    """Merge join of users (sorted by _id) against the export's sorted user ids"""
+
+    def __init__(self, path: Optional[str], fmt: str, offset: int = 0):
+        self.offset = offset
+        self.found = 0
+        self._documents = read_documents(path, fmt, offset) if path else None
+        self._pending: Optional[Tuple[str, int, Dict[str, Any]]] = None
+
+    def lookup(self, user_id: str) -> Dict[str, Any]:
+        """Profile of a user; ids must be looked up in ascending order"""
+        while self._documents is not None:
+            if self._pending is None:
+                document = next(self._documents, None)
+                if document is None:
+                    self._documents = None
+                    break
+                start, end, fields = document
+                self._pending = (str(_plain(fields.get('_id', fields.get('userId', '')))), end, fields)
+
+            pending_id, end, fields = self._pending
+            if pending_id > user_id:
+                break
+            self._pending = None
+            # Offset of the first profile not yet consumed
+            self.offset = end
+            if pending_id == user_id:
+                self.found += 1
+                return to_profile(fields)
+        return {}
+
+
+def entry_error(entries: List[Dict[str, Any]], error: IngestError) -> str:
+    """Error line text of a user with invalid entries: the first invalid field and its date"""
+    first = error.errors[0]
+    loc = first['loc']
+    if len(loc) == 3:
+        return f"Invalid {loc[2]} on {entries[loc[1]]['date'] or 'an undated entry'}: {first['msg']}"
+    return f"Invalid entries: {first['msg']}"
+
+
+def init_worker() -> None:
+    """Pool initializer; Ctrl-C is handled (and checkpointed) by the parent only"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    tasks.init_services()
+
+
+def score_batch(
+    batch: List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]],
+    forecast_days: int = 0
+) -> Tuple[bytes, int]:
+    """
+    Score one batch in a pool worker
+
+    Args:
+        batch: (user id, entries, profile) per user
+        forecast_days: Days of projected health scores added per user (0 = none)
+
+    Returns:
+        Output JSON lines for the batch in input order, and the number of failed users
+    """
+    # Entries out of the API's bounds fail their user only
+    valid = []
+    errors = {}
+    built = build_series_batch([entries for _, entries, _ in batch], ENTRY_LIMITS)
+    for (user_id, entries, profile), (series, error) in zip(batch, built):
+        if error is not None:
+            errors[user_id] = entry_error(entries, error)
+        else:
+            valid.append((user_id, series, profile))
+
+    outcome = tasks.analyze_batch(valid)
+    results = outcome['results']
+    errors.update(outcome['errors'])
+    forecasts = {}
+    if forecast_days:
+        forecasts = tasks.forecast_batch(
+            [(user_id, series) for user_id, series, _ in valid if user_id in results], forecast_days
+        )['results']
+    lines = []
+    for user_id, entries, _ in batch:
+        record = {'userId': user_id, 'entries': len(entries)}
+        if user_id in results:
+            record.update(results[user_id])
+            if user_id in forecasts:
+                record.update(forecasts[user_id])
+        else:
+            record['error'] = errors.get(user_id, 'Not scored')
+        lines.append(dumps(record))
+    lines.append(b'')
+    return b'\n'.join(lines), len(errors)
+
+
+class Checkpoint:
+    """Resume point: input/profile offsets and output size after the last written batch"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as source:
+            return json.load(source)
+
+    def save(self, state: Dict[str, Any]) -> None:
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as out:
+            json.dump(state, out)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temporary, self.path)
+
+    def clear(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def input_identity(path: str) -> Dict[str, Any]:
+    """What must not change between a checkpoint and its resume"""
+    info = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': info.st_size, 'mtime': info.st_mtime}
+
+
+class BulkScorer:
+    """Streams an export through the analyzer on a process pool"""
+
+    def __init__(
+        self,
+        source: str,
+        output: str,
+        fmt: str = 'jsonl',
+        profiles: Optional[str] = None,
+        profiles_format: str = 'jsonl',
+        workers: int = 0,
+        batch_size: int = 500,
+        forecast_days: int = 0,
+        max_in_flight: int = 0,
+        checkpoint_seconds: float = 5.0,
+        progress_seconds: float = 10.0,
+        log: Callable[[str], None] = lambda message: print(message, file=sys.stderr)
+    ):
+        """
+        Args:
+            source: HealthData export, sorted by userId
+            output: JSONL results file
+            fmt: Export format, one of FORMATS
+            profiles: Optional users export sorted by _id (age, gender, height, weight)
+            profiles_format: Format of the users export
+            workers: Pool processes (0 scores in this process)
+            batch_size: Users per pool task
+            forecast_days: Days of projected health scores added to each user (0 = none)
+            max_in_flight: Batches submitted but not yet written (default 2 x workers)
+            checkpoint_seconds: Minimum time between checkpoints
+            progress_seconds: Time between progress lines
+            log: Progress sink
+        """
+        if fmt not in FORMATS or profiles_format not in FORMATS:
+            raise ValueError(f"Unknown format (expected one of {', '.join(FORMATS)})")
+
+        self.source = source
+        self.output = output
+        self.fmt = fmt
+        self.profiles = profiles
+        self.profiles_format = profiles_format
+        self.workers = workers
+        self.batch_size = batch_size
+        self.forecast_days = forecast_days
+        self.max_in_flight = max_in_flight or max(2, 2 * workers)
+        self.checkpoint_seconds = checkpoint_seconds
+        self.progress_seconds = progress_seconds
+        self.log = log
+        self.checkpoint = Checkpoint(f"{output}.checkpoint")
+
+    def run(self, restart: bool = False) -> Dict[str, Any]:
+        """
+        Score the export, resuming from a checkpoint unless restart is set
+
+        Returns:
+            Summary with users, errors, entries and users per second of this run
+        """
+        identity = {
+            'source': input_identity(self.source),
+            'profiles': input_identity(self.profiles) if self.profiles else None,
+            'format': self.fmt,
+            'forecast_days': self.forecast_days,
+        }
+        state = {'input_offset': 0, 'profiles_offset': 0, 'output_bytes': 0, 'users': 0, 'errors': 0, 'entries': 0}
+
+        saved = None if restart else self.checkpoint.load()
+        if saved is not None:
+            if saved.get('version') != CHECKPOINT_VERSION or saved.get('identity') != identity:
+                raise ExportError(f"{self.checkpoint.path} belongs to a different input; rerun with --restart")
+            if not os.path.exists(self.output):
+                raise ExportError(f"{self.output} is missing; rerun with --restart")
+            state.update(saved['state'])
+            self.log(f"Resuming after {state['users']} users (input byte {state['input_offset']})")
+
+        out = open(self.output, 'r+b' if saved is not None else 'wb')
+        out.truncate(state['output_bytes'])
+        out.seek(state['output_bytes'])
+
+        resumed_users = state['users']
+        users = read_users(self.source, self.fmt, state['input_offset'])
+        profiles = ProfileJoin(self.profiles, self.profiles_format, state['profiles_offset'])
+
+        pool = None
+        if self.workers:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker)
+        else:
+            tasks.init_services()
+
+        in_flight: deque = deque()
+        start = last_checkpoint = last_progress = time.perf_counter()
+        recent = (start, state['users'])
+
+        def write(batch_result: Tuple[bytes, int], meta: Dict[str, Any]) -> None:
+            lines, failed = batch_result
+            out.write(lines)
+            state['users'] += meta['users']
+            state['errors'] += failed
+            state['entries'] += meta['entries']
+            state['input_offset'] = meta['input_offset']
+            state['profiles_offset'] = meta['profiles_offset']
+            state['output_bytes'] = out.tell()
+
+        def save() -> None:
+            out.flush()
+            os.fsync(out.fileno())
+            self.checkpoint.save({'version': CHECKPOINT_VERSION, 'identity': identity, 'state': state})
+
+        try:
+            for batch, meta in self._batches(users, profiles):
+                if pool is None:
+                    write(score_batch(batch, self.forecast_days), meta)
+                else:
+                    in_flight.append((pool.submit(score_batch, batch, self.forecast_days), meta))
+                    while len(in_flight) >= self.max_in_flight or (in_flight and in_flight[0][0].done()):
+                        future, done_meta = in_flight.popleft()
+                        write(future.result(), done_meta)
+
+                now = time.perf_counter()
+                if now - last_checkpoint >= self.checkpoint_seconds:
+                    save()
+                    last_checkpoint = now
+                if now - last_progress >= self.progress_seconds:
+                    self.log(self._progress(state, resumed_users, start, recent, now))
+                    recent = (now, state['users'])
+                    last_progress = now
+
+            while in_flight:
+                future, meta = in_flight.popleft()
+                write(future.result(), meta)
+        except BaseException:
+            # Keep everything written in order so far; drop batches still running
+            for future, _ in in_flight:
+                future.cancel()
+            save()
+            raise
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            out.close()
+
+        self.checkpoint.clear()
+
+        elapsed = time.perf_counter() - start
+        scored = state['users'] - resumed_users
+        return {
+            'output': self.output,
+            'users': state['users'],
+            'errors': state['errors'],
+            'entries': state['entries'],
+            'profiles_matched': profiles.found,
+            'resumed_after': resumed_users,
+            'seconds': round(elapsed, 2),
+            'users_per_second': round(scored / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def _batches(self, users: Iterator, profiles: ProfileJoin) -> Iterator[Tuple[list, Dict[str, Any]]]:
+        """Batches of (user id, entries, profile) with the offsets to resume after them"""
+        batch = []
+        entries = 0
+        next_offset = None
+        for user_id, user_entries, next_offset in users:
+            batch.append((user_id, user_entries, profiles.lookup(user_id)))
+            entries += len(user_entries)
+            if len(batch) >= self.batch_size:
+                yield batch, self._meta(batch, entries, next_offset, profiles)
+                batch, entries = [], 0
+        if batch:
+            yield batch, self._meta(batch, entries, next_offset, profiles)
+
+    @staticmethod
+    def _meta(batch: list, entries: int, next_offset: int, profiles: ProfileJoin) -> Dict[str, Any]:
+        return {'users': len(batch), 'entries': entries, 'input_offset': next_offset, 'profiles_offset': profiles.offset}
+
+    @staticmethod
+    def _progress(state: Dict[str, Any], resumed: int, start: float, recent: Tuple[float, int], now: float) -> str:
+        overall = (state['users'] - resumed) / (now - start)
+        window = (state['users'] - recent[1]) / max(now - recent[0], 1e-9)
+        return (f"{state['users']} users ({state['errors']} errors), {state['entries']} entries: "
+                f"{overall:.0f} users/s overall, {window:.0f} users/s recent")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Score a HealthData export with HealthAnalyzer')
+    parser.add_argument('source', help='HealthData export sorted by userId (JSONL or CSV)')
+    parser.add_argument('-o', '--output', required=True, help='JSONL results file')
+    parser.add_argument('--format', choices=FORMATS, help='export format (default: from the file extension)')
+    parser.add_argument('--profiles', help='users export sorted by _id with age, gender, height, weight')
+    parser.add_argument('--profiles-format', choices=FORMATS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='pool processes (0 = in-process)')
+    parser.add_argument('--batch-size', type=int, default=500, help='users per pool task')
+    parser.add_argument('--forecast-days', type=int, default=0, choices=[0] + list(range(7, 31)), metavar='DAYS',
+                        help='add projected health scores for the next 7-30 days to each user')
+    parser.add_argument('--max-in-flight', type=int, default=0, help='batches queued at once (default 2 x workers)')
+    parser.add_argument('--checkpoint-seconds', type=float, default=5.0)
+    parser.add_argument('--progress-seconds', type=float, default=10.0)
+    parser.add_argument('--restart', action='store_true', help='ignore an existing checkpoint')
+    args = parser.parse_args(argv)
+
+    def guess(path: str) -> str:
+        return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+    scorer = BulkScorer(
+        args.source,
+        args.output,
+        fmt=args.format or guess(args.source),
+        profiles=args.profiles,
+        profiles_format=args.profiles_format or (guess(args.profiles) if args.profiles else 'jsonl'),
+        workers=args.workers,
+        batch_size=args.batch_size,
+        forecast_days=args.forecast_days,
+        max_in_flight=args.max_in_flight,
+        checkpoint_seconds=args.checkpoint_seconds,
+        progress_seconds=args.progress_seconds,
+    )
+    try:
+        summary = scorer.run(restart=args.restart)
+    except KeyboardInterrupt:
+        print(f"Interrupted; rerun the same command to resume from {scorer.checkpoint.path}", file=sys.stderr)
+        return 130
+    except ExportError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
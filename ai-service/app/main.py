@@ -1,14 +1,39 @@
-from fastapi import FastAPI, HTTPException
+# Time every import below for the startup report
+from utils.startup import StartupMiddleware, startup
+startup.start_imports()
+
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from collections import Counter, deque
+from contextlib import asynccontextmanager
 from datetime import datetime
+from itertools import islice
+import asyncio
+import json
 import os
 from dotenv import load_dotenv
 
-from services.health_analyzer import HealthAnalyzer
-from services.workout_recommender import WorkoutRecommender
-from services.meal_recommender import MealRecommender
+import tasks
+from services.health_ingest import (
+    COLUMNAR_CONTENT_TYPE, ENTRY_LIMITS, MSGPACK_AVAILABLE, HealthDataEntry, IngestError, NDJSONDecoder,
+    build_series_batch, decode_columnar, decode_msgpack, iter_line_batches
+)
+from services.health_series import HealthSeries
+from services.incremental_trends import IncrementalTrendAnalyzer
+from services.pose_analyzer import EXERCISES, PoseAnalyzer
+from services.rep_counter import REP_EXERCISES, RepCounter
+from utils.admission import AdmissionController, AdmissionMiddleware, Lane
+from utils.cache import content_key, create_cache
+from utils.executor import ExecutorBusyError, WorkExecutor
+from utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, registry as metrics, stage
+from utils.profiling import RequestProfiler
+from utils.responses import RESPONSE_MODES, build_response
+from utils.singleflight import SingleFlight
+from utils.streaming import iter_json_array, iter_ndjson, loads, ndjson_response, read_body
 
 # Load environment variables
 load_dotenv()
@@ -17,12 +42,180 @@ load_dotenv()
 ALLOWED_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
 ALLOWED_ORIGINS = [origin.strip() for origin in ALLOWED_ORIGINS]
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+MAX_STREAM_BATCH_SIZE = int(os.getenv("MAX_STREAM_BATCH_SIZE", "100000"))
+MAX_STREAM_PLAN_DAYS = int(os.getenv("MAX_STREAM_PLAN_DAYS", "365"))
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "256"))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", "33554432"))
+MAX_POSE_FRAMES = int(os.getenv("MAX_POSE_FRAMES", "1800"))
+MAX_POSE_SESSIONS = int(os.getenv("MAX_POSE_SESSIONS", "500"))
+POSE_WINDOW_FRAMES = int(os.getenv("POSE_WINDOW_FRAMES", "256"))
+INCREMENTAL_MAX_STATES = int(os.getenv("INCREMENTAL_MAX_STATES", "10000"))
+INCREMENTAL_WINDOW = int(os.getenv("INCREMENTAL_WINDOW", "28"))
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_URL = os.getenv("RESULT_CACHE_URL", "")
+RESULT_CACHE_MAX_SIZE = int(os.getenv("RESULT_CACHE_MAX_SIZE", "1024"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+MEAL_PLAN_CACHE_SIZE = int(os.getenv("MEAL_PLAN_CACHE_SIZE", "1024"))
+COALESCING_ENABLED = os.getenv("COALESCING_ENABLED", "true").lower() == "true"
+LAZY_INIT = os.getenv("LAZY_INIT", "false").lower() == "true"
+# Compiled workout/meal catalog file mapped read-only by every worker (empty = built-in catalogs)
+CATALOG_PATH = os.getenv("CATALOG_PATH", "") or None
+# Anomalous-day detection in analysis responses: mad, zscore or off
+ANOMALY_METHOD = os.getenv("ANOMALY_METHOD", "mad")
+# Trend slopes and labels in analysis responses: theilsen, ols, ewma or split
+TREND_METHOD = os.getenv("TREND_METHOD", "theilsen")
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "inline")
+EXECUTOR_WORKERS = int(os.getenv("EXECUTOR_WORKERS", "0")) or None
+EXECUTOR_QUEUE_SIZE = int(os.getenv("EXECUTOR_QUEUE_SIZE", "64"))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "./profiles")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+RESPONSE_MODE = os.getenv("RESPONSE_MODE", "validate_once")
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+ADMISSION_CONCURRENCY = int(os.getenv("ADMISSION_CONCURRENCY", "0"))
+ADMISSION_BULK_CONCURRENCY = int(os.getenv("ADMISSION_BULK_CONCURRENCY", "0"))
+ADMISSION_INTERACTIVE_QUEUE = int(os.getenv("ADMISSION_INTERACTIVE_QUEUE", "64"))
+ADMISSION_BULK_QUEUE = int(os.getenv("ADMISSION_BULK_QUEUE", "256"))
+ADMISSION_INTERACTIVE_DEADLINE_MS = float(os.getenv("ADMISSION_INTERACTIVE_DEADLINE_MS", "9000"))
+ADMISSION_BULK_DEADLINE_MS = float(os.getenv("ADMISSION_BULK_DEADLINE_MS", "120000"))
+PRIORITY_HEADER = os.getenv("PRIORITY_HEADER", "X-Priority")
+DEADLINE_HEADER = os.getenv("DEADLINE_HEADER", "X-Deadline-Ms")
+
+if RESPONSE_MODE not in RESPONSE_MODES:
+    raise ValueError(f"Unknown RESPONSE_MODE: {RESPONSE_MODE} (expected one of {', '.join(RESPONSE_MODES)})")
+if ANOMALY_METHOD not in ("mad", "zscore", "off"):
+    raise ValueError(f"Unknown ANOMALY_METHOD: {ANOMALY_METHOD} (expected one of mad, zscore, off)")
+if TREND_METHOD not in ("theilsen", "ols", "ewma", "split"):
+    raise ValueError(f"Unknown TREND_METHOD: {TREND_METHOD} (expected one of theilsen, ols, ewma, split)")
+if not 2 <= INCREMENTAL_WINDOW <= 3650:
+    raise ValueError(f"INCREMENTAL_WINDOW must be between 2 and 3650 days, got {INCREMENTAL_WINDOW}")
+
+# Routes whose handlers can be profiled on demand
+PROFILED_ROUTES = [
+    "/api/analyze",
+    "/api/analyze/upload",
+    "/api/analyze/batch",
+    "/api/forecast",
+    "/api/forecast/batch",
+    "/api/workouts/recommend",
+    "/api/meals/plan",
+    "/api/meals/plan/batch",
+    "/api/pose/analyze",
+]
+
+# Default admission lane per route; the priority header can pick another lane.
+# A slot is only held while the request's work runs on the executor.
+ADMISSION_ROUTES = {
+    "/api/analyze": "interactive",
+    "/api/analyze/upload": "interactive",
+    "/api/workouts/recommend": "interactive",
+    "/api/meals/plan": "interactive",
+    "/api/pose/analyze": "interactive",
+    "/api/meals/plan/stream": "interactive",
+    "/api/forecast": "interactive",
+    "/api/analyze/batch": "bulk",
+    "/api/analyze/batch/stream": "bulk",
+    "/api/meals/plan/batch": "bulk",
+    "/api/forecast/batch": "bulk",
+}
+
+# Bump when analysis output changes so shared caches don't serve stale results;
+# the methods are part of it, so changing either starts a fresh namespace
+ANALYSIS_CACHE_NAMESPACE = f"analyze:v3:anomaly={ANOMALY_METHOD}:trend={TREND_METHOD}"
+
+# Initialize analysis and recommender engines for this process (on first use when lazy)
+with startup.phase("init_services"):
+    tasks.init_services(
+        meal_plan_cache_size=MEAL_PLAN_CACHE_SIZE,
+        lazy=LAZY_INIT,
+        catalog_path=CATALOG_PATH,
+        anomaly_method=ANOMALY_METHOD,
+        trend_method=TREND_METHOD
+    )
+
+def engines():
+    """This process's engines (the tasks module), built first if still lazy"""
+    tasks.load_services()
+    return tasks
+
+# CPU-bound work runs inline, in a thread pool or in a process pool
+executor = WorkExecutor(
+    EXECUTION_MODE,
+    max_workers=EXECUTOR_WORKERS,
+    max_queue=EXECUTOR_QUEUE_SIZE,
+    initializer=tasks.init_services,
+    initargs=(MEAL_PLAN_CACHE_SIZE, LAZY_INIT, CATALOG_PATH, ANOMALY_METHOD, TREND_METHOD)
+)
+
+def warmup_steps():
+    """Background warm-up: engines here and in every pool worker, then one tiny call each"""
+    steps = [("services", tasks.load_services)]
+    if executor.mode == "process":
+        steps.append(("process_pool", lambda: executor.warm_up(tasks.warm_up)))
+    steps.append(("engines", tasks.warm_up))
+    return steps
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if WARMUP_ENABLED:
+        if executor.mode == "process":
+            # Fork every pool worker before the warm-up thread exists: a worker forked
+            # while that thread holds an import or engine lock would deadlock on it
+            with startup.phase("process_pool_start"):
+                executor.warm_up()
+        startup.start_warmup(warmup_steps())
+    yield
+    executor.shutdown()
 
 # Initialize FastAPI app
 app = FastAPI(
     title="HealthSync AI Service",
     description="AI-powered health analysis and recommendation engine",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
+)
+
+# Per-request profiling, triggered by header or sampling
+profiler = RequestProfiler(
+    enabled=PROFILING_ENABLED,
+    directory=PROFILE_DIR,
+    sample_rate=PROFILE_SAMPLE_RATE,
+    header=PROFILE_HEADER,
+    token=PROFILE_TOKEN,
+    keep=PROFILE_KEEP
+)
+
+# Per-route and per-stage timing and profiling; must be set before routes are declared
+metrics.enabled = METRICS_ENABLED
+app.router.route_class = profiler.route_class(metrics.route_class(), routes=PROFILED_ROUTES)
+
+# Interactive requests are admitted before bulk work; by default bulk leaves one worker free
+admission_slots = ADMISSION_CONCURRENCY or 2 * executor.max_workers
+admission = AdmissionController(
+    admission_slots,
+    [
+        Lane("interactive", admission_slots, ADMISSION_INTERACTIVE_QUEUE, ADMISSION_INTERACTIVE_DEADLINE_MS / 1000),
+        Lane(
+            "bulk",
+            min(ADMISSION_BULK_CONCURRENCY or max(1, executor.max_workers - 1), admission_slots),
+            ADMISSION_BULK_QUEUE,
+            ADMISSION_BULK_DEADLINE_MS / 1000
+        ),
+    ],
+    enabled=ADMISSION_ENABLED
+)
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    routes=ADMISSION_ROUTES,
+    priority_header=PRIORITY_HEADER,
+    deadline_header=DEADLINE_HEADER
 )
 
 # CORS configuration - use environment-based origins in production
@@ -34,21 +227,53 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize health analyzer
-analyzer = HealthAnalyzer()
+@app.exception_handler(ExecutorBusyError)
+async def executor_busy_handler(request: Request, exc: ExecutorBusyError):
+    """Reject work with 503 when the executor queue is full or admission control sheds it"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
 
-# Initialize recommender engines
-workout_recommender = WorkoutRecommender()
-meal_recommender = MealRecommender()
+# Incremental trend states live in this process and are updated inline
+incremental_analyzer: Optional[IncrementalTrendAnalyzer] = None
 
-# Request/Response models
-class HealthDataEntry(BaseModel):
-    date: str
-    steps: int = Field(ge=0, le=100000)
-    sleepHours: float = Field(ge=0, le=24)
-    waterIntake: float = Field(ge=0, le=20)
-    calories: int = Field(ge=0, le=10000)
-    mood: str = Field(pattern="^(excellent|good|okay|bad|terrible)$")
+def get_incremental_analyzer() -> IncrementalTrendAnalyzer:
+    """The incremental trend analyzer, created on first use"""
+    global incremental_analyzer
+    if incremental_analyzer is None:
+        incremental_analyzer = IncrementalTrendAnalyzer(
+            engines().analyzer,
+            max_states=INCREMENTAL_MAX_STATES,
+            default_window=INCREMENTAL_WINDOW
+        )
+    return incremental_analyzer
+
+# Initialize result cache for analysis responses
+result_cache = create_cache(
+    RESULT_CACHE_URL,
+    max_size=RESULT_CACHE_MAX_SIZE,
+    ttl=RESULT_CACHE_TTL_SECONDS or None
+) if RESULT_CACHE_ENABLED else None
+
+async def run_admitted(fn, *args, renew: bool = False):
+    """
+    Run fn(*args) on the executor once the request's admission lane has a free slot
+    
+    Args:
+        renew: Give this call the request's full time budget (chunks of a streamed response)
+    """
+    async with admission.slot(renew=renew):
+        return await executor.run(fn, *args)
+
+# Identical concurrent requests share one in-progress computation
+coalescer = SingleFlight(enabled=COALESCING_ENABLED)
+
+# Request/Response models (HealthDataEntry lives in services.health_ingest,
+# next to the decoders that check its bounds)
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+MSGPACK_CONTENT_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
 
 class UserProfile(BaseModel):
     age: Optional[int] = None
@@ -60,20 +285,104 @@ class AnalysisRequest(BaseModel):
     healthData: List[HealthDataEntry]
     userProfile: UserProfile
 
+class BatchAnalysisItem(BaseModel):
+    # Entries are checked column by column against HealthDataEntry's bounds
+    # (see validate_batch_items), without one Pydantic object per entry
+    healthData: List[Any]
+    userProfile: UserProfile
+    userId: str
+
+class BatchAnalysisRequest(BaseModel):
+    # Items are validated one by one in the route so that a single
+    # malformed user is reported in `errors` instead of failing the batch
+    users: List[Any]
+    # Anomalies and trend fits per user, as /api/analyze returns them;
+    # without, trend labels follow the split-half rule
+    details: bool = False
+
+class IncrementalAnalysisRequest(BaseModel):
+    stateKey: str = Field(min_length=1, max_length=128)
+    entry: HealthDataEntry
+    userProfile: UserProfile
+    # Days covered by the trends; omitted keeps the window of the existing
+    # state, or INCREMENTAL_WINDOW for a new one
+    window: Optional[int] = Field(default=None, ge=2, le=3650)
+    # Earlier history used to (re)initialize the state; at most `window` entries
+    seed: Optional[List[HealthDataEntry]] = None
+
 class Recommendation(BaseModel):
     category: str
     priority: str
     suggestion: str
 
+class Anomaly(BaseModel):
+    date: str
+    metric: str
+    value: Union[int, float]
+    expected: float
+    score: float
+    direction: str
+
+class Trend(BaseModel):
+    slope: float
+    confidence: float
+    label: str
+
 class AnalysisResponse(BaseModel):
     healthScore: int
     recommendations: List[Recommendation]
     insights: str
+    anomalies: List[Anomaly] = []
+    trends: Dict[str, Trend] = {}
+
+class IncrementalAnalysisResponse(AnalysisResponse):
+    dataPoints: int
+
+class BatchAnalysisResponse(BaseModel):
+    results: Dict[str, AnalysisResponse]
+    errors: Dict[str, str]
+    processed: int
+    failed: int
+
+class ForecastRequest(BaseModel):
+    healthData: List[HealthDataEntry]
+    days: int = Field(default=14, ge=7, le=30)
+
+class ForecastBatchItem(BaseModel):
+    userId: str
+    healthData: List[HealthDataEntry]
+
+class ForecastBatchRequest(BaseModel):
+    # Validated per user in the route, like BatchAnalysisRequest
+    users: List[Any]
+    days: int = Field(default=14, ge=7, le=30)
+
+class ForecastDay(BaseModel):
+    day: int
+    date: Optional[str]
+    healthScore: float
+    steps: int
+    sleepHours: float
+    waterIntake: float
+    calories: int
+
+class ForecastResponse(BaseModel):
+    forecast: List[ForecastDay]
+
+class ForecastBatchResponse(BaseModel):
+    results: Dict[str, ForecastResponse]
+    errors: Dict[str, str]
+    processed: int
+    failed: int
 
 class WorkoutRecommendationRequest(BaseModel):
     userProfile: UserProfile
     goal: str = Field(default="weight_loss", pattern="^(weight_loss|muscle_gain|endurance|flexibility)$")
     count: int = Field(default=3, ge=1, le=10)
+    intensity: Optional[str] = Field(default=None, pattern="^(low|moderate|high)$")
+    maxDuration: Optional[int] = Field(default=None, ge=5, le=240)
+    # Equipment the user has access to; omitted means no restriction
+    equipment: Optional[List[str]] = None
 
 class WorkoutRecommendationResponse(BaseModel):
     goal: str
@@ -85,11 +394,46 @@ class MealPlanRequest(BaseModel):
     diet_type: str = Field(default="non_vegetarian", pattern="^(vegetarian|non_vegetarian|high_protein)$")
     days: int = Field(default=7, ge=1, le=30)
 
+class MealPlanStreamRequest(MealPlanRequest):
+    days: int = Field(default=7, ge=1, le=MAX_STREAM_PLAN_DAYS)
+
 class MealPlanResponse(BaseModel):
     meal_plan: Dict
     macros_breakdown: Dict
     generated_at: str
 
+class MealPlanBatchItem(MealPlanRequest):
+    userId: str
+
+class MealPlanBatchRequest(BaseModel):
+    # Validated per user in the route, like BatchAnalysisRequest
+    users: List[Any]
+
+class MealPlanBatchResponse(BaseModel):
+    results: Dict[str, MealPlanResponse]
+    errors: Dict[str, str]
+    processed: int
+    failed: int
+
+class PoseAnalysisRequest(BaseModel):
+    exercise: str = Field(default="generic", pattern=f"^({'|'.join(EXERCISES)})$")
+    # Frames x 17 COCO keypoints x [x, y] or [x, y, confidence]
+    frames: List[List[List[float]]] = Field(..., min_length=1)
+    minConfidence: Optional[float] = Field(default=None, ge=0, le=1)
+    includeAngles: bool = False
+
+class PoseAnalysisResponse(BaseModel):
+    exercise: str
+    frameCount: int
+    validFrames: int
+    accuracy: List[Optional[float]]
+    overallAccuracy: Optional[int]
+    angles: Dict[str, Dict[str, Optional[float]]]
+    symmetry: Dict[str, Optional[float]]
+    feedback: List[str]
+    issues: Dict[str, float]
+    frameAngles: Optional[Dict[str, List[Optional[float]]]] = None
+
 # Routes
 @app.get("/")
 async def root():
@@ -100,6 +444,22 @@ async def root():
         "status": "active",
         "endpoints": {
             "analyze": "/api/analyze",
+            "analyze_upload": "/api/analyze/upload",
+            "analyze_batch": "/api/analyze/batch",
+            "analyze_batch_stream": "/api/analyze/batch/stream",
+            "analyze_incremental": "/api/analyze/incremental",
+            "forecast": "/api/forecast",
+            "forecast_batch": "/api/forecast/batch",
+            "cache_stats": "/api/cache/stats",
+            "executor_stats": "/api/executor/stats",
+            "admission_stats": "/api/admission/stats",
+            "startup": "/api/startup",
+            "metrics": "/metrics",
+            "profiles": "/api/profiles",
+            "meal_plan_batch": "/api/meals/plan/batch",
+            "meal_plan_stream": "/api/meals/plan/stream",
+            "pose_analyze": "/api/pose/analyze",
+            "pose_stream": "/ws/pose",
             "health": "/health"
         }
     }
@@ -130,20 +490,586 @@ async def analyze_health(request: AnalysisRequest):
                 detail="No health data provided for analysis"
             )
         
-        # Convert Pydantic models to dictionaries
-        health_data_list = [entry.model_dump() for entry in request.healthData]
-        user_profile_dict = request.userProfile.model_dump()
+        # Convert entries to a columnar series once for the whole request
+        with stage('series'):
+            health_series = HealthSeries.from_entries(request.healthData)
+            user_profile_dict = request.userProfile.model_dump()
+        
+        return await analyze_series(health_series, user_profile_dict)
+    
+    except ExecutorBusyError:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+@app.post("/api/analyze/upload", response_model=AnalysisResponse)
+async def analyze_health_upload(request: Request):
+    """
+    Analyze a health history uploaded in a compact format
+    
+    The format is chosen by Content-Type:
+        application/x-ndjson              - {"userProfile": {...}} line, then one entry per line (streamed)
+        application/msgpack               - {"userProfile", "healthData"} or {"userProfile", "columns"}
+        application/vnd.healthsync.columnar - struct-packed columns (see services.health_ingest.pack_columns)
+    
+    Entries are decoded straight into a HealthSeries and validated against
+    the same bounds as HealthDataEntry. Bodies over MAX_UPLOAD_BYTES get a 413.
+    
+    Returns:
+        Health score (0-100) and personalized recommendations
+    """
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    
+    try:
+        with stage('decode'):
+            if content_type in NDJSON_CONTENT_TYPES:
+                decoder = NDJSONDecoder(ENTRY_LIMITS)
+                async for lines in iter_line_batches(upload_chunks(request)):
+                    decoder.feed_lines(lines)
+                profile, health_series = decoder.finish()
+            elif content_type in MSGPACK_CONTENT_TYPES:
+                if not MSGPACK_AVAILABLE:
+                    raise HTTPException(
+                        status_code=415,
+                        detail="MessagePack uploads require the 'msgpack' package on the server"
+                    )
+                profile, health_series = decode_msgpack(await read_upload(request), ENTRY_LIMITS)
+            elif content_type == COLUMNAR_CONTENT_TYPE:
+                profile, health_series = decode_columnar(await read_upload(request), ENTRY_LIMITS)
+            else:
+                raise HTTPException(
+                    status_code=415,
+                    detail=f"Unsupported Content-Type: {content_type or 'none'}"
+                )
+            
+            user_profile_dict = UserProfile.model_validate(profile).model_dump()
+    except IngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.errors)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=[{**error, 'loc': ['userProfile', *error['loc']]} for error in e.errors(include_url=False)]
+        )
+    
+    if len(health_series) == 0:
+        raise HTTPException(status_code=400, detail="No health data provided for analysis")
+    
+    try:
+        return await analyze_series(health_series, user_profile_dict)
+    except ExecutorBusyError:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
+
+async def upload_chunks(request: Request):
+    """Body chunks of an upload or batch stream; 413 once it grows past MAX_UPLOAD_BYTES"""
+    too_large = HTTPException(status_code=413, detail=f"Upload too large (max {MAX_UPLOAD_BYTES} bytes)")
+    declared = request.headers.get('content-length', '')
+    if declared.isdigit() and int(declared) > MAX_UPLOAD_BYTES:
+        raise too_large
+    
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > MAX_UPLOAD_BYTES:
+            raise too_large
+        yield chunk
+
+async def read_upload(request: Request) -> bytearray:
+    """Whole body of an upload, within MAX_UPLOAD_BYTES"""
+    body = bytearray()
+    async for chunk in upload_chunks(request):
+        body += chunk
+    return body
+
+async def analyze_series(health_series: HealthSeries, user_profile_dict: Dict[str, Any]):
+    """Cached, executor-backed analysis shared by the analyze routes"""
+    # Serve identical requests from the result cache
+    cache_key = None
+    if result_cache is not None:
+        with stage('cache_lookup'):
+            cache_key = content_key(ANALYSIS_CACHE_NAMESPACE, health_series.digest(), user_profile_dict)
+            cached = await result_cache.aget(cache_key)
+        if cached is not None:
+            return build_response(AnalysisResponse, cached, RESPONSE_MODE)
+    
+    async def compute():
+        result = await run_admitted(tasks.analyze, health_series, user_profile_dict)
+        if cache_key is not None:
+            await result_cache.aset(cache_key, result)
+        return result
+    
+    # Perform analysis, once for identical concurrent requests
+    with stage('analysis'):
+        flight_key = cache_key
+        if flight_key is None and coalescer.enabled:
+            flight_key = content_key(ANALYSIS_CACHE_NAMESPACE, health_series.digest(), user_profile_dict)
+        result = await coalescer.run('analyze', flight_key, compute)
+    
+    with stage('encode'):
+        return build_response(AnalysisResponse, result, RESPONSE_MODE)
+
+def batch_user_ids(users: List[Any]) -> Tuple[List[str], set]:
+    """
+    userId of every item of a batch request, and the userIds given more than once
+    
+    Items without a userId (or that aren't objects) are named by position,
+    "#<index>". Every copy of a repeated userId is rejected, so a userId is
+    reported once, in either results or errors.
+    """
+    user_ids = [
+        str(raw_item.get('userId', f"#{index}")) if isinstance(raw_item, dict) else f"#{index}"
+        for index, raw_item in enumerate(users)
+    ]
+    return user_ids, {user_id for user_id, count in Counter(user_ids).items() if count > 1}
+
+def validate_batch_items(
+    raw_items: List[Any]
+) -> List[Tuple[Optional[Tuple[HealthSeries, Dict[str, Any]]], Optional[str]]]:
+    """
+    Validate the users of a batch analysis request
+    
+    Each item's userId and profile are checked by Pydantic. The entries of
+    all items are then decoded together, straight into one HealthSeries per
+    user, and accept and reject the same values as HealthDataEntry.
+    
+    Returns:
+        Per item, ((series, profile), None) for a valid user, else (None, error message)
+    """
+    outcomes = [None] * len(raw_items)
+    items = []
+    for position, raw_item in enumerate(raw_items):
+        if not isinstance(raw_item, dict):
+            outcomes[position] = (None, "Invalid request: expected a JSON object")
+            continue
+        
+        try:
+            item = BatchAnalysisItem.model_validate(raw_item)
+        except ValidationError as e:
+            outcomes[position] = (None, f"Invalid request: {e.errors()[0]['msg']}")
+            continue
+        
+        if not item.healthData:
+            outcomes[position] = (None, "No health data provided for analysis")
+            continue
+        
+        items.append((position, item))
+    
+    built = build_series_batch([item.healthData for _, item in items], ENTRY_LIMITS)
+    for (position, item), (series, error) in zip(items, built):
+        if error is not None:
+            outcomes[position] = (None, f"Invalid request: {error.errors[0]['msg']}")
+        else:
+            outcomes[position] = ((series, item.userProfile.model_dump()), None)
+    
+    return outcomes
+
+def parse_json_body(model: type, body: Union[bytes, bytearray]) -> Any:
+    """
+    Validate a JSON request body against a model, with FastAPI's 422 errors
+    
+    Routes taking large bodies decode them with orjson (see
+    utils.streaming.loads), about twice as fast as FastAPI's json.loads.
+    """
+    try:
+        # An empty body is a missing one, as for FastAPI
+        payload = loads(body) if body else None
+    except json.JSONDecodeError as e:
+        raise RequestValidationError([{
+            'type': 'json_invalid',
+            'loc': ('body', e.pos),
+            'msg': 'JSON decode error',
+            'input': {},
+            'ctx': {'error': e.msg}
+        }])
+    
+    if payload is None:
+        raise RequestValidationError([{'type': 'missing', 'loc': ('body',), 'msg': 'Field required', 'input': None}])
+    
+    try:
+        return model.model_validate(payload)
+    except ValidationError as e:
+        raise RequestValidationError([{**error, 'loc': ('body', *error['loc'])} for error in e.errors()])
+
+def json_body_schema(model: type) -> Dict[str, Any]:
+    """OpenAPI request body of a route that parses its JSON body itself"""
+    return {'requestBody': {
+        'required': True,
+        'content': {'application/json': {'schema': model.model_json_schema()}}
+    }}
+
+@app.post(
+    "/api/analyze/batch",
+    response_model=BatchAnalysisResponse,
+    openapi_extra=json_body_schema(BatchAnalysisRequest)
+)
+async def analyze_health_batch(raw_request: Request):
+    """
+    Analyze health data for many users in a single request
+    
+    Args:
+        raw_request: JSON body with the list of users, each with a userId,
+            health data and profile, and whether to include details
+    
+    Returns:
+        Analysis results keyed by userId, plus per-user errors (a userId
+        given more than once is only reported as an error)
+    """
+    with stage('decode'):
+        request = parse_json_body(BatchAnalysisRequest, await read_body(raw_request))
+    
+    if len(request.users) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.users)} users (max {MAX_BATCH_SIZE})"
+        )
+    
+    batch = []
+    errors = {}
+    
+    with stage('item_validation'):
+        user_ids, duplicates = batch_user_ids(request.users)
+        outcomes = iter(validate_batch_items([
+            raw_item for user_id, raw_item in zip(user_ids, request.users) if user_id not in duplicates
+        ]))
+        for user_id in user_ids:
+            if user_id in duplicates:
+                errors[user_id] = "Duplicate userId in batch"
+                continue
+            
+            item, error = next(outcomes)
+            if error is not None:
+                errors[user_id] = error
+                continue
+            
+            batch.append((user_id, *item))
+    
+    try:
+        with stage('analysis'):
+            outcome = await run_admitted(tasks.analyze_batch, batch, request.details)
+    except ExecutorBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+    
+    errors.update(outcome['errors'])
+    
+    with stage('encode'):
+        return build_response(BatchAnalysisResponse, {
+            'results': outcome['results'],
+            'errors': errors,
+            'processed': len(outcome['results']),
+            'failed': len(errors)
+        }, RESPONSE_MODE)
+
+@app.post("/api/analyze/batch/stream")
+async def analyze_health_batch_stream(request: Request, details: bool = False):
+    """
+    Analyze many users, streaming one NDJSON record per user
+    
+    The body is {"users": [...]} as for /api/analyze/batch, or NDJSON with
+    one user per line; either is decoded one user at a time. Users are
+    analyzed STREAM_CHUNK_SIZE at a time (the next chunk is computed while
+    the current one is sent) and records follow the input order:
+        {"type": "result", "userId", "healthScore", "recommendations", "insights"}
+        {"type": "error", "userId", "error"}
+        {"type": "end", "complete": true, "processed", "failed"}
+    If analysis fails once the stream has started, the last record is
+    {"type": "end", "complete": false, "error", ...} with the counts so far.
+    
+    Args:
+        details: Include anomalies and trend fits, as /api/analyze/batch does
+    
+    Returns:
+        application/x-ndjson stream
+    """
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    # Held whole while users are decoded from it, so capped like an upload
+    body = await read_upload(request)
+    
+    # Users are decoded one at a time as the stream advances
+    if content_type in NDJSON_CONTENT_TYPES:
+        users = iter_ndjson(body)
+    else:
+        users = iter_json_array(body, 'users')
+    
+    def checked(users):
+        try:
+            for index, raw_item in enumerate(users):
+                if index == MAX_STREAM_BATCH_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Batch too large: more than {MAX_STREAM_BATCH_SIZE} users"
+                    )
+                yield raw_item
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid request body: {str(e)}")
+    
+    counts = {'processed': 0, 'failed': 0}
+    
+    def on_error(e: Exception) -> Dict[str, Any]:
+        if isinstance(e, HTTPException):
+            error = e.detail
+        elif isinstance(e, ExecutorBusyError):
+            error = str(e)
+        else:
+            error = f"Batch analysis failed: {str(e)}"
+        return {'type': 'end', 'complete': False, 'error': error, **counts}
+    
+    try:
+        return await ndjson_response(batch_analysis_records(checked(users), counts, details), on_error)
+    except (HTTPException, ExecutorBusyError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch analysis failed: {str(e)}")
+
+async def batch_analysis_records(users: Iterable[Any], counts: Dict[str, int], details: bool):
+    """Record groups of a streamed batch analysis, one group per chunk of users"""
+    users = enumerate(users)
+    # (index, userId, validation error) per user of a chunk, and its analysis
+    pending = deque()
+    
+    async def render(entries, analysis):
+        outcome = await analysis if analysis is not None else {'results': {}, 'errors': {}}
+        records = []
+        for index, user_id, error in entries:
+            result = outcome['results'].get(index)
+            if result is not None:
+                records.append({'type': 'result', 'userId': user_id, **result})
+                counts['processed'] += 1
+            else:
+                records.append({
+                    'type': 'error',
+                    'userId': user_id,
+                    'error': error or outcome['errors'].get(index, "Analysis failed")
+                })
+                counts['failed'] += 1
+        return records
+    
+    try:
+        while True:
+            chunk = list(islice(users, STREAM_CHUNK_SIZE))
+            if not chunk:
+                break
+            
+            entries = []
+            batch = []
+            outcomes = validate_batch_items([raw_item for _, raw_item in chunk])
+            for (index, raw_item), (item, error) in zip(chunk, outcomes):
+                # Malformed NDJSON lines arrive as None and other non-objects
+                # as is; both are reported in place as "#<index>"
+                user_id = str(raw_item.get('userId', f"#{index}")) if isinstance(raw_item, dict) else f"#{index}"
+                entries.append((index, user_id, error))
+                if item is not None:
+                    # Keyed by position, so repeated userIds stay separate records
+                    batch.append((index, *item))
+            
+            analysis = asyncio.ensure_future(run_admitted(tasks.analyze_batch, batch, details, renew=True)) if batch else None
+            pending.append((entries, analysis))
+            if len(pending) > 1:
+                yield await render(*pending.popleft())
+        
+        while pending:
+            yield await render(*pending.popleft())
         
-        # Perform analysis
-        result = analyzer.analyze(health_data_list, user_profile_dict)
+        yield [{'type': 'end', 'complete': True, **counts}]
+    finally:
+        # Stop work for chunks that will not be sent (error or client gone)
+        for _, analysis in pending:
+            if analysis is not None:
+                analysis.cancel()
+                analysis.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+@app.post("/api/analyze/incremental", response_model=IncrementalAnalysisResponse)
+async def analyze_health_incremental(request: IncrementalAnalysisRequest):
+    """
+    Append one day to a server-side trend state and analyze it
+    
+    Args:
+        request: State key, the new entry, user profile and optional seed history
+    
+    Returns:
+        Health score and recommendations over the state's window
+    """
+    # A seed starts a new state, bounded by the requested or default window
+    if request.seed is not None and len(request.seed) > (request.window or INCREMENTAL_WINDOW):
+        raise HTTPException(
+            status_code=413,
+            detail=f"Seed too long: {len(request.seed)} entries (max {request.window or INCREMENTAL_WINDOW}, the window)"
+        )
+    
+    try:
+        seed = [entry.model_dump() for entry in request.seed] if request.seed is not None else None
+        result = get_incremental_analyzer().update(
+            request.stateKey,
+            request.entry.model_dump(),
+            request.userProfile.model_dump(),
+            window=request.window,
+            seed=seed
+        )
         
-        return AnalysisResponse(**result)
+        return build_response(IncrementalAnalysisResponse, result, RESPONSE_MODE)
     
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
+@app.delete("/api/analyze/incremental/{state_key}")
+async def reset_incremental_state(state_key: str):
+    """Drop the server-side trend state for a key"""
+    if not get_incremental_analyzer().reset(state_key):
+        raise HTTPException(status_code=404, detail="Unknown state key")
+    
+    return {"stateKey": state_key, "reset": True}
+
+@app.post("/api/forecast", response_model=ForecastResponse)
+async def forecast_health(request: ForecastRequest):
+    """
+    Project the daily health score for the next days
+    
+    Args:
+        request: Health data entries and the number of days to project (7-30)
+    
+    Returns:
+        One projected day per requested day: health score and metrics
+    """
+    if not request.healthData:
+        raise HTTPException(status_code=400, detail="No health data provided for forecasting")
+    
+    with stage('series'):
+        health_series = HealthSeries.from_entries(request.healthData)
+    
+    try:
+        result = await run_admitted(tasks.forecast, health_series, request.days)
+    except ExecutorBusyError:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Forecast failed: {str(e)}")
+    
+    with stage('encode'):
+        return build_response(ForecastResponse, result, RESPONSE_MODE)
+
+@app.post("/api/forecast/batch", response_model=ForecastBatchResponse)
+async def forecast_health_batch(request: ForecastBatchRequest):
+    """
+    Project the daily health score of many users in a single request
+    
+    Args:
+        request: List of users, each with a userId and health data, and the days to project
+    
+    Returns:
+        Forecasts keyed by userId, plus per-user errors (a userId given more
+        than once is only reported as an error)
+    """
+    if len(request.users) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.users)} users (max {MAX_BATCH_SIZE})"
+        )
+    
+    batch = []
+    errors = {}
+    
+    with stage('item_validation'):
+        user_ids, duplicates = batch_user_ids(request.users)
+        for user_id, raw_item in zip(user_ids, request.users):
+            if user_id in duplicates:
+                errors[user_id] = "Duplicate userId in batch"
+                continue
+            
+            try:
+                item = ForecastBatchItem.model_validate(raw_item)
+            except ValidationError as e:
+                errors[user_id] = f"Invalid request: {e.errors()[0]['msg']}"
+                continue
+            
+            if not item.healthData:
+                errors[user_id] = "No health data provided for forecasting"
+                continue
+            
+            batch.append((user_id, HealthSeries.from_entries(item.healthData)))
+    
+    try:
+        outcome = await run_admitted(tasks.forecast_batch, batch, request.days)
+    except ExecutorBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch forecast failed: {str(e)}")
+    
+    errors.update(outcome['errors'])
+    
+    with stage('encode'):
+        return build_response(ForecastBatchResponse, {
+            'results': outcome['results'],
+            'errors': errors,
+            'processed': len(outcome['results']),
+            'failed': len(errors)
+        }, RESPONSE_MODE)
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss/eviction counters of the result and meal plan caches, and request coalescing"""
+    analysis_stats = {"enabled": result_cache is not None}
+    if result_cache is not None:
+        analysis_stats.update(result_cache.stats())
+    
+    return {
+        "analysis": analysis_stats,
+        "meal_plans": engines().meal_recommender.cache_stats(),
+        "coalescing": coalescer.stats()
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Request counters and latency histograms in Prometheus text format"""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/api/profiles")
+async def recent_profiles(limit: int = 20, route: Optional[str] = None):
+    """
+    Recent request profiles and their hottest functions
+    
+    Args:
+        limit: Number of most recent profiles to aggregate
+        route: Only profiles of this route path
+    
+    Returns:
+        Profile ids (files in PROFILE_DIR) and functions ranked by own time
+    """
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+    
+    return profiler.recent(limit=max(1, limit), route=route)
+
+@app.get("/api/executor/stats")
+async def executor_stats():
+    """Execution mode, pending work and rejection counters"""
+    return executor.stats()
+
+@app.get("/api/startup")
+async def startup_report():
+    """Import, initialization and warm-up timings and time to first response per route"""
+    return {
+        "lazy_init": LAZY_INIT,
+        "execution_mode": EXECUTION_MODE,
+        **startup.report()
+    }
+
+@app.get("/api/admission/stats")
+async def admission_stats():
+    """Slots, queue lengths, wait times and shed counts per admission lane"""
+    return admission.stats()
+
 @app.post("/api/workouts/recommend", response_model=WorkoutRecommendationResponse)
 async def recommend_workouts(request: WorkoutRecommendationRequest):
     """
@@ -156,19 +1082,27 @@ async def recommend_workouts(request: WorkoutRecommendationRequest):
         List of recommended workouts tailored to user
     """
     try:
-        user_profile_dict = request.userProfile.model_dump()
-        recommendations = workout_recommender.get_recommendations(
-            user_profile_dict,
+        args = (
+            request.userProfile.model_dump(),
             request.goal,
-            request.count
+            request.count,
+            request.intensity,
+            request.maxDuration,
+            request.equipment
         )
-        
-        return WorkoutRecommendationResponse(
-            goal=request.goal,
-            recommendations=recommendations,
-            generated_at=datetime.now().isoformat()
+        recommendations = await coalescer.run(
+            'workouts', content_key('workouts', *args),
+            run_admitted, tasks.recommend_workouts, *args
         )
+        
+        return build_response(WorkoutRecommendationResponse, {
+            'goal': request.goal,
+            'recommendations': recommendations,
+            'generated_at': datetime.now().isoformat()
+        }, RESPONSE_MODE)
     
+    except ExecutorBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Workout recommendation failed: {str(e)}")
 
@@ -184,25 +1118,251 @@ async def generate_meal_plan(request: MealPlanRequest):
         Complete meal plan with macronutrient breakdown
     """
     try:
-        user_profile_dict = request.userProfile.model_dump()
-        meal_plan = meal_recommender.get_meal_plan(
-            user_profile_dict,
-            request.diet_type,
-            request.days
+        args = (request.userProfile.model_dump(), request.diet_type, request.days)
+        meal_plan = await coalescer.run(
+            'meal_plan', content_key('meal_plan', *args),
+            run_admitted, tasks.plan_meals, *args
         )
         
-        # Get sample meals for macro analysis
-        diet_meals = meal_recommender.MEAL_PLANS[request.diet_type]['meals']
-        macros = meal_recommender.analyze_macros(diet_meals)
+        # Macro breakdown is precomputed per diet
+        macros = engines().meal_recommender.get_macros(request.diet_type)
+        
+        with stage('encode'):
+            return build_response(MealPlanResponse, {
+                'meal_plan': meal_plan,
+                'macros_breakdown': macros,
+                'generated_at': datetime.now().isoformat()
+            }, RESPONSE_MODE)
+    
+    except ExecutorBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Meal plan generation failed: {str(e)}")
+
+@app.post("/api/meals/plan/stream")
+async def generate_meal_plan_stream(request: MealPlanStreamRequest):
+    """
+    Generate a meal plan, streaming one NDJSON record per day
+    
+    Plans may be up to MAX_STREAM_PLAN_DAYS long. The days are planned on
+    the executor; each day is then built and sent on its own. Records:
+        {"type": "plan", "name", "diet_type", "daily_calories", "duration_days",
+         "daily_meals", "macros_breakdown", "generated_at"}
+        {"type": "day", "day", "meals", "totals"}   (one per day)
+        {"type": "end", "complete": true, "days"}
+    
+    Returns:
+        application/x-ndjson stream
+    """
+    user_profile = request.userProfile.model_dump()
+    sent = {'days': 0}
+    
+    async def records():
+        outline, choices = await run_admitted(tasks.solve_meal_plan, user_profile, request.diet_type, request.days)
+        recommender = engines().meal_recommender
+        
+        yield [{
+            'type': 'plan',
+            **outline,
+            'macros_breakdown': recommender.get_macros(outline['diet_type']),
+            'generated_at': datetime.now().isoformat()
+        }]
+        
+        for day in range(len(choices)):
+            plan_day, = recommender.plan_days(
+                outline['diet_type'], outline['daily_calories'], choices[day:day + 1], first_day=day + 1
+            )
+            sent['days'] += 1
+            yield [{'type': 'day', **plan_day}]
         
-        return MealPlanResponse(
-            meal_plan=meal_plan,
-            macros_breakdown=macros,
-            generated_at=datetime.now().isoformat()
+        yield [{'type': 'end', 'complete': True, 'days': sent['days']}]
+    
+    def on_error(e: Exception) -> Dict[str, Any]:
+        return {'type': 'end', 'complete': False, 'error': f"Meal plan generation failed: {str(e)}", **sent}
+    
+    try:
+        return await ndjson_response(records(), on_error)
+    except ExecutorBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Meal plan generation failed: {str(e)}")
+
+@app.post("/api/meals/plan/batch", response_model=MealPlanBatchResponse)
+async def generate_meal_plan_batch(request: MealPlanBatchRequest):
+    """
+    Generate multi-day meal plans for many users in a single request
+    
+    Args:
+        request: List of users, each with a userId, profile, diet type and days
+    
+    Returns:
+        Meal plans keyed by userId, plus per-user errors (a userId given more
+        than once is only reported as an error)
+    """
+    if len(request.users) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(request.users)} users (max {MAX_BATCH_SIZE})"
         )
     
+    items = []
+    errors = {}
+    
+    user_ids, duplicates = batch_user_ids(request.users)
+    for user_id, raw_item in zip(user_ids, request.users):
+        if user_id in duplicates:
+            errors[user_id] = "Duplicate userId in batch"
+            continue
+        
+        try:
+            items.append(MealPlanBatchItem.model_validate(raw_item))
+        except ValidationError as e:
+            errors[user_id] = f"Invalid request: {e.errors()[0]['msg']}"
+    
+    try:
+        plans = await run_admitted(tasks.plan_meals_batch, [
+            (item.userProfile.model_dump(), item.diet_type, item.days) for item in items
+        ])
+    except ExecutorBusyError:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Meal plan generation failed: {str(e)}")
+    
+    generated_at = datetime.now().isoformat()
+    results = {
+        item.userId: {
+            'meal_plan': plan,
+            'macros_breakdown': engines().meal_recommender.get_macros(item.diet_type),
+            'generated_at': generated_at
+        }
+        for item, plan in zip(items, plans)
+    }
+    
+    with stage('encode'):
+        return build_response(MealPlanBatchResponse, {
+            'results': results,
+            'errors': errors,
+            'processed': len(results),
+            'failed': len(errors)
+        }, RESPONSE_MODE)
+
+@app.post("/api/pose/analyze", response_model=PoseAnalysisResponse)
+async def analyze_pose(request: PoseAnalysisRequest):
+    """
+    Score exercise form over a batch of pose keypoint frames
+    
+    Args:
+        request: Exercise type and frames of 17 COCO keypoints (x, y[, confidence])
+    
+    Returns:
+        Per-frame accuracy, joint angle and symmetry statistics, and feedback
+    """
+    if len(request.frames) > MAX_POSE_FRAMES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many frames: {len(request.frames)} (max {MAX_POSE_FRAMES})"
+        )
+    
+    try:
+        with stage('decode'):
+            frames = PoseAnalyzer.validate_frames(request.frames)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    try:
+        result = await run_admitted(
+            tasks.analyze_pose,
+            frames,
+            request.exercise,
+            request.minConfidence,
+            request.includeAngles
+        )
+        
+        return build_response(PoseAnalysisResponse, result, RESPONSE_MODE)
+    
+    except ExecutorBusyError:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Pose analysis failed: {str(e)}")
+
+# Live rep counting sessions open in this process
+pose_sessions = 0
+
+@app.websocket("/ws/pose")
+async def pose_stream(
+    websocket: WebSocket,
+    exercise: str = "squat",
+    fps: Optional[float] = None,
+    minConfidence: Optional[float] = None
+):
+    """
+    Count reps and score form on a live keypoint stream
+    
+    Each text message is {"frames": [...]} (frames x 17 keypoints) or
+    {"keypoints": [...]} (one frame). The server answers with a "rep" event
+    for every completed rep and a "state" event per message. {"type": "end"}
+    returns a "summary" event and closes the session.
+    
+    Args:
+        exercise: Exercise with rep tracking (query parameter)
+        fps: Frame rate, for rep durations (query parameter)
+        minConfidence: Keypoint confidence threshold (query parameter)
+    """
+    global pose_sessions
+    
+    if exercise not in REP_EXERCISES:
+        await websocket.close(code=1008, reason=f"Rep counting is not available for exercise: {exercise}")
+        return
+    if pose_sessions >= MAX_POSE_SESSIONS:
+        # 1013: try again later
+        await websocket.close(code=1013, reason="Too many pose sessions")
+        return
+    
+    # Reserve the slot before the first await, so concurrent handshakes
+    # can't all pass the check above
+    pose_sessions += 1
+    if metrics.enabled:
+        metrics.websocket_sessions.inc(("/ws/pose",))
+    
+    try:
+        await websocket.accept()
+        counter = RepCounter(
+            exercise,
+            engines().pose_analyzer,
+            window=POSE_WINDOW_FRAMES,
+            fps=fps,
+            min_confidence=minConfidence
+        )
+        
+        while True:
+            try:
+                message = json.loads(await websocket.receive_text())
+                if message.get("type") == "end":
+                    for event in counter.finish():
+                        await websocket.send_json(event)
+                    await websocket.close()
+                    break
+                
+                frames = message["frames"] if "frames" in message else [message["keypoints"]]
+                events = counter.push(frames)
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # Bad message: report it and keep the session
+                await websocket.send_json({"type": "error", "detail": f"Invalid message: {str(e)}"})
+                continue
+            
+            for event in events:
+                await websocket.send_json(event)
+    
+    except WebSocketDisconnect:
+        pass
+    finally:
+        pose_sessions -= 1
+        if metrics.enabled:
+            metrics.websocket_sessions.inc(("/ws/pose",), -1)
+
+# Outermost, so first-response times include every other layer
+app.add_middleware(StartupMiddleware, report=startup)
+startup.stop_imports()
 
 if __name__ == "__main__":
     import uvicorn
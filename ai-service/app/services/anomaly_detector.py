@@ -0,0 +1,253 @@
+"""
+Anomaly Detection
+Flags days whose metrics break sharply from the user's own recent baseline
+(a sleep crash, a day without steps, a calorie spike).
+
+Each day is compared with the `window` days before it:
+
+    zscore - rolling mean and standard deviation, from cumulative sums
+             (O(n) whatever the window)
+    mad    - rolling median and median absolute deviation over NumPy
+             sliding windows; a single extreme day does not inflate the
+             baseline, so neighbouring anomalies are not masked
+
+All users of a batch are laid out in one flat array per metric, each
+history preceded by `window` empty (NaN) days, so rolling windows never
+reach into another user's history and every day of every user is scored
+in one pass without Python loops over days.
+"""
+
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import numpy as np
+
+from services.health_series import HealthSeries
+
+
+METRICS = ('steps', 'sleepHours', 'waterIntake', 'calories')
+
+# Smallest spread used as a baseline's scale, so tiny changes on a very
+# regular history are not reported as anomalies
+MIN_SCALE = {
+    'steps': 500.0,
+    'sleepHours': 0.5,
+    'waterIntake': 0.25,
+    'calories': 100.0,
+}
+
+# Metrics where 0 means "not tracked" rather than a measured value
+UNTRACKED_ZERO = ('calories',)
+
+# Default |score| from which a day is flagged, per method (about 0.2% of
+# days of normally distributed data with the default window)
+THRESHOLDS = {'zscore': 3.5, 'mad': 4.0}
+
+
+class AnomalyDetector:
+    """
+    Rolling-baseline anomaly detector for health histories.
+
+    A day is scored against the previous `window` days once at least
+    `min_periods` of them hold a value; its score is the deviation from the
+    baseline's center in units of the baseline's spread.
+    """
+
+    METHODS = ('zscore', 'mad')
+
+    # Makes the MAD of normally distributed data estimate its standard deviation
+    MAD_SCALE = 1.4826
+
+    # Days per block of windows in the MAD method (bounds the window copy)
+    BLOCK_DAYS = 32768
+
+    def __init__(
+        self,
+        method: str = 'mad',
+        window: int = 28,
+        min_periods: int = 14,
+        threshold: Optional[float] = None,
+        max_reported: int = 30
+    ):
+        """
+        Args:
+            method: 'zscore' or 'mad'
+            window: Days in each baseline
+            min_periods: Baseline days needed before a day is scored
+            threshold: |score| from which a day is flagged (THRESHOLDS by default)
+            max_reported: Most recent anomalies returned per user
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown anomaly method: {method} (expected one of {', '.join(self.METHODS)})")
+        self.method = method
+        self.window = window
+        self.min_periods = max(2, min(min_periods, window))
+        self.threshold = threshold if threshold is not None else THRESHOLDS[method]
+        self.max_reported = max_reported
+        self.min_scale = np.array([MIN_SCALE[metric] for metric in METRICS])[:, None]
+
+    def detect(self, series: HealthSeries) -> List[Dict[str, Any]]:
+        """Anomalous days of one history, oldest first"""
+        return self.detect_batch([series])[0]
+
+    def detect_batch(self, histories: Sequence[HealthSeries]) -> List[List[Dict[str, Any]]]:
+        """
+        Anomalous days of many histories, scored in one pass
+
+        Returns:
+            Per history, up to max_reported anomalies (the most recent ones),
+            oldest first, as {date, metric, value, expected, score, direction}
+        """
+        values, positions, offsets = self._layout(histories)
+        scores, expected = self.score(values)
+
+        days = values[:, positions]
+        scores = scores[:, positions]
+        flagged = np.abs(np.nan_to_num(scores)) >= self.threshold
+
+        # Day-major order: by user, then day, then metric
+        day_index, metric_index = np.nonzero(flagged.T)
+        owners = np.searchsorted(offsets, day_index, side='right') - 1
+
+        results = [[] for _ in histories]
+        if not len(day_index):
+            return results
+
+        found_values = days[metric_index, day_index].tolist()
+        found_expected = expected[:, positions][metric_index, day_index].tolist()
+        found_scores = scores[metric_index, day_index].tolist()
+
+        for owner, day, metric, value, center, score in zip(
+            owners.tolist(), day_index.tolist(), metric_index.tolist(),
+            found_values, found_expected, found_scores
+        ):
+            series = histories[owner]
+            name = METRICS[metric]
+            results[owner].append({
+                'date': str(series.dates[day - offsets[owner]]),
+                'metric': name,
+                'value': int(value) if name in ('steps', 'calories') else value,
+                'expected': round(center, 1),
+                'score': round(score, 2),
+                'direction': 'high' if score > 0 else 'low'
+            })
+
+        return [found[-self.max_reported:] if self.max_reported else [] for found in results]
+
+    def score(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every day of a padded (metrics, days) array
+
+        Args:
+            values: float64 values, NaN where a day has no value; every
+                history must be preceded by at least `window` NaN days
+
+        Returns:
+            (scores, expected): deviation from the baseline in units of its
+            spread (NaN where a day is not scored) and the baseline's center
+        """
+        if self.method == 'zscore':
+            center, spread, count = self._rolling_mean_std(values)
+        else:
+            center, spread, count = self._rolling_median_mad(values)
+
+        scale = np.maximum(np.nan_to_num(spread), self.min_scale)
+        with np.errstate(invalid='ignore'):
+            scores = (values - center) / scale
+        scores[count < self.min_periods] = np.nan
+        return scores, center
+
+    def _layout(self, histories: Sequence[HealthSeries]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flat (metrics, padded days) array of all histories
+
+        Returns:
+            (values, positions of the real days, offsets) where history i
+            owns real days offsets[i]:offsets[i + 1]
+        """
+        lengths = np.array([len(series) for series in histories], dtype=np.int64)
+        offsets = np.zeros(len(histories) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # Day j of history i sits after (i + 1) blocks of padding
+        owners = np.repeat(np.arange(len(histories)), lengths)
+        positions = np.arange(offsets[-1]) + self.window * (owners + 1)
+
+        values = np.full((len(METRICS), offsets[-1] + self.window * len(histories)), np.nan)
+        for row, metric in enumerate(METRICS):
+            if offsets[-1]:
+                column = np.concatenate([series.column(metric) for series in histories]).astype(np.float64)
+                if metric in UNTRACKED_ZERO:
+                    column[column == 0] = np.nan
+                values[row, positions] = column
+
+        return values, positions, offsets
+
+    def _rolling_mean_std(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Mean, sample standard deviation and count of the `window` days before each day"""
+        valid = ~np.isnan(values)
+        # Centered by the batch mean so cumulative sums of squares stay precise
+        present = np.where(valid, values, 0.0)
+        shift = present.sum(axis=1, keepdims=True) / np.maximum(valid.sum(axis=1, keepdims=True), 1)
+        centered = np.where(valid, present - shift, 0.0)
+
+        def trailing(array: np.ndarray) -> np.ndarray:
+            # Sum over days [i - window, i) from cumulative sums with a leading zero
+            total = np.zeros((array.shape[0], array.shape[1] + 1))
+            np.cumsum(array, axis=1, out=total[:, 1:])
+            result = np.zeros(array.shape)
+            result[:, self.window:] = total[:, self.window:-1] - total[:, :-self.window - 1]
+            return result
+
+        count = trailing(valid.astype(np.float64))
+        total = trailing(centered)
+        squares = trailing(centered * centered)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = total / count
+            variance = (squares - total * mean) / (count - 1)
+        spread = np.sqrt(np.maximum(variance, 0.0))
+        return mean + shift, spread, count
+
+    def _rolling_median_mad(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Median, scaled MAD and count of the `window` days before each day"""
+        center = np.full(values.shape, np.nan)
+        spread = np.full(values.shape, np.nan)
+        count = np.zeros(values.shape)
+
+        # Window k covers days [k, k + window) and is the baseline of day k + window;
+        # only days with a value and min_periods baseline values in some metric are
+        # scored, which skips the padding and the first days of every history
+        windows = np.lib.stride_tricks.sliding_window_view(values, self.window, axis=1)[:, :-1]
+        present = ~np.isnan(values)
+        totals = np.zeros((values.shape[0], values.shape[1] + 1))
+        np.cumsum(present, axis=1, out=totals[:, 1:])
+        baseline = totals[:, self.window:-1] - totals[:, :-self.window - 1]
+        scored = np.flatnonzero(
+            (present[:, self.window:] & (baseline >= self.min_periods)).any(axis=0)
+        ) + self.window
+        for start in range(0, len(scored), self.BLOCK_DAYS):
+            target = scored[start:start + self.BLOCK_DAYS]
+            # A copy, so it can be sorted in place; NaNs sort last, so the
+            # k valid values lead each sorted window
+            ordered = windows[:, target - self.window]
+            ordered.sort(axis=2)
+            valid = baseline[:, target - self.window].astype(np.int64)
+            median = self._sorted_median(ordered, valid)
+            deviations = np.abs(ordered - median[..., None])
+            deviations.sort(axis=2)
+
+            center[:, target] = median
+            spread[:, target] = self.MAD_SCALE * self._sorted_median(deviations, valid)
+            count[:, target] = valid
+
+        return center, spread, count
+
+    @staticmethod
+    def _sorted_median(ordered: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """Median of the first `valid` values of each sorted row (NaN for empty rows)"""
+        low = np.maximum(valid - 1, 0) // 2
+        high = valid // 2
+        pick = np.minimum(np.stack([low, high], axis=-1), ordered.shape[-1] - 1)
+        middle = np.take_along_axis(ordered, pick, axis=-1)
+        median = middle.mean(axis=-1)
+        median[valid == 0] = np.nan
+        return median
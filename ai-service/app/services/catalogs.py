@@ -0,0 +1,139 @@
+"""
+Compiled Catalogs
+Workout and meal catalogs compiled into one packed file.
+
+The file holds every column, index and string table of a WorkoutCatalog
+and a MealCatalog (see utils.packed_store for the layout). Workers started
+with CATALOG_PATH map it read-only instead of building the catalogs from
+Python literals, so all workers on a host share one copy in the page cache
+and the recommenders query it without per-worker object graphs.
+
+Usage (from ai-service/app):
+    python -m services.catalogs build catalogs.bin [--workouts workouts.json] [--meals meals.json]
+    python -m services.catalogs info catalogs.bin
+"""
+
+from typing import Any, Dict, Optional, Tuple
+import argparse
+import json
+
+from services.meal_catalog import DIETS, SLOTS, MealCatalog
+from services.meal_planner import MEAL_CATALOG
+from services.meal_recommender import MealRecommender
+from services.workout_catalog import AGE_BANDS, DURATION_BANDS, EQUIPMENT, GOALS, INTENSITIES, WorkoutCatalog
+from services.workout_recommender import WorkoutRecommender
+from utils.packed_store import open_packed, write_packed
+
+FORMAT_VERSION = 1
+
+
+def vocabulary() -> Dict[str, list]:
+    """Code tables the stored columns refer to; a file only loads with the same ones"""
+    return {
+        'goals': list(GOALS),
+        'intensities': list(INTENSITIES),
+        'equipment': list(EQUIPMENT),
+        'duration_bands': list(DURATION_BANDS),
+        'age_bands': list(AGE_BANDS),
+        'diets': list(DIETS),
+        'slots': list(SLOTS),
+    }
+
+
+def compile_catalogs(
+    path: str,
+    workouts: Optional[WorkoutCatalog] = None,
+    meals: Optional[MealCatalog] = None
+) -> int:
+    """
+    Write catalogs to a packed file
+
+    Args:
+        path: Output file
+        workouts: Workout catalog to store (the built-in one by default)
+        meals: Meal catalog to store (the built-in one by default)
+
+    Returns:
+        File size in bytes
+    """
+    if workouts is None:
+        workouts = WorkoutCatalog.from_goal_map(WorkoutRecommender.WORKOUTS)
+    if meals is None:
+        meals = MealCatalog.from_records(MEAL_CATALOG, MealRecommender.MEAL_PLANS)
+
+    meta = {
+        'version': FORMAT_VERSION,
+        'vocabulary': vocabulary(),
+        'counts': {'workouts': len(workouts), 'meals': len(meals)},
+    }
+    return write_packed(path, {**workouts.sections('workouts'), **meals.sections('meals')}, meta)
+
+
+def load_catalogs(path: str) -> Tuple[WorkoutCatalog, MealCatalog]:
+    """
+    Map a compiled catalog file
+
+    Raises:
+        ValueError: When the file was compiled with a different format or code tables
+    """
+    packed = open_packed(path)
+    if packed.meta.get('version') != FORMAT_VERSION or packed.meta.get('vocabulary') != vocabulary():
+        raise ValueError(f"{path} was compiled for a different catalog format; rebuild it with services.catalogs")
+
+    return (
+        WorkoutCatalog.from_sections(packed.sections, 'workouts'),
+        MealCatalog.from_sections(packed.sections, 'meals'),
+    )
+
+
+def _read_workouts(path: str) -> WorkoutCatalog:
+    """Workout dicts with a goal each, or a {goal: [workout, ...]} map"""
+    with open(path) as source:
+        data = json.load(source)
+    if isinstance(data, dict):
+        return WorkoutCatalog.from_goal_map(data)
+    return WorkoutCatalog.from_records(data)
+
+
+def _read_meals(path: str) -> MealCatalog:
+    """Meal dicts, or {"meals": [...], "plans": {...}}; plans default to the built-in templates"""
+    with open(path) as source:
+        data = json.load(source)
+    if isinstance(data, list):
+        data = {'meals': data}
+    return MealCatalog.from_records(data['meals'], data.get('plans', MealRecommender.MEAL_PLANS))
+
+
+def main(argv: Optional[list] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description='Compile or inspect a packed catalog file')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='compile catalogs into a packed file')
+    build.add_argument('path')
+    build.add_argument('--workouts', help='JSON workouts (built-in catalog by default)')
+    build.add_argument('--meals', help='JSON meals (built-in catalog by default)')
+    info = commands.add_parser('info', help='show what a packed file holds')
+    info.add_argument('path')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        size = compile_catalogs(
+            args.path,
+            workouts=_read_workouts(args.workouts) if args.workouts else None,
+            meals=_read_meals(args.meals) if args.meals else None,
+        )
+        summary = {'path': args.path, 'bytes': size, **open_packed(args.path).meta['counts']}
+    else:
+        packed = open_packed(args.path)
+        summary = {
+            'path': args.path,
+            'bytes': packed.size,
+            'meta': packed.meta,
+            'sections': {name: list(array.shape) for name, array in packed.sections.items()},
+        }
+
+    print(json.dumps(summary, indent=2))
+    return summary
+
+
+if __name__ == '__main__':
+    main()
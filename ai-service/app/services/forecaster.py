@@ -0,0 +1,272 @@
+"""
+Health Score Forecasting
+Projects each user's daily health score for the coming days from their own
+recent history.
+
+Every metric of every user gets a damped Holt model (a smoothed level plus
+a trend that fades out). The smoothing factors are picked per series by a
+small grid search: all candidates run side by side and each series keeps
+the one with the lowest one-step-ahead error. The projected metrics are
+scored with the analyzer's curves and weights (VectorizedScorer), with
+mood held at its recent average; scores are averaged over the user's recent
+day-to-day variation, since the score curves are not linear.
+
+All users of a batch are fitted together: the recursion steps through the
+days once, updating (candidates, metrics, users) arrays, so a batch costs
+`history_days` NumPy steps however many users it holds.
+"""
+
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from datetime import date, timedelta
+import numpy as np
+
+from services.anomaly_detector import UNTRACKED_ZERO
+from services.health_series import HealthSeries
+from services.vectorized_scorer import ENTRY_DTYPE, VectorizedScorer
+
+
+METRICS = ('steps', 'sleepHours', 'waterIntake', 'calories')
+
+# Projections are clipped to the values HealthDataEntry accepts
+LIMITS = {
+    'steps': (0, 100000),
+    'sleepHours': (0, 24),
+    'waterIntake': (0, 20),
+    'calories': (0, 10000),
+}
+
+# Decimals of a projected value (0 = integer metric)
+DECIMALS = {'steps': 0, 'sleepHours': 1, 'waterIntake': 1, 'calories': 0}
+
+
+class HealthForecaster:
+    """Batched damped-Holt forecasts of daily metrics and health scores"""
+
+    # Smoothing factors tried for every series: level (alpha) x trend (beta)
+    ALPHAS = (0.1, 0.3, 0.6)
+    BETAS = (0.05, 0.2)
+
+    # Entries scored at once (bounds the memory of expected scores)
+    SCORE_ROWS = 1 << 18
+
+    def __init__(
+        self,
+        scorer: VectorizedScorer,
+        history_days: int = 90,
+        damping: float = 0.9,
+        mood_days: int = 14
+    ):
+        """
+        Args:
+            scorer: Component and overall scoring (HealthAnalyzer.scorer)
+            history_days: Most recent days each model is fitted on
+            damping: Share of the trend carried into each following day
+            mood_days: Days averaged into the projected mood score
+        """
+        self.scorer = scorer
+        self.history_days = history_days
+        self.damping = damping
+        self.mood_days = mood_days
+
+        alphas, betas = np.meshgrid(self.ALPHAS, self.BETAS, indexing='ij')
+        self.alphas = alphas.reshape(-1, 1, 1)
+        self.betas = betas.reshape(-1, 1, 1)
+
+    def forecast(self, series: HealthSeries, days: int) -> Dict[str, Any]:
+        """Forecast of one history; see forecast_batch"""
+        return self.forecast_batch([series], days)[0]
+
+    def forecast_batch(self, histories: Sequence[HealthSeries], days: int) -> List[Dict[str, Any]]:
+        """
+        Forecast many non-empty histories in one pass
+
+        Returns:
+            Per history, {'forecast': [{day, date, healthScore, steps,
+            sleepHours, waterIntake, calories}, ...]} for days 1..days after
+            the last entry (date is None when the last date isn't ISO)
+        """
+        if not histories:
+            return []
+
+        values, mood = self._layout(histories)
+        level, trend = self._fit(values)
+        projected = self._project(level, trend, days)
+        scores = self._score(projected, mood, *self._spread(values))
+
+        # Plain Python values, one list per metric and user
+        columns = {
+            metric: (
+                projected[row].astype(np.int64) if DECIMALS[metric] == 0 else projected[row]
+            ).tolist()
+            for row, metric in enumerate(METRICS)
+        }
+        scores = scores.tolist()
+
+        results = []
+        for user, series in enumerate(histories):
+            dates = self._dates(series.dates[len(series) - 1], days)
+            results.append({
+                'forecast': [
+                    {
+                        'day': day + 1,
+                        'date': dates[day],
+                        'healthScore': scores[user][day],
+                        'steps': columns['steps'][user][day],
+                        'sleepHours': columns['sleepHours'][user][day],
+                        'waterIntake': columns['waterIntake'][user][day],
+                        'calories': columns['calories'][user][day],
+                    }
+                    for day in range(days)
+                ]
+            })
+        return results
+
+    def _layout(self, histories: Sequence[HealthSeries]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recent days of all histories, right-aligned
+
+        Returns:
+            (values, mood): (metrics, users, days) floats with NaN before a
+            user's first kept day and on untracked days, and the average
+            mood score of each user's last mood_days days
+        """
+        lengths = np.array([min(len(series), self.history_days) for series in histories], dtype=np.int64)
+        width = int(lengths.max())
+        offsets = np.zeros(len(histories) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        # Day k of user u's kept tail sits at column width - length + k
+        owners = np.repeat(np.arange(len(histories)), lengths)
+        columns = np.arange(offsets[-1]) - offsets[owners] + (width - lengths[owners])
+
+        values = np.full((len(METRICS), len(histories), width), np.nan)
+        for row, metric in enumerate(METRICS):
+            tail = np.concatenate([
+                series.column(metric)[len(series) - length:] for series, length in zip(histories, lengths.tolist())
+            ]).astype(np.float64)
+            if metric in UNTRACKED_ZERO:
+                tail[tail == 0] = np.nan
+            values[row, owners, columns] = tail
+
+        mood_lengths = np.minimum(lengths, self.mood_days)
+        mood_codes = np.concatenate([
+            series.mood[len(series) - length:] for series, length in zip(histories, mood_lengths.tolist())
+        ])
+        mood_scores = self.scorer.mood_table[self.scorer.series_mood_map[mood_codes]]
+        starts = np.zeros(len(histories), dtype=np.int64)
+        np.cumsum(mood_lengths[:-1], out=starts[1:])
+        mood = np.add.reduceat(mood_scores, starts) / mood_lengths
+
+        return values, mood
+
+    def _fit(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Final level and trend of every (metric, user) series
+
+        Runs every smoothing candidate and keeps, per series, the one with
+        the smallest one-step-ahead squared error. A series starts at its
+        first value with no trend; days without a value carry the model
+        forward. Series without any value end with a NaN level.
+        """
+        candidates = len(self.alphas)
+        shape = (candidates,) + values.shape[:2]
+        level = np.full(shape, np.nan)
+        trend = np.zeros(shape)
+        errors = np.zeros(shape)
+
+        with np.errstate(invalid='ignore'):
+            for day in range(values.shape[2]):
+                observed = values[:, :, day]
+                present = ~np.isnan(observed)
+                predicted = level + self.damping * trend
+                error = observed - predicted
+                fitted = present & ~np.isnan(level)
+
+                errors += np.where(fitted, error * error, 0.0)
+                level = np.where(
+                    fitted,
+                    predicted + self.alphas * error,
+                    np.where(present & np.isnan(level), observed, predicted)
+                )
+                trend = np.where(fitted, self.damping * trend + self.alphas * self.betas * error, self.damping * trend)
+
+        best = np.argmin(errors, axis=0)[None]
+        return np.take_along_axis(level, best, axis=0)[0], np.take_along_axis(trend, best, axis=0)[0]
+
+    def _spread(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Deviations of each user's last mood_days days from their mean
+
+        Returns:
+            (spread, recent): (metrics, users, recent days) deviations, 0 for
+            untracked values, and (users, recent days) masks of the days
+            the user has
+        """
+        recent = values[:, :, -self.mood_days:]
+        present = ~np.isnan(recent)
+        count = present.sum(axis=2, keepdims=True)
+        mean = np.where(present, recent, 0.0).sum(axis=2, keepdims=True) / np.maximum(count, 1)
+        # Steps are never untracked, so they mark the days that exist
+        return np.where(present, recent - mean, 0.0), present[0]
+
+    def _project(self, level: np.ndarray, trend: np.ndarray, days: int) -> np.ndarray:
+        """(metrics, users, days) projected values, clipped and rounded like entries"""
+        # The trend added on day h is damping + damping^2 + ... + damping^h
+        reach = np.cumsum(self.damping ** np.arange(1, days + 1))
+        projected = level[..., None] + trend[..., None] * reach
+
+        for row, metric in enumerate(METRICS):
+            low, high = LIMITS[metric]
+            # Untracked metrics (a NaN level) project as 0, i.e. untracked
+            np.clip(np.nan_to_num(projected[row]), low, high, out=projected[row])
+            np.round(projected[row], DECIMALS[metric], out=projected[row])
+        return projected
+
+    def _score(
+        self,
+        projected: np.ndarray,
+        mood: np.ndarray,
+        spread: np.ndarray,
+        recent: np.ndarray
+    ) -> np.ndarray:
+        """
+        (users, days) expected overall health scores of projected days
+
+        The score curves are not linear, so the score of the projected
+        values would overrate users with noisy days. Each projected day is
+        scored once per recent day of the user, shifted by that day's
+        deviation from the recent mean (`spread`), and the scores are
+        averaged.
+        """
+        users, days = projected.shape[1:]
+        scenarios = spread.shape[2]
+        scores = np.empty((users, days))
+
+        # Users per chunk so a chunk scores at most SCORE_ROWS entries
+        chunk = max(1, self.SCORE_ROWS // (days * scenarios))
+        for start in range(0, users, chunk):
+            block = slice(start, start + chunk)
+            count = len(range(*block.indices(users)))
+            entries = np.zeros(count * days * scenarios, dtype=ENTRY_DTYPE)
+            for row, metric in enumerate(METRICS):
+                low, high = LIMITS[metric]
+                shifted = projected[row, block, :, None] + spread[row, block, None, :]
+                # Untracked calories stay untracked in every scenario
+                shifted = np.where(projected[row, block, :, None] > 0, np.clip(shifted, low, high), 0.0)
+                entries[metric] = shifted.reshape(-1)
+
+            components = self.scorer.score_components(entries)
+            components[:, 4] = np.repeat(mood[block], days * scenarios)
+            daily = self.scorer.health_scores(components).reshape(count, days, scenarios)
+            weights = recent[block, None, :]
+            scores[block] = np.round((daily * weights).sum(axis=2) / weights.sum(axis=2), 1)
+        return scores
+
+    @staticmethod
+    def _dates(last: Any, days: int) -> List[Optional[str]]:
+        """ISO dates of the days after `last` (None when it isn't an ISO date)"""
+        try:
+            start = date.fromisoformat(str(last)[:10])
+        except ValueError:
+            return [None] * days
+        return [(start + timedelta(days=day)).isoformat() for day in range(1, days + 1)]
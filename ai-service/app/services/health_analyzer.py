@@ -4,10 +4,19 @@ Calculates health scores and generates personalized recommendations
 based on user's health data and profile.
 """
 
-from typing import List, Dict, Any
-import numpy as np
+from typing import List, Dict, Any, Iterable, Optional, Tuple, Union
 from datetime import datetime
 
+from services.anomaly_detector import AnomalyDetector
+from services.forecaster import HealthForecaster
+from services.health_series import HealthSeries
+from services.trend_engine import TrendEngine
+from services.vectorized_scorer import VectorizedScorer
+from utils.metrics import stage
+
+# Health history accepted by the analyzer: a columnar series or entry dicts
+HealthData = Union[HealthSeries, List[Dict[str, Any]]]
+
 
 class HealthAnalyzer:
     """
@@ -33,6 +42,9 @@ class HealthAnalyzer:
         'calories': {'min': 1500, 'target': 2000, 'max': 2500},
     }
     
+    # Metrics that receive a trend label
+    TREND_METRICS = ['steps', 'sleepHours', 'waterIntake', 'calories']
+    
     MOOD_SCORES = {
         'excellent': 100,
         'good': 80,
@@ -41,52 +53,325 @@ class HealthAnalyzer:
         'terrible': 20
     }
     
-    def __init__(self):
-        """Initialize the health analyzer"""
-        pass
+    # Anomaly detection methods ('off' disables the 'anomalies' list)
+    ANOMALY_METHODS = AnomalyDetector.METHODS + ('off',)
+    
+    def __init__(self, anomaly_method: str = 'mad', trend_method: str = 'theilsen'):
+        """
+        Initialize the health analyzer
+        
+        Args:
+            anomaly_method: How anomalous days are detected, one of ANOMALY_METHODS
+            trend_method: How trends are estimated, one of TrendEngine.METHODS
+        """
+        if anomaly_method not in self.ANOMALY_METHODS:
+            raise ValueError(
+                f"Unknown anomaly method: {anomaly_method} (expected one of {', '.join(self.ANOMALY_METHODS)})"
+            )
+        self.scorer = VectorizedScorer(self.WEIGHTS, self.OPTIMAL_RANGES, self.MOOD_SCORES)
+        self.anomaly_detector = AnomalyDetector(anomaly_method) if anomaly_method != 'off' else None
+        self.trend_engine = TrendEngine(trend_method, metrics=tuple(self.TREND_METRICS))
+        # Labels of batches analyzed without details (see analyze_batch)
+        self.label_engine = TrendEngine('split', metrics=tuple(self.TREND_METRICS))
+        self.forecaster = HealthForecaster(self.scorer)
     
-    def analyze(self, health_data: List[Dict[str, Any]], user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    def analyze(self, health_data: HealthData, user_profile: Dict[str, Any]) -> Dict[str, Any]:
         """
         Main analysis method
         
         Args:
-            health_data: List of daily health data entries
+            health_data: HealthSeries or list of daily health data entries
             user_profile: User's demographic information
         
         Returns:
-            Dictionary containing health score, recommendations, and insights
+            Dictionary containing health score, recommendations, insights
+            and anomalous days
         """
-        if not health_data:
+        series = self._as_series(health_data)
+        if not series:
             raise ValueError("No health data provided")
         
         # Get latest data point for current analysis
-        latest = health_data[-1]
+        latest = series.latest()
         
-        # Calculate individual component scores
-        scores = self._calculate_component_scores(latest)
+        with stage('component_scores'):
+            # Calculate individual component scores
+            scores = self._calculate_component_scores(latest)
+            
+            # Calculate overall health score
+            health_score = self._calculate_health_score(scores)
         
-        # Calculate overall health score
-        health_score = self._calculate_health_score(scores)
+        anomalies = self.detect_anomalies([series])[0]
         
         # Analyze trends if multiple days of data
-        trends = self._analyze_trends(health_data) if len(health_data) > 1 else {}
+        trend_details = self.analyze_trends([series])[0]
         
-        # Generate personalized recommendations
-        recommendations = self._generate_recommendations(
-            scores, trends, latest, user_profile
+        return self._build_analysis(series, latest, user_profile, scores, health_score, anomalies, trend_details)
+    
+    def _build_analysis(
+        self,
+        series: HealthSeries,
+        latest: Dict[str, Any],
+        user_profile: Dict[str, Any],
+        scores: Dict[str, float],
+        health_score: float,
+        anomalies: List[Dict[str, Any]],
+        trend_details: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Assemble recommendations and insights for scored data"""
+        trends = {metric: detail['label'] for metric, detail in trend_details.items()}
+        return self._compose_analysis(
+            latest, trends, user_profile, scores, health_score, len(series), anomalies, trend_details
         )
+    
+    def detect_anomalies(self, histories: List[HealthSeries]) -> List[List[Dict[str, Any]]]:
+        """
+        Anomalous days of many histories, detected in one vectorized pass
         
-        # Generate insights
-        insights = self._generate_insights(
-            health_score, scores, trends, len(health_data)
+        Returns:
+            Per history, the most recent anomalies, oldest first (empty lists
+            when detection is off)
+        """
+        if self.anomaly_detector is None or not histories:
+            return [[] for _ in histories]
+        
+        with stage('anomalies'):
+            return self.anomaly_detector.detect_batch(histories)
+    
+    def analyze_trends(self, histories: List[HealthSeries]) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Trends of many histories, histories of equal length fitted together
+        
+        Returns:
+            Per history, slope (per day), confidence and label per metric
+            (empty for a single data point)
+        """
+        with stage('trends'):
+            return self.trend_engine.trends_batch(histories)
+    
+    def trend_labels(self, histories: List[HealthSeries]) -> List[Dict[str, str]]:
+        """
+        Trend label per metric of many histories, by the split-half rule
+        
+        The labels of the 'split' trend method and of incremental analysis;
+        cheaper than analyze_trends() with a slope method on long histories.
+        """
+        with stage('trends'):
+            return [
+                {metric: detail['label'] for metric, detail in trend_details.items()}
+                for trend_details in self.label_engine.trends_batch(histories)
+            ]
+    
+    def analyze_latest(
+        self,
+        latest: Dict[str, Any],
+        trends: Dict[str, str],
+        user_profile: Dict[str, Any],
+        data_points: int
+    ) -> Dict[str, Any]:
+        """
+        Analyze the latest entry with trends computed elsewhere
+        
+        Args:
+            latest: Most recent daily health data entry
+            trends: Trend label per metric (empty for a single data point)
+            user_profile: User's demographic information
+            data_points: Number of entries the trends were computed over
+        
+        Returns:
+            Dictionary containing health score, recommendations, and insights
+        """
+        with stage('component_scores'):
+            scores = self._calculate_component_scores(latest)
+            health_score = self._calculate_health_score(scores)
+        
+        return self._compose_analysis(
+            latest, trends, user_profile, scores, health_score, data_points
         )
+    
+    def _compose_analysis(
+        self,
+        latest: Dict[str, Any],
+        trends: Dict[str, str],
+        user_profile: Dict[str, Any],
+        scores: Dict[str, float],
+        health_score: float,
+        data_points: int,
+        anomalies: Optional[List[Dict[str, Any]]] = None,
+        trend_details: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Build the analysis result from scores and trends"""
+        # Generate personalized recommendations
+        with stage('recommendations'):
+            recommendations = self._generate_recommendations(
+                scores, trends, latest, user_profile
+            )
+        
+        # Generate insights
+        with stage('insights'):
+            insights = self._generate_insights(
+                health_score, scores, trends, data_points
+            )
         
         return {
             'healthScore': int(health_score),
             'recommendations': recommendations,
-            'insights': insights
+            'insights': insights,
+            'anomalies': anomalies if anomalies is not None else [],
+            'trends': trend_details if trend_details is not None else {}
         }
     
+    def analyze_batch(
+        self,
+        batch: Iterable[Tuple[str, HealthData, Dict[str, Any]]],
+        details: bool = True
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze many users in a single call
+        
+        Args:
+            batch: Iterable of (user_id, health_data, user_profile) tuples
+            details: Detect anomalies and fit trends with the configured
+                methods. Without details, 'anomalies' and 'trends' are empty
+                and recommendations use split-half trend labels (see
+                trend_labels), which skips the per-day work of long histories.
+        
+        Returns:
+            Dictionary with 'results' (analysis per user id) and 'errors'
+            (error message per user id). A failing user never aborts the batch.
+            Component scores, anomalies and trends for all users are computed
+            in vectorized passes; with details they are identical to those
+            of analyze().
+        """
+        results = {}
+        errors = {}
+        
+        items = []
+        for user_id, health_data, user_profile in batch:
+            try:
+                series = self._as_series(health_data)
+            except ValueError as e:
+                errors[user_id] = str(e)
+                continue
+            
+            if not series:
+                errors[user_id] = "No health data provided"
+            else:
+                items.append((user_id, series, series.latest(), user_profile))
+        
+        # Score the latest entry of every user in one vectorized pass
+        with stage('component_scores'):
+            latest_entries = self.scorer.build_array([item[2] for item in items])
+            component_scores = self.scorer.score_components(latest_entries)
+            health_scores = self.scorer.health_scores(component_scores).tolist()
+            score_dicts = self.scorer.component_dicts(component_scores)
+        
+        histories = [item[1] for item in items]
+        if details:
+            anomaly_lists = self.detect_anomalies(histories)
+            trend_lists = self.analyze_trends(histories)
+        else:
+            label_lists = self.trend_labels(histories)
+        
+        for position, ((user_id, series, latest, user_profile), scores, health_score) in enumerate(zip(
+            items, score_dicts, health_scores
+        )):
+            try:
+                if details:
+                    results[user_id] = self._build_analysis(
+                        series, latest, user_profile, scores, health_score,
+                        anomaly_lists[position], trend_lists[position]
+                    )
+                else:
+                    results[user_id] = self._compose_analysis(
+                        latest, label_lists[position], user_profile, scores, health_score, len(series)
+                    )
+            except Exception as e:
+                errors[user_id] = str(e) or e.__class__.__name__
+        
+        return {
+            'results': results,
+            'errors': errors
+        }
+    
+    def forecast(self, health_data: HealthData, days: int) -> Dict[str, Any]:
+        """
+        Projected health score for the next days
+        
+        Args:
+            health_data: HealthSeries or list of daily health data entries
+            days: Days to project after the last entry
+        
+        Returns:
+            Dictionary with 'forecast', one projected day per entry (see
+            HealthForecaster.forecast_batch)
+        """
+        series = self._as_series(health_data)
+        if not series:
+            raise ValueError("No health data provided")
+        
+        with stage('forecast'):
+            return self.forecaster.forecast(series, days)
+    
+    def forecast_batch(
+        self,
+        batch: Iterable[Tuple[str, HealthData]],
+        days: int
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Forecast many users in a single call
+        
+        Args:
+            batch: Iterable of (user_id, health_data) tuples
+            days: Days to project after each user's last entry
+        
+        Returns:
+            Dictionary with 'results' (forecast per user id) and 'errors'
+            (error message per user id). All users are fitted and projected
+            in one vectorized pass.
+        """
+        errors = {}
+        items = []
+        for user_id, health_data in batch:
+            try:
+                series = self._as_series(health_data)
+            except ValueError as e:
+                errors[user_id] = str(e)
+                continue
+            
+            if not series:
+                errors[user_id] = "No health data provided"
+            else:
+                items.append((user_id, series))
+        
+        with stage('forecast'):
+            forecasts = self.forecaster.forecast_batch([series for _, series in items], days)
+        
+        return {
+            'results': {user_id: forecast for (user_id, _), forecast in zip(items, forecasts)},
+            'errors': errors
+        }
+    
+    def score_history(self, health_data: HealthData) -> List[float]:
+        """
+        Overall health score for every entry of a history
+        
+        Args:
+            health_data: HealthSeries or list of daily health data entries
+        
+        Returns:
+            One score per entry, in input order
+        """
+        entries = self.scorer.build_series_array(self._as_series(health_data))
+        return self.scorer.health_scores(self.scorer.score_components(entries)).tolist()
+    
+    @staticmethod
+    def _as_series(health_data: HealthData) -> HealthSeries:
+        """Columnar view of the health history, built once per request"""
+        if isinstance(health_data, HealthSeries):
+            return health_data
+        return HealthSeries.from_records(health_data)
+    
     def _calculate_component_scores(self, data: Dict[str, Any]) -> Dict[str, float]:
         """Calculate individual scores for each health metric"""
         scores = {}
@@ -169,32 +454,24 @@ class HealthAnalyzer:
         
         return round(total_score, 1)
     
-    def _analyze_trends(self, health_data: List[Dict[str, Any]]) -> Dict[str, str]:
-        """Analyze trends over time"""
-        trends = {}
-        
-        if len(health_data) < 2:
-            return trends
-        
-        # Calculate trends for each metric
-        metrics = ['steps', 'sleepHours', 'waterIntake', 'calories']
-        
-        for metric in metrics:
-            values = [entry.get(metric, 0) for entry in health_data]
-            
-            # Simple trend: compare average of first half vs second half
-            mid = len(values) // 2
-            first_half_avg = np.mean(values[:mid]) if mid > 0 else 0
-            second_half_avg = np.mean(values[mid:])
-            
-            if second_half_avg > first_half_avg * 1.1:
-                trends[metric] = 'improving'
-            elif second_half_avg < first_half_avg * 0.9:
-                trends[metric] = 'declining'
-            else:
-                trends[metric] = 'stable'
+    def _analyze_trends(self, health_data: HealthData) -> Dict[str, Dict[str, Any]]:
+        """
+        Analyze trends over time
         
-        return trends
+        Returns:
+            Slope (per day), confidence and label per metric, all metrics
+            fitted in one pass by the trend engine
+        """
+        return self.analyze_trends([self._as_series(health_data)])[0]
+    
+    @staticmethod
+    def trend_label(first_half_avg: float, second_half_avg: float) -> str:
+        """Label a metric by comparing its second-half average to the first half"""
+        if second_half_avg > first_half_avg * 1.1:
+            return 'improving'
+        elif second_half_avg < first_half_avg * 0.9:
+            return 'declining'
+        return 'stable'
     
     def _generate_recommendations(
         self,
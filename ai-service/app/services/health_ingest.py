@@ -0,0 +1,610 @@
+"""
+Health Data Ingestion
+Decoders for compact health history uploads that build a HealthSeries
+directly, without one Pydantic object per entry:
+
+    NDJSON      - a {"userProfile": {...}} line followed by one entry per
+                  line, decoded incrementally as the body streams in
+    MessagePack - the JSON request shape ({"userProfile", "healthData"}),
+                  or {"userProfile", "columns": {field: [values]}}
+                  (requires the optional 'msgpack' package)
+    Columnar    - the struct-packed layout described in pack_columns()
+
+Values are checked column by column against the bounds of the JSON entry
+model, HealthDataEntry (see field_limits), and values other than plain numbers are parsed
+by Pydantic's own int/float validators (see numeric_column), so all
+formats accept and reject the same data.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from itertools import repeat
+import json
+import struct
+
+import numpy as np
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+from services.health_series import HealthSeries
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_AVAILABLE = msgpack is not None
+
+ENTRY_FIELDS = ('date', 'steps', 'sleepHours', 'waterIntake', 'calories', 'mood')
+NUMERIC_FIELDS = ('steps', 'sleepHours', 'waterIntake', 'calories')
+
+COLUMNAR_CONTENT_TYPE = 'application/vnd.healthsync.columnar'
+COLUMNAR_MAGIC = b'HSC1'
+COLUMNAR_HEADER = struct.Struct('<4sII')
+# Column dtypes of the columnar layout, in order after the profile
+COLUMNAR_COLUMNS = (
+    ('date', '<i4'),
+    ('steps', '<i4'),
+    ('sleepHours', '<f4'),
+    ('waterIntake', '<f4'),
+    ('calories', '<i4'),
+    ('mood', 'u1'),
+)
+
+# Stand-ins for missing fields (the upload is rejected anyway)
+PLACEHOLDERS = {'date': '', 'steps': 0, 'sleepHours': 0.0, 'waterIntake': 0.0, 'calories': 0, 'mood': 'okay'}
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+# Errors reported per upload before giving up
+MAX_ERRORS = 20
+
+# Lax int / float parsing of the entry model's numeric fields, by integer-valued flag
+NUMBER_PARSERS = {True: TypeAdapter(int), False: TypeAdapter(float)}
+
+
+class IngestError(ValueError):
+    """
+    Upload could not be decoded or failed validation
+
+    status_code is 422 for invalid values and 400 for a body of the wrong
+    shape (e.g. columns that aren't an object of lists).
+    """
+
+    def __init__(self, errors: List[Dict[str, Any]], status_code: int = 422):
+        self.errors = errors
+        self.status_code = status_code
+        super().__init__('; '.join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in errors))
+
+
+def field_limits(entry_model: Any) -> Dict[str, Tuple[float, float, bool]]:
+    """
+    Numeric bounds of an entry model's fields
+
+    Args:
+        entry_model: Pydantic model with ge/le-constrained numeric fields
+            (e.g. HealthDataEntry)
+
+    Returns:
+        Field name -> (minimum, maximum, integer-valued)
+    """
+    limits = {}
+    for name in NUMERIC_FIELDS:
+        field = entry_model.model_fields[name]
+        low = next(meta.ge for meta in field.metadata if hasattr(meta, 'ge'))
+        high = next(meta.le for meta in field.metadata if hasattr(meta, 'le'))
+        limits[name] = (low, high, field.annotation is int)
+    return limits
+
+
+class HealthDataEntry(BaseModel):
+    """One day of health data as the JSON API takes it"""
+    date: str
+    steps: int = Field(ge=0, le=100000)
+    sleepHours: float = Field(ge=0, le=24)
+    waterIntake: float = Field(ge=0, le=20)
+    calories: int = Field(ge=0, le=10000)
+    mood: str = Field(pattern="^(excellent|good|okay|bad|terrible)$")
+
+
+# Bounds checked by the upload decoders, the batch routes and bulk scoring
+ENTRY_LIMITS = field_limits(HealthDataEntry)
+
+
+class ColumnBuilder:
+    """Accumulates entry fields column by column and validates them at the end"""
+
+    def __init__(self, limits: Dict[str, Tuple[float, float, bool]]):
+        self.limits = limits
+        self.columns: Dict[str, list] = {field: [] for field in ENTRY_FIELDS}
+        self.errors: List[Dict[str, Any]] = []
+
+    def add(self, entry: Any, index: int) -> None:
+        """Append one entry dict"""
+        if not isinstance(entry, dict):
+            self._error(('healthData', index), 'Input should be a valid dictionary', 'dict_type')
+            entry = {}
+        for field, column in self.columns.items():
+            if field in entry:
+                column.append(entry[field])
+            else:
+                # Report once and keep a valid placeholder so the column checks stay quiet
+                self._error(('healthData', index, field), 'Field required', 'missing')
+                column.append(PLACEHOLDERS[field])
+
+    def add_many(self, entries: List[Any], start: int) -> None:
+        """Append entry dicts, column by column when every entry is complete"""
+        try:
+            columns = {field: [entry[field] for entry in entries] for field in ENTRY_FIELDS}
+        except (KeyError, TypeError):
+            for offset, entry in enumerate(entries):
+                self.add(entry, start + offset)
+            return
+        for field, values in columns.items():
+            self.columns[field].extend(values)
+
+    def extend_columns(self, columns: Dict[str, Any]) -> None:
+        """Append whole columns (lists or arrays of equal length)"""
+        if not isinstance(columns, dict):
+            raise IngestError([_error_dict(('columns',), 'Input should be a valid dictionary', 'dict_type')], 400)
+        errors = []
+        for field in ENTRY_FIELDS:
+            if field not in columns:
+                errors.append(_error_dict(('columns', field), 'Field required', 'missing'))
+            elif not isinstance(columns[field], (list, tuple, np.ndarray)):
+                errors.append(_error_dict(('columns', field), 'Input should be a valid list', 'list_type'))
+        if errors:
+            raise IngestError(errors, 400)
+
+        lengths = {len(columns[field]) for field in ENTRY_FIELDS}
+        if len(lengths) != 1:
+            raise IngestError([_error_dict(('columns',), 'All columns must have the same length', 'value_error')])
+        for field in ENTRY_FIELDS:
+            self.columns[field].extend(columns[field])
+
+    def build(self) -> HealthSeries:
+        """Validate all columns and return the series"""
+        count = len(self.columns['date'])
+        dates = self.columns['date']
+        for index, date in enumerate(dates):
+            if not isinstance(date, str):
+                self._error(('healthData', index, 'date'), 'Input should be a valid string', 'string_type')
+
+        numeric = {field: self._numeric_column(field) for field in NUMERIC_FIELDS}
+
+        mood_codes = HealthSeries.MOOD_CODES
+        moods = np.fromiter(
+            (mood_codes.get(mood, HealthSeries.UNKNOWN_MOOD) if isinstance(mood, str) else HealthSeries.UNKNOWN_MOOD
+             for mood in self.columns['mood']),
+            dtype=np.uint8, count=count
+        )
+        self._check_moods(moods)
+
+        if self.errors:
+            raise IngestError(self.errors[:MAX_ERRORS])
+
+        return HealthSeries(
+            steps=numeric['steps'],
+            sleep_hours=numeric['sleepHours'],
+            water_intake=numeric['waterIntake'],
+            calories=numeric['calories'],
+            mood=moods,
+            dates=dates
+        )
+
+    def _numeric_column(self, field: str) -> np.ndarray:
+        low, _, integer = self.limits[field]
+        column, rejected = numeric_column(self.columns[field], integer)
+        for index, msg, error_type in rejected:
+            self._error(('healthData', index, field), msg, error_type)
+            # Already reported; keeps the range check quiet
+            column[index] = low
+        check_range(column, field, self.limits[field], self.errors)
+        return column
+
+    def _check_moods(self, moods: np.ndarray) -> None:
+        for index in np.flatnonzero(moods == HealthSeries.UNKNOWN_MOOD)[:MAX_ERRORS].tolist():
+            self._error(
+                ('healthData', index, 'mood'),
+                f"String should match pattern '^({'|'.join(HealthSeries.MOODS)})$'",
+                'string_pattern_mismatch'
+            )
+
+    def _error(self, loc: tuple, msg: str, error_type: str) -> None:
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append(_error_dict(loc, msg, error_type))
+
+
+def build_series_batch(
+    entry_lists: List[List[Any]],
+    limits: Dict[str, Tuple[float, float, bool]]
+) -> List[Tuple[Optional[HealthSeries], Optional[IngestError]]]:
+    """
+    Validate the entry dicts of many users and build one series per user
+
+    The entries of all users are checked together, column by column, so a
+    batch costs a few NumPy passes rather than a set of passes per user.
+    Users with an invalid entry are checked again on their own by a
+    ColumnBuilder, so their errors are located as in a single upload; if
+    the combined pass fails, every user is checked on their own. One bad
+    user never fails the others.
+
+    Returns:
+        Per user, (series, None) or (None, IngestError)
+    """
+    try:
+        return _build_together(entry_lists, limits)
+    except (KeyError, TypeError, ValueError, OverflowError):
+        # Some entry is incomplete, not an object or holds values that can't
+        # be columnized together: check users one by one
+        return [_build_alone(user_entries, limits) for user_entries in entry_lists]
+
+
+def _build_alone(
+    user_entries: List[Any],
+    limits: Dict[str, Tuple[float, float, bool]]
+) -> Tuple[Optional[HealthSeries], Optional[IngestError]]:
+    builder = ColumnBuilder(limits)
+    try:
+        builder.add_many(user_entries, 0)
+        return builder.build(), None
+    except IngestError as e:
+        return None, e
+    except (TypeError, ValueError, OverflowError) as e:
+        return None, IngestError([_error_dict(('healthData',), f"Invalid health data: {e}", 'value_error')])
+
+
+def _build_together(
+    entry_lists: List[List[Any]],
+    limits: Dict[str, Tuple[float, float, bool]]
+) -> List[Tuple[Optional[HealthSeries], Optional[IngestError]]]:
+    lengths = np.array([len(entries) for entries in entry_lists], dtype=np.int64)
+    offsets = np.zeros(len(entry_lists) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    entries = [entry for user_entries in entry_lists for entry in user_entries]
+    columns = {field: [entry[field] for entry in entries] for field in ENTRY_FIELDS}
+
+    if set(map(type, columns['date'])) <= {str}:
+        invalid = np.zeros(len(entries), dtype=bool)
+    else:
+        invalid = np.fromiter((not isinstance(date, str) for date in columns['date']), dtype=bool, count=len(entries))
+    numeric = {}
+    for field in NUMERIC_FIELDS:
+        low, high, integer = limits[field]
+        # Values Pydantic rejects are NaN and fail the range check
+        column, _ = numeric_column(columns[field], integer)
+        invalid |= ~((column >= low) & (column <= high))
+        if integer:
+            invalid |= column != np.floor(column)
+        numeric[field] = column
+
+    try:
+        moods = np.fromiter(
+            map(HealthSeries.MOOD_CODES.get, columns['mood'], repeat(HealthSeries.UNKNOWN_MOOD)),
+            dtype=np.uint8, count=len(entries)
+        )
+    except TypeError:
+        # An unhashable mood; such entries are rejected below
+        moods = np.array([
+            HealthSeries.MOOD_CODES.get(mood, HealthSeries.UNKNOWN_MOOD) if isinstance(mood, str)
+            else HealthSeries.UNKNOWN_MOOD
+            for mood in columns['mood']
+        ], dtype=np.uint8)
+    invalid |= moods == HealthSeries.UNKNOWN_MOOD
+
+    owners = np.repeat(np.arange(len(entry_lists)), lengths)
+    rejected = np.zeros(len(entry_lists), dtype=bool)
+    rejected[owners[invalid]] = True
+
+    # Rejected users are rebuilt alone; placeholders keep their values castable
+    for field, column in numeric.items():
+        column[invalid] = PLACEHOLDERS[field]
+
+    # Cast once; every series holds slices of the batch columns
+    steps = numeric['steps'].astype(np.int32)
+    sleep_hours = numeric['sleepHours'].astype(np.float32)
+    water_intake = numeric['waterIntake'].astype(np.float32)
+    calories = numeric['calories'].astype(np.int16)
+    dates = columns['date']
+
+    results = []
+    for user, (start, end) in enumerate(zip(offsets[:-1].tolist(), offsets[1:].tolist())):
+        if rejected[user]:
+            results.append(_build_alone(entry_lists[user], limits))
+            continue
+        results.append((HealthSeries(
+            steps=steps[start:end],
+            sleep_hours=sleep_hours[start:end],
+            water_intake=water_intake[start:end],
+            calories=calories[start:end],
+            mood=moods[start:end],
+            dates=dates[start:end]
+        ), None))
+    return results
+
+
+def numeric_column(values: Any, integer: bool) -> Tuple[np.ndarray, List[Tuple[int, str, str]]]:
+    """
+    One numeric field's values as a 1-D float64 column
+
+    A column of plain numbers (or bools) is converted in one call. Otherwise
+    every value that isn't an int, float or bool (a numeric string, a nested
+    list, None) is parsed by Pydantic's lax int or float validator, so it is
+    accepted exactly when HealthDataEntry would accept it.
+
+    Returns:
+        (column, rejected) where rejected lists (index, msg, type) of the
+        values Pydantic refuses; their column entries are NaN
+    """
+    try:
+        column = np.asarray(values)
+    except ValueError:
+        # Ragged nested lists
+        column = None
+    if column is not None and column.ndim == 1 and column.dtype.kind in 'biuf':
+        return column.astype(np.float64), []
+
+    parser = NUMBER_PARSERS[integer]
+    column = np.empty(len(values), dtype=np.float64)
+    rejected = []
+    for index, value in enumerate(values):
+        if type(value) in (int, float, bool):
+            # Integers beyond float range only need to fail the range check
+            column[index] = value if abs(value) < 1e308 else (np.inf if value > 0 else -np.inf)
+            continue
+        try:
+            column[index] = parser.validate_python(value)
+        except ValidationError as e:
+            error = e.errors()[0]
+            column[index] = np.nan
+            rejected.append((index, error['msg'], error['type']))
+    return column, rejected
+
+
+def check_range(column: np.ndarray, field: str, limits: Tuple[float, float, bool],
+                errors: List[Dict[str, Any]]) -> None:
+    """Append an error for every value outside the field's bounds (NaN included)"""
+    low, high, integer = limits
+    bad = ~((column >= low) & (column <= high))
+    for index in np.flatnonzero(bad)[:max(0, MAX_ERRORS - len(errors))].tolist():
+        value = column[index]
+        if np.isnan(value):
+            msg, error_type = 'Input should be a valid number', 'float_parsing'
+        elif value < low:
+            msg, error_type = f"Input should be greater than or equal to {low}", 'greater_than_equal'
+        else:
+            msg, error_type = f"Input should be less than or equal to {high}", 'less_than_equal'
+        errors.append(_error_dict(('healthData', index, field), msg, error_type))
+
+    if integer:
+        fractional = np.flatnonzero(~bad & (column != np.floor(column)))
+        for index in fractional[:max(0, MAX_ERRORS - len(errors))].tolist():
+            errors.append(_error_dict(
+                ('healthData', index, field),
+                'Input should be a valid integer, got a number with a fractional part',
+                'int_from_float'
+            ))
+
+
+class NDJSONDecoder:
+    """
+    Incremental NDJSON decoder
+
+    Lines are decoded as they are fed, so a streamed body never has to be
+    held in memory as a whole. The first non-empty line must be the
+    {"userProfile": {...}} header.
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[float, float, bool]]):
+        self.builder = ColumnBuilder(limits)
+        self.profile: Optional[Dict[str, Any]] = None
+        self.line_number = 0
+        self.entries = 0
+
+    def feed_lines(self, lines: List[bytes]) -> None:
+        """
+        Decode a batch of lines
+
+        The batch is parsed as one JSON array, which is much faster than a
+        json.loads() call per line; a batch that fails to parse is decoded
+        line by line to locate the error.
+        """
+        lines = [raw.strip() for raw in lines]
+        if self.profile is None:
+            while lines and self.profile is None:
+                self.feed(lines.pop(0))
+
+        items = [line for line in lines if line]
+        if not items:
+            self.line_number += len(lines)
+            return
+
+        try:
+            entries = json.loads(b'[' + b','.join(items) + b']')
+        except ValueError:
+            for line in lines:
+                self.feed(line)
+            return
+
+        self.line_number += len(lines)
+        self.builder.add_many(entries, self.entries)
+        self.entries += len(entries)
+
+    def feed(self, line: bytes) -> None:
+        """Decode one line"""
+        self.line_number += 1
+        line = line.strip()
+        if not line:
+            return
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise IngestError([_error_dict(('line', self.line_number), f"Invalid JSON: {e}", 'json_invalid')])
+
+        if self.profile is None:
+            if not isinstance(item, dict) or 'userProfile' not in item:
+                raise IngestError([_error_dict(
+                    ('line', self.line_number), 'First line must be {"userProfile": {...}}', 'missing'
+                )])
+            self.profile = item['userProfile']
+            return
+
+        self.builder.add(item, self.entries)
+        self.entries += 1
+
+    def finish(self) -> Tuple[Dict[str, Any], HealthSeries]:
+        """
+        Validate the decoded entries
+
+        Returns:
+            (user profile dict, series)
+        """
+        if self.profile is None:
+            raise IngestError([_error_dict(('body',), 'Empty upload', 'missing')])
+        return self.profile, self.builder.build()
+
+
+def decode_ndjson(lines: Iterable[bytes], limits: Dict[str, Tuple[float, float, bool]]) -> Tuple[Dict[str, Any], HealthSeries]:
+    """Decode a complete NDJSON body given as lines"""
+    decoder = NDJSONDecoder(limits)
+    decoder.feed_lines(list(lines))
+    return decoder.finish()
+
+
+async def iter_line_batches(chunks: Any):
+    """Split an async stream of byte chunks into batches of complete lines"""
+    # Only each new chunk is searched for a newline, so a line spread over
+    # many chunks costs time linear in its length
+    pending = bytearray()
+    async for chunk in chunks:
+        end = chunk.rfind(b'\n')
+        if end < 0:
+            pending += chunk
+            continue
+        pending += chunk[:end]
+        yield pending.split(b'\n')
+        pending = bytearray(chunk[end + 1:])
+    if pending:
+        yield [pending]
+
+
+def decode_msgpack(body: bytes, limits: Dict[str, Tuple[float, float, bool]]) -> Tuple[Dict[str, Any], HealthSeries]:
+    """
+    Decode a MessagePack upload in row ({"healthData": [...]}) or
+    column ({"columns": {...}}) shape
+
+    Returns:
+        (user profile dict, series)
+    """
+    if msgpack is None:
+        raise RuntimeError("MessagePack uploads require the 'msgpack' package")
+
+    try:
+        payload = msgpack.unpackb(body, raw=False)
+    except Exception as e:
+        raise IngestError([_error_dict(('body',), f"Invalid MessagePack: {e}", 'value_error')])
+
+    if not isinstance(payload, dict) or 'userProfile' not in payload:
+        raise IngestError([_error_dict(('body', 'userProfile'), 'Field required', 'missing')])
+
+    builder = ColumnBuilder(limits)
+    if 'columns' in payload:
+        builder.extend_columns(payload['columns'])
+    elif 'healthData' in payload:
+        if not isinstance(payload['healthData'], list):
+            raise IngestError([_error_dict(('body', 'healthData'), 'Input should be a valid list', 'list_type')], 400)
+        for index, entry in enumerate(payload['healthData']):
+            builder.add(entry, index)
+    else:
+        raise IngestError([_error_dict(('body', 'healthData'), 'Field required', 'missing')])
+
+    return payload['userProfile'], builder.build()
+
+
+def decode_columnar(body: bytes, limits: Dict[str, Tuple[float, float, bool]]) -> Tuple[Dict[str, Any], HealthSeries]:
+    """
+    Decode the struct-packed columnar layout (see pack_columns)
+
+    Columns are read with np.frombuffer, without per-entry Python objects
+    except for the date strings.
+
+    Returns:
+        (user profile dict, series)
+    """
+    if len(body) < COLUMNAR_HEADER.size:
+        raise IngestError([_error_dict(('body',), 'Truncated header', 'value_error')])
+
+    magic, count, profile_length = COLUMNAR_HEADER.unpack_from(body)
+    if magic != COLUMNAR_MAGIC:
+        raise IngestError([_error_dict(('body',), 'Not a HealthSync columnar upload', 'value_error')])
+
+    row_size = sum(np.dtype(dtype).itemsize for _, dtype in COLUMNAR_COLUMNS)
+    expected = COLUMNAR_HEADER.size + profile_length + count * row_size
+    if len(body) != expected:
+        raise IngestError([_error_dict(
+            ('body',), f"Expected {expected} bytes for {count} entries, got {len(body)}", 'value_error'
+        )])
+
+    offset = COLUMNAR_HEADER.size
+    try:
+        profile = json.loads(body[offset:offset + profile_length])
+    except ValueError as e:
+        raise IngestError([_error_dict(('body', 'userProfile'), f"Invalid JSON: {e}", 'json_invalid')])
+    offset += profile_length
+
+    columns = {}
+    for field, dtype in COLUMNAR_COLUMNS:
+        columns[field] = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        offset += columns[field].nbytes
+
+    errors: List[Dict[str, Any]] = []
+    for field in NUMERIC_FIELDS:
+        check_range(columns[field].astype(np.float64), field, limits[field], errors)
+    for index in np.flatnonzero(columns['mood'] >= len(HealthSeries.MOODS))[:MAX_ERRORS].tolist():
+        errors.append(_error_dict(('healthData', index, 'mood'), 'Unknown mood code', 'enum'))
+    if errors:
+        raise IngestError(errors[:MAX_ERRORS])
+
+    dates = (EPOCH + columns['date'].astype('timedelta64[D]')).astype(str)
+
+    return profile, HealthSeries(
+        steps=columns['steps'],
+        sleep_hours=columns['sleepHours'],
+        water_intake=columns['waterIntake'],
+        calories=columns['calories'],
+        mood=columns['mood'],
+        dates=dates
+    )
+
+
+def pack_columns(records: List[Dict[str, Any]], user_profile: Dict[str, Any]) -> bytes:
+    """
+    Encode entries in the columnar layout
+
+    Layout (little-endian):
+        magic         4 bytes  b'HSC1'
+        count         uint32   number of entries
+        profile_len   uint32   length of the profile JSON
+        profile       profile_len bytes of UTF-8 JSON (UserProfile)
+        date          count x int32    days since 1970-01-01
+        steps         count x int32
+        sleepHours    count x float32
+        waterIntake   count x float32
+        calories      count x int32
+        mood          count x uint8    index into excellent/good/okay/bad/terrible
+    """
+    profile = json.dumps(user_profile, separators=(',', ':')).encode()
+    parts = [COLUMNAR_HEADER.pack(COLUMNAR_MAGIC, len(records), len(profile)), profile]
+
+    dates = np.array([record['date'] for record in records], dtype='datetime64[D]')
+    values = {
+        'date': (dates - EPOCH).astype(np.int64),
+        'mood': [HealthSeries.MOOD_CODES[record['mood']] for record in records],
+    }
+    for field, dtype in COLUMNAR_COLUMNS:
+        column = values[field] if field in values else [record[field] for record in records]
+        parts.append(np.asarray(column).astype(dtype).tobytes())
+
+    return b''.join(parts)
+
+
+def _error_dict(loc: tuple, msg: str, error_type: str) -> Dict[str, Any]:
+    return {'loc': list(loc), 'msg': msg, 'type': error_type}
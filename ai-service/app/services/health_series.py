@@ -0,0 +1,156 @@
+"""
+Health Series
+Compact columnar representation of a user's health history.
+Each metric is stored in a typed NumPy array instead of one dict per day.
+"""
+
+from typing import List, Dict, Any, Iterable, Optional
+import hashlib
+import numpy as np
+
+
+class HealthSeries:
+    """
+    Columnar daily health data for one user.
+
+    Columns:
+        steps: int32
+        sleep_hours, water_intake: float32
+        calories: int16
+        mood: uint8 code into MOODS (UNKNOWN_MOOD for unrecognised labels)
+    """
+
+    __slots__ = ('dates', 'steps', 'sleep_hours', 'water_intake', 'calories', 'mood')
+
+    MOODS = ('excellent', 'good', 'okay', 'bad', 'terrible')
+    MOOD_CODES = {mood: code for code, mood in enumerate(MOODS)}
+    UNKNOWN_MOOD = 255
+
+    # float32 keeps ~7 significant digits; values are read back rounded to
+    # this many decimals so inputs such as 7.3 round-trip exactly
+    FLOAT_DECIMALS = 4
+
+    # Record field name -> column attribute
+    FIELDS = {
+        'steps': 'steps',
+        'sleepHours': 'sleep_hours',
+        'waterIntake': 'water_intake',
+        'calories': 'calories',
+    }
+
+    CALORIES_LIMIT = np.iinfo(np.int16).max
+
+    def __init__(
+        self,
+        steps: np.ndarray,
+        sleep_hours: np.ndarray,
+        water_intake: np.ndarray,
+        calories: np.ndarray,
+        mood: np.ndarray,
+        dates: Optional[np.ndarray] = None
+    ):
+        self.steps = np.asarray(steps, dtype=np.int32)
+        self.sleep_hours = np.asarray(sleep_hours, dtype=np.float32)
+        self.water_intake = np.asarray(water_intake, dtype=np.float32)
+        self.calories = np.asarray(calories, dtype=np.int16)
+        self.mood = np.asarray(mood, dtype=np.uint8)
+        self.dates = np.asarray(dates if dates is not None else [''] * len(self.steps), dtype=str)
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[Any]) -> 'HealthSeries':
+        """Build a series from objects with entry attributes (e.g. HealthDataEntry)"""
+        entries = list(entries)
+        count = len(entries)
+        mood_codes = cls.MOOD_CODES
+        unknown = cls.UNKNOWN_MOOD
+
+        return cls(
+            steps=np.fromiter((e.steps for e in entries), dtype=np.int32, count=count),
+            sleep_hours=np.fromiter((e.sleepHours for e in entries), dtype=np.float32, count=count),
+            water_intake=np.fromiter((e.waterIntake for e in entries), dtype=np.float32, count=count),
+            calories=np.fromiter((e.calories for e in entries), dtype=np.int16, count=count),
+            mood=np.fromiter((mood_codes.get(e.mood, unknown) for e in entries), dtype=np.uint8, count=count),
+            dates=[e.date for e in entries]
+        )
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'HealthSeries':
+        """Build a series from a list of entry dicts (missing metrics default to 0)"""
+        calories = [record.get('calories', 0) for record in records]
+        if calories and (min(calories) < 0 or max(calories) > cls.CALORIES_LIMIT):
+            raise ValueError(f"calories must be between 0 and {cls.CALORIES_LIMIT}")
+
+        mood_codes = cls.MOOD_CODES
+        unknown = cls.UNKNOWN_MOOD
+
+        return cls(
+            steps=[record.get('steps', 0) for record in records],
+            sleep_hours=[record.get('sleepHours', 0) for record in records],
+            water_intake=[record.get('waterIntake', 0) for record in records],
+            calories=calories,
+            mood=[mood_codes.get(record.get('mood', 'okay'), unknown) for record in records],
+            dates=[str(record.get('date', '')) for record in records]
+        )
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def column(self, field: str) -> np.ndarray:
+        """
+        Widened copy of a metric column, addressed by record field name
+
+        Integer metrics are returned as int64 and float metrics as float64
+        rounded to FLOAT_DECIMALS.
+        """
+        return self._widen(getattr(self, self.FIELDS[field]))
+
+    @classmethod
+    def stack_column(cls, histories: List['HealthSeries'], field: str) -> np.ndarray:
+        """column() of equal-length histories, as one (histories, days) array"""
+        attribute = cls.FIELDS[field]
+        return cls._widen(np.stack([getattr(series, attribute) for series in histories]))
+
+    @classmethod
+    def _widen(cls, values: np.ndarray) -> np.ndarray:
+        if values.dtype.kind == 'f':
+            return np.round(values.astype(np.float64), cls.FLOAT_DECIMALS)
+        return values.astype(np.int64)
+
+    def mood_labels(self) -> List[Optional[str]]:
+        """Mood label per day (None for unrecognised moods)"""
+        return [self._mood_label(code) for code in self.mood.tolist()]
+
+    def entry(self, index: int) -> Dict[str, Any]:
+        """Single day as a record dict with plain Python values"""
+        return {
+            'date': str(self.dates[index]),
+            'steps': int(self.steps[index]),
+            'sleepHours': round(float(self.sleep_hours[index]), self.FLOAT_DECIMALS),
+            'waterIntake': round(float(self.water_intake[index]), self.FLOAT_DECIMALS),
+            'calories': int(self.calories[index]),
+            'mood': self._mood_label(int(self.mood[index]))
+        }
+
+    def latest(self) -> Dict[str, Any]:
+        """Most recent day as a record dict"""
+        return self.entry(len(self) - 1)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Expand back into a list of record dicts"""
+        return [self.entry(index) for index in range(len(self))]
+
+    def digest(self) -> str:
+        """Content hash of all columns; equal histories give equal digests"""
+        hasher = hashlib.sha256()
+        for name in self.__slots__:
+            column = getattr(self, name)
+            hasher.update(column.dtype.str.encode())
+            hasher.update(np.ascontiguousarray(column).tobytes())
+        return hasher.hexdigest()
+
+    def nbytes(self) -> int:
+        """Memory held by the column arrays"""
+        return sum(getattr(self, name).nbytes for name in self.__slots__)
+
+    def _mood_label(self, code: int) -> Optional[str]:
+        return self.MOODS[code] if code < len(self.MOODS) else None
@@ -0,0 +1,200 @@
+"""
+Incremental Trend Analysis
+Keeps running split-half sums per user so a new day updates the trends
+and health score in constant time instead of re-reading the whole window.
+Labels always follow the split-half rule, whatever the analyzer's trend
+method; slopes and anomalies need the whole window and are not reported.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict, deque
+from fractions import Fraction
+import threading
+
+from services.health_analyzer import HealthAnalyzer
+
+
+class TrendState:
+    """
+    Split-half running state for one user's health window.
+
+    Entries are kept in two deques (first half / second half) with a running
+    sum per metric for each half. Appending a day, evicting the oldest day of
+    a bounded window, and moving the entry on the split boundary are all O(1).
+    Float metrics are summed as exact fractions so long streams never drift.
+    """
+
+    __slots__ = ('window', 'first', 'second', 'first_sums', 'second_sums', 'latest')
+
+    METRICS = HealthAnalyzer.TREND_METRICS
+
+    def __init__(self, window: Optional[int] = None):
+        """
+        Args:
+            window: Maximum number of days kept (None for an unbounded history)
+        """
+        self.window = window
+        self.first = deque()
+        self.second = deque()
+        self.first_sums = [0] * len(self.METRICS)
+        self.second_sums = [0] * len(self.METRICS)
+        self.latest = None
+
+    def __len__(self) -> int:
+        return len(self.first) + len(self.second)
+
+    def append(self, entry: Dict[str, Any]) -> None:
+        """Add a new day; a repeated date replaces the latest day instead"""
+        if self.latest is not None and entry.get('date') == self.latest.get('date'):
+            self._subtract(self.second_sums, self.second.pop())
+
+        values = self._exact_values(entry)
+        self.second.append(values)
+        self._add(self.second_sums, values)
+        self.latest = entry
+
+        if self.window is not None:
+            while len(self) > self.window:
+                self._evict_oldest()
+
+        self._rebalance()
+
+    def resize(self, window: Optional[int]) -> None:
+        """Change the window size, evicting the oldest days if needed"""
+        self.window = window
+        if window is not None:
+            while len(self) > window:
+                self._evict_oldest()
+            self._rebalance()
+
+    def trends(self) -> Dict[str, str]:
+        """Trend label per metric, identical to the 'split' trend method of HealthAnalyzer"""
+        if len(self) < 2:
+            return {}
+
+        first_count = len(self.first)
+        second_count = len(self.second)
+
+        return {
+            metric: HealthAnalyzer.trend_label(
+                float(self.first_sums[index] / first_count),
+                float(self.second_sums[index] / second_count)
+            )
+            for index, metric in enumerate(self.METRICS)
+        }
+
+    def _evict_oldest(self) -> None:
+        if self.first:
+            self._subtract(self.first_sums, self.first.popleft())
+        else:
+            self._subtract(self.second_sums, self.second.popleft())
+
+    def _rebalance(self) -> None:
+        """Keep len(first) == len // 2, matching the split-half boundary"""
+        mid = len(self) // 2
+
+        while len(self.first) < mid:
+            values = self.second.popleft()
+            self._subtract(self.second_sums, values)
+            self.first.append(values)
+            self._add(self.first_sums, values)
+
+        while len(self.first) > mid:
+            values = self.first.pop()
+            self._subtract(self.first_sums, values)
+            self.second.appendleft(values)
+            self._add(self.second_sums, values)
+
+    @classmethod
+    def _exact_values(cls, entry: Dict[str, Any]) -> Tuple:
+        values = []
+        for metric in cls.METRICS:
+            value = entry.get(metric, 0)
+            values.append(value if isinstance(value, int) else Fraction(value))
+        return tuple(values)
+
+    @staticmethod
+    def _add(sums: List, values: Tuple) -> None:
+        for index, value in enumerate(values):
+            sums[index] += value
+
+    @staticmethod
+    def _subtract(sums: List, values: Tuple) -> None:
+        for index, value in enumerate(values):
+            sums[index] -= value
+
+
+class IncrementalTrendAnalyzer:
+    """
+    Server-side trend states keyed by a client-chosen state key.
+    States are held in a bounded LRU so idle users are eventually dropped,
+    and every state is bounded by its window, so memory stays within
+    max_states x window days.
+    """
+
+    # Days a new state covers unless the request sets its own window
+    # (four weeks, as the anomaly detector's baseline)
+    DEFAULT_WINDOW = 28
+
+    def __init__(self, analyzer: HealthAnalyzer, max_states: int = 10000, default_window: int = DEFAULT_WINDOW):
+        self.analyzer = analyzer
+        self.max_states = max_states
+        self.default_window = default_window
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def update(
+        self,
+        state_key: str,
+        entry: Dict[str, Any],
+        user_profile: Dict[str, Any],
+        window: Optional[int] = None,
+        seed: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Append one day to a user's state and analyze it
+
+        Args:
+            state_key: Identifier of the server-side state (e.g. the user id)
+            entry: New daily health data entry
+            user_profile: User's demographic information
+            window: Number of days the trends cover (None keeps the current
+                window, or default_window for a new state)
+            seed: Optional earlier history; starts a new state, so only
+                `window` (or default_window) applies to it
+
+        Returns:
+            Analysis result plus the number of days in the state
+        """
+        with self._lock:
+            state = None if seed is not None else self._states.get(state_key)
+
+            if state is None:
+                state = TrendState(window or self.default_window)
+                for seed_entry in seed or []:
+                    state.append(seed_entry)
+            elif window is not None and window != state.window:
+                state.resize(window)
+
+            state.append(entry)
+
+            self._states[state_key] = state
+            self._states.move_to_end(state_key)
+            while len(self._states) > self.max_states:
+                self._states.popitem(last=False)
+
+            latest = state.latest
+            trends = state.trends()
+            data_points = len(state)
+
+        result = self.analyzer.analyze_latest(latest, trends, user_profile, data_points)
+        result['dataPoints'] = data_points
+        return result
+
+    def reset(self, state_key: str) -> bool:
+        """Drop a user's state; returns whether it existed"""
+        with self._lock:
+            return self._states.pop(state_key, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._states)
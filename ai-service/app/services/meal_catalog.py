@@ -0,0 +1,157 @@
+"""
+Meal Catalog
+Columnar store of meals and of the per-diet daily templates.
+Meal slots, diets (as a bitmask) and nutrients live in NumPy arrays; names
+and ingredients live in a string table. Like the workout catalog it can be
+written to a packed file (see services.catalogs) and memory-mapped back, so
+API workers share one copy however large the catalog grows.
+"""
+
+from typing import List, Dict, Any, Iterable, Optional
+import numpy as np
+
+from utils.packed_store import StringPool, StringTable, pack_ragged
+
+
+DIETS = ('vegetarian', 'non_vegetarian', 'high_protein')
+SLOTS = ('breakfast', 'lunch', 'dinner', 'snack')
+NUTRIENTS = ('calories', 'protein', 'carbs', 'fats')
+
+
+def _number(value: float) -> Any:
+    """Whole amounts as int, as written in the source catalogs"""
+    return int(value) if value.is_integer() else value
+
+
+class MealCatalog:
+    """
+    Columnar meal catalog.
+
+    Meal dicts are built on request from the columns; template meals of
+    each diet are built once and shared read-only.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], strings: StringTable):
+        """
+        Args:
+            columns: Arrays as produced by from_records (or mapped from a packed file)
+            strings: Meal names, ingredients and template names referenced by the columns
+        """
+        self.columns = columns
+        self.strings = strings
+
+        self.slot = columns['slot']
+        self.diets = columns['diets']
+        # (meals, 4) calories, protein, carbs, fats
+        self.nutrients = columns['nutrients']
+
+        self._templates = {}
+
+    @classmethod
+    def from_records(
+        cls,
+        meals: Iterable[Dict[str, Any]],
+        plans: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> 'MealCatalog':
+        """
+        Build from meal dicts
+
+        Args:
+            meals: Meal dicts with name, slot, diets, nutrients and ingredients
+                (as in meal_planner.MEAL_CATALOG)
+            plans: Optional {diet: {'name', 'meals'}} daily templates (as in
+                MealRecommender.MEAL_PLANS); template meals are matched to
+                catalog meals by name and added unplanned if missing
+        """
+        records = list(meals)
+        by_name = {}
+        for row, meal in enumerate(records):
+            by_name.setdefault(meal['name'], row)
+
+        strings = StringPool()
+        plan_names = []
+        plan_rows = []
+        for diet in DIETS:
+            plan = (plans or {}).get(diet, {'name': '', 'meals': []})
+            rows = []
+            for meal in plan['meals']:
+                if meal['name'] not in by_name:
+                    by_name[meal['name']] = len(records)
+                    records.append({**meal, 'slot': SLOTS[0], 'diets': ()})
+                rows.append(by_name[meal['name']])
+            plan_names.append(strings.add(plan['name']))
+            plan_rows.append(rows)
+
+        count = len(records)
+        columns = {
+            'name': np.fromiter((strings.add(meal['name']) for meal in records), dtype=np.uint32, count=count),
+            'slot': np.fromiter((SLOTS.index(meal['slot']) for meal in records), dtype=np.uint8, count=count),
+            'diets': np.fromiter(
+                (sum(1 << DIETS.index(diet) for diet in meal['diets']) for meal in records), dtype=np.uint8, count=count
+            ),
+            'nutrients': np.array(
+                [[meal[nutrient] for nutrient in NUTRIENTS] for meal in records], dtype=np.float64
+            ).reshape(-1, len(NUTRIENTS)),
+            'plans.name': np.array(plan_names, dtype=np.uint32),
+        }
+        columns['ingredients.offsets'], columns['ingredients'] = pack_ragged(
+            [[strings.add(item) for item in meal['ingredients']] for meal in records]
+        )
+        columns['plans.offsets'], columns['plans.meals'] = pack_ragged(plan_rows, np.int32)
+
+        return cls(columns, strings.table())
+
+    def sections(self, prefix: str = 'meals') -> Dict[str, np.ndarray]:
+        """Arrays to store in a packed file"""
+        sections = {f"{prefix}.{name}": array for name, array in self.columns.items()}
+        sections.update(self.strings.sections(f"{prefix}.strings"))
+        return sections
+
+    @classmethod
+    def from_sections(cls, sections: Dict[str, np.ndarray], prefix: str = 'meals') -> 'MealCatalog':
+        """Catalog over arrays read from a packed file (no copies)"""
+        columns = {
+            name[len(prefix) + 1:]: array for name, array in sections.items()
+            if name.startswith(f"{prefix}.") and not name.startswith(f"{prefix}.strings.")
+        }
+        return cls(columns, StringTable.from_sections(sections, f"{prefix}.strings"))
+
+    def __len__(self) -> int:
+        return len(self.slot)
+
+    def rows(self, diet: str, slot: Optional[str] = None) -> np.ndarray:
+        """Catalog rows of the meals a diet may use, optionally in one slot, in catalog order"""
+        usable = (self.diets & (1 << DIETS.index(diet))) != 0
+        if slot is not None:
+            usable &= self.slot == SLOTS.index(slot)
+        return np.flatnonzero(usable)
+
+    def name(self, row: int) -> str:
+        return self.strings[self.columns['name'][row]]
+
+    def ingredients(self, row: int) -> List[str]:
+        offsets = self.columns['ingredients.offsets']
+        return [self.strings[item] for item in self.columns['ingredients'][offsets[row]:offsets[row + 1]].tolist()]
+
+    def meal(self, row: int) -> Dict[str, Any]:
+        """Dict of one meal: name, nutrients and ingredients"""
+        meal = {'name': self.name(row)}
+        for nutrient, value in zip(NUTRIENTS, self.nutrients[row].tolist()):
+            meal[nutrient] = _number(value)
+        meal['ingredients'] = self.ingredients(row)
+        return meal
+
+    def plan_name(self, diet: str) -> str:
+        """Name of a diet's daily template"""
+        return self.strings[self.columns['plans.name'][DIETS.index(diet)]]
+
+    def plan_meals(self, diet: str) -> List[Dict[str, Any]]:
+        """Meals of a diet's daily template (shared, read-only)"""
+        meals = self._templates.get(diet)
+        if meals is None:
+            index = DIETS.index(diet)
+            offsets = self.columns['plans.offsets']
+            rows = self.columns['plans.meals'][offsets[index]:offsets[index + 1]].tolist()
+            meals = self._templates[diet] = [self.meal(row) for row in rows]
+        return meals
+
@@ -0,0 +1,447 @@
+"""
+Multi-Day Meal Planner
+Builds distinct daily meal plans that hit per-slot calorie targets and
+diet macro ratios, with a variety constraint across days. Candidate
+combinations (one or two meals at several portion sizes) are enumerated
+once per diet and slot; each plan step is a vectorized cost minimization
+over all candidates for every user at once.
+"""
+
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+from itertools import combinations, product
+import numpy as np
+
+from services.meal_catalog import MealCatalog, SLOTS
+
+
+# Share of the daily calories of every meal slot (in SLOTS order) but the
+# last. Snacks get the remainder, matching MealRecommender._distribute_meals.
+SLOT_SHARES = (
+    ('breakfast', 0.25),
+    ('lunch', 0.35),
+    ('dinner', 0.30),
+)
+
+# Target share of calories from protein / carbs / fats per diet
+MACRO_TARGETS = {
+    'vegetarian': (0.20, 0.55, 0.25),
+    'non_vegetarian': (0.30, 0.40, 0.30),
+    'high_protein': (0.40, 0.35, 0.25),
+}
+
+VEG = ('vegetarian', 'non_vegetarian')
+VEG_HP = ('vegetarian', 'non_vegetarian', 'high_protein')
+MEAT_HP = ('non_vegetarian', 'high_protein')
+
+MEAL_CATALOG = [
+    # Breakfast
+    {'name': 'Protein Power Oats', 'slot': 'breakfast', 'diets': VEG_HP, 'calories': 520, 'protein': 50, 'carbs': 52, 'fats': 14,
+     'ingredients': ['Oats', 'Protein Powder', 'Banana', 'Almonds', 'Greek Yogurt']},
+    {'name': 'Egg White Omelet', 'slot': 'breakfast', 'diets': MEAT_HP, 'calories': 380, 'protein': 48, 'carbs': 28, 'fats': 8,
+     'ingredients': ['Egg Whites', 'Whole Wheat Bread', 'Spinach', 'Mushrooms']},
+    {'name': 'Greek Yogurt Parfait', 'slot': 'breakfast', 'diets': VEG, 'calories': 320, 'protein': 20, 'carbs': 42, 'fats': 8,
+     'ingredients': ['Greek Yogurt', 'Granola', 'Berries', 'Honey']},
+    {'name': 'Avocado Toast', 'slot': 'breakfast', 'diets': VEG, 'calories': 350, 'protein': 10, 'carbs': 38, 'fats': 18,
+     'ingredients': ['Whole Grain Bread', 'Avocado', 'Cherry Tomatoes', 'Seeds']},
+    {'name': 'Tofu Veggie Scramble', 'slot': 'breakfast', 'diets': VEG_HP, 'calories': 300, 'protein': 22, 'carbs': 14, 'fats': 17,
+     'ingredients': ['Tofu', 'Bell Pepper', 'Spinach', 'Turmeric']},
+    {'name': 'Banana Peanut Smoothie', 'slot': 'breakfast', 'diets': VEG, 'calories': 400, 'protein': 18, 'carbs': 52, 'fats': 14,
+     'ingredients': ['Banana', 'Peanut Butter', 'Milk', 'Oats']},
+    {'name': 'Turkey Egg Muffins', 'slot': 'breakfast', 'diets': MEAT_HP, 'calories': 340, 'protein': 28, 'carbs': 26, 'fats': 13,
+     'ingredients': ['Eggs', 'Turkey', 'Whole Wheat Muffin', 'Spinach']},
+    {'name': 'Cottage Cheese Bowl', 'slot': 'breakfast', 'diets': VEG_HP, 'calories': 280, 'protein': 28, 'carbs': 20, 'fats': 9,
+     'ingredients': ['Cottage Cheese', 'Pineapple', 'Walnuts']},
+    {'name': 'Whole Grain Pancakes', 'slot': 'breakfast', 'diets': VEG, 'calories': 420, 'protein': 12, 'carbs': 68, 'fats': 11,
+     'ingredients': ['Whole Wheat Flour', 'Milk', 'Eggs', 'Blueberries']},
+    # Lunch
+    {'name': 'Quinoa Buddha Bowl', 'slot': 'lunch', 'diets': VEG, 'calories': 450, 'protein': 18, 'carbs': 65, 'fats': 12,
+     'ingredients': ['Quinoa', 'Chickpeas', 'Sweet Potato', 'Kale', 'Tahini']},
+    {'name': 'Lentil Soup', 'slot': 'lunch', 'diets': VEG, 'calories': 320, 'protein': 15, 'carbs': 48, 'fats': 5,
+     'ingredients': ['Lentils', 'Onion', 'Garlic', 'Carrots', 'Tomatoes']},
+    {'name': 'Grilled Chicken Breast', 'slot': 'lunch', 'diets': MEAT_HP, 'calories': 420, 'protein': 45, 'carbs': 35, 'fats': 8,
+     'ingredients': ['Chicken Breast', 'Rice', 'Broccoli', 'Lemon']},
+    {'name': 'Lean Beef Taco', 'slot': 'lunch', 'diets': MEAT_HP, 'calories': 400, 'protein': 38, 'carbs': 38, 'fats': 12,
+     'ingredients': ['Lean Beef', 'Taco Shell', 'Lettuce', 'Tomato', 'Greek Yogurt']},
+    {'name': 'Tuna Protein Bowl', 'slot': 'lunch', 'diets': MEAT_HP, 'calories': 450, 'protein': 55, 'carbs': 35, 'fats': 10,
+     'ingredients': ['Canned Tuna', 'Brown Rice', 'Edamame', 'Cucumber']},
+    {'name': 'Chickpea Salad Wrap', 'slot': 'lunch', 'diets': VEG, 'calories': 430, 'protein': 17, 'carbs': 58, 'fats': 14,
+     'ingredients': ['Chickpeas', 'Whole Wheat Wrap', 'Cucumber', 'Feta']},
+    {'name': 'Paneer Tikka Bowl', 'slot': 'lunch', 'diets': VEG_HP, 'calories': 480, 'protein': 30, 'carbs': 40, 'fats': 22,
+     'ingredients': ['Paneer', 'Brown Rice', 'Onion', 'Yogurt Marinade']},
+    {'name': 'Turkey Quinoa Salad', 'slot': 'lunch', 'diets': MEAT_HP, 'calories': 440, 'protein': 36, 'carbs': 42, 'fats': 13,
+     'ingredients': ['Turkey Breast', 'Quinoa', 'Arugula', 'Olive Oil']},
+    {'name': 'Black Bean Burrito Bowl', 'slot': 'lunch', 'diets': VEG, 'calories': 520, 'protein': 22, 'carbs': 80, 'fats': 12,
+     'ingredients': ['Black Beans', 'Brown Rice', 'Corn', 'Salsa']},
+    {'name': 'Tempeh Power Bowl', 'slot': 'lunch', 'diets': VEG_HP, 'calories': 470, 'protein': 32, 'carbs': 45, 'fats': 17,
+     'ingredients': ['Tempeh', 'Farro', 'Broccoli', 'Peanut Sauce']},
+    # Dinner
+    {'name': 'Tofu Stir Fry', 'slot': 'dinner', 'diets': VEG, 'calories': 380, 'protein': 22, 'carbs': 42, 'fats': 14,
+     'ingredients': ['Tofu', 'Broccoli', 'Bell Pepper', 'Ginger', 'Soy Sauce']},
+    {'name': 'Salmon Fillet', 'slot': 'dinner', 'diets': MEAT_HP, 'calories': 480, 'protein': 42, 'carbs': 30, 'fats': 18,
+     'ingredients': ['Salmon', 'Sweet Potato', 'Green Beans', 'Olive Oil']},
+    {'name': 'Vegetable Curry with Rice', 'slot': 'dinner', 'diets': VEG, 'calories': 500, 'protein': 14, 'carbs': 78, 'fats': 14,
+     'ingredients': ['Mixed Vegetables', 'Coconut Milk', 'Basmati Rice', 'Curry Spices']},
+    {'name': 'Chicken Stir Fry', 'slot': 'dinner', 'diets': MEAT_HP, 'calories': 450, 'protein': 40, 'carbs': 42, 'fats': 12,
+     'ingredients': ['Chicken Breast', 'Noodles', 'Snap Peas', 'Soy Sauce']},
+    {'name': 'Baked Cod with Quinoa', 'slot': 'dinner', 'diets': MEAT_HP, 'calories': 410, 'protein': 38, 'carbs': 40, 'fats': 9,
+     'ingredients': ['Cod', 'Quinoa', 'Asparagus', 'Lemon']},
+    {'name': 'Spinach Lentil Dal', 'slot': 'dinner', 'diets': VEG, 'calories': 420, 'protein': 22, 'carbs': 60, 'fats': 10,
+     'ingredients': ['Red Lentils', 'Spinach', 'Tomato', 'Brown Rice']},
+    {'name': 'Turkey Meatballs with Zucchini', 'slot': 'dinner', 'diets': MEAT_HP, 'calories': 430, 'protein': 40, 'carbs': 22, 'fats': 20,
+     'ingredients': ['Ground Turkey', 'Zucchini Noodles', 'Marinara', 'Parmesan']},
+    {'name': 'Seitan Veggie Skillet', 'slot': 'dinner', 'diets': VEG_HP, 'calories': 410, 'protein': 38, 'carbs': 30, 'fats': 14,
+     'ingredients': ['Seitan', 'Potatoes', 'Peppers', 'Onion']},
+    {'name': 'Whole Wheat Pasta Primavera', 'slot': 'dinner', 'diets': VEG, 'calories': 520, 'protein': 18, 'carbs': 82, 'fats': 13,
+     'ingredients': ['Whole Wheat Pasta', 'Zucchini', 'Cherry Tomatoes', 'Parmesan']},
+    {'name': 'Shrimp Brown Rice Bowl', 'slot': 'dinner', 'diets': MEAT_HP, 'calories': 440, 'protein': 35, 'carbs': 50, 'fats': 10,
+     'ingredients': ['Shrimp', 'Brown Rice', 'Avocado', 'Lime']},
+    # Snacks
+    {'name': 'Apple with Almond Butter', 'slot': 'snack', 'diets': VEG, 'calories': 200, 'protein': 5, 'carbs': 25, 'fats': 9,
+     'ingredients': ['Apple', 'Almond Butter']},
+    {'name': 'Hummus Veggie Sticks', 'slot': 'snack', 'diets': VEG, 'calories': 180, 'protein': 6, 'carbs': 20, 'fats': 8,
+     'ingredients': ['Hummus', 'Carrots', 'Celery']},
+    {'name': 'Protein Shake', 'slot': 'snack', 'diets': VEG_HP, 'calories': 160, 'protein': 25, 'carbs': 8, 'fats': 3,
+     'ingredients': ['Protein Powder', 'Almond Milk']},
+    {'name': 'Boiled Eggs', 'slot': 'snack', 'diets': MEAT_HP, 'calories': 150, 'protein': 12, 'carbs': 1, 'fats': 10,
+     'ingredients': ['Eggs']},
+    {'name': 'Roasted Chickpeas', 'slot': 'snack', 'diets': VEG, 'calories': 190, 'protein': 9, 'carbs': 27, 'fats': 5,
+     'ingredients': ['Chickpeas', 'Paprika']},
+    {'name': 'Greek Yogurt Cup', 'slot': 'snack', 'diets': VEG_HP, 'calories': 130, 'protein': 15, 'carbs': 10, 'fats': 3,
+     'ingredients': ['Greek Yogurt']},
+    {'name': 'Trail Mix', 'slot': 'snack', 'diets': VEG, 'calories': 220, 'protein': 6, 'carbs': 18, 'fats': 14,
+     'ingredients': ['Nuts', 'Raisins', 'Dark Chocolate']},
+    {'name': 'Edamame Bowl', 'slot': 'snack', 'diets': VEG_HP, 'calories': 190, 'protein': 17, 'carbs': 14, 'fats': 8,
+     'ingredients': ['Edamame', 'Sea Salt']},
+    {'name': 'Turkey Jerky', 'slot': 'snack', 'diets': MEAT_HP, 'calories': 120, 'protein': 20, 'carbs': 6, 'fats': 2,
+     'ingredients': ['Turkey Jerky']},
+]
+
+
+class SlotCandidates:
+    """
+    Every (meal, portion) or (meal, meal, portions) combination for one
+    diet and slot, stored as parallel arrays.
+    """
+
+    __slots__ = ('first', 'second', 'first_portion', 'second_portion',
+                 'calories', 'protein', 'carbs', 'fats', 'macro_error',
+                 'slot_meals', 'incidence', 'rows')
+
+    def __init__(self, rows: List[Tuple[int, int, float, float]], meals: np.ndarray,
+                 macro_target: Sequence[float]):
+        """
+        Args:
+            rows: (first meal, second meal or -1, first portion, second portion)
+            meals: (n_meals, 4) matrix of calories, protein, carbs, fats
+            macro_target: Target protein/carbs/fats calorie shares
+        """
+        table = np.array(rows, dtype=np.float64).reshape(-1, 4)
+        self.first = table[:, 0].astype(np.int64)
+        self.second = table[:, 1].astype(np.int64)
+        self.first_portion = table[:, 2]
+        self.second_portion = table[:, 3]
+
+        # Row -1 of the padded matrix is an all-zero "no second meal"
+        padded = np.vstack([meals, np.zeros((1, meals.shape[1]))])
+        totals = (padded[self.first] * self.first_portion[:, None]
+                  + padded[self.second] * self.second_portion[:, None])
+        self.calories, self.protein, self.carbs, self.fats = totals.T
+
+        macro_calories = np.stack([self.protein * 4, self.carbs * 4, self.fats * 9], axis=1)
+        shares = macro_calories / macro_calories.sum(axis=1, keepdims=True)
+        self.macro_error = np.abs(shares - np.asarray(macro_target)).sum(axis=1)
+
+        # Meals appearing in this slot and a (meals x candidates) 0/1 matrix,
+        # so per-meal penalties become per-candidate penalties with one matmul
+        self.slot_meals = np.unique(np.concatenate([self.first, self.second[self.second >= 0]]))
+        self.incidence = np.zeros((len(self.slot_meals), len(self.first)), dtype=np.float32)
+        columns = np.arange(len(self.first))
+        self.incidence[np.searchsorted(self.slot_meals, self.first), columns] = 1
+        paired = self.second >= 0
+        self.incidence[np.searchsorted(self.slot_meals, self.second[paired]), columns[paired]] = 1
+
+        # Plain Python rows for fast materialization
+        self.rows = list(zip(
+            self.first.tolist(), self.second.tolist(),
+            self.first_portion.tolist(), self.second_portion.tolist(),
+            self.calories.tolist(), self.protein.tolist(), self.carbs.tolist(), self.fats.tolist()
+        ))
+
+    def __len__(self) -> int:
+        return len(self.first)
+
+
+class MealPlanner:
+    """
+    Greedy day-by-day planner. For each day and slot it picks, per user,
+    the candidate minimizing
+
+        |calories - target| / target
+        + MACRO_WEIGHT * macro share error
+        + VARIETY_WEIGHT * recent use of the candidate's meals
+
+    Recent use decays by REPEAT_DECAY per day. Every catalog meal belongs to
+    one slot, so a meal can't repeat within a day. Users with the same diet
+    and calorie target receive the same plan, so only unique targets are
+    solved.
+
+    Candidates grow with the square of the meals per slot, so only the first
+    max_slot_meals meals of each diet and slot (in catalog order) are
+    planned with; larger catalogs should list their preferred meals first.
+    """
+
+    PORTIONS = (0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0)
+    PAIR_PORTIONS = (0.5, 0.75, 1.0, 1.25, 1.5)
+
+    MACRO_WEIGHT = 0.5
+    VARIETY_WEIGHT = 0.15
+    REPEAT_DECAY = 0.5
+
+    MAX_SLOT_MEALS = 12
+
+    def __init__(
+        self,
+        catalog: Optional[Union[MealCatalog, List[Dict[str, Any]]]] = None,
+        portions: Sequence[float] = PORTIONS,
+        pair_portions: Sequence[float] = PAIR_PORTIONS,
+        allow_pairs: bool = True,
+        max_slot_meals: int = MAX_SLOT_MEALS
+    ):
+        """
+        Args:
+            catalog: MealCatalog, or meal dicts with slot, diets, calories and
+                macros (MEAL_CATALOG by default)
+            portions: Portion sizes for single-meal candidates
+            pair_portions: Portion sizes for each meal of a two-meal candidate
+            allow_pairs: Whether main slots may combine two meals
+            max_slot_meals: Meals per diet and slot considered by the planner
+        """
+        if not isinstance(catalog, MealCatalog):
+            catalog = MealCatalog.from_records(catalog if catalog is not None else MEAL_CATALOG)
+        self.catalog = catalog
+        self.portions = tuple(portions)
+        self.pair_portions = tuple(pair_portions)
+        self.allow_pairs = allow_pairs
+
+        # diet -> catalog rows of the meals planned with, and their nutrient matrix
+        self.meals = {}
+        self.nutrients = {}
+        # (diet, slot) -> SlotCandidates over that diet's meal indices
+        self.candidates = {}
+        # (diet, slot, candidate) -> materialized slot content, shared read-only
+        self._slot_content = {}
+
+        for diet, macro_target in MACRO_TARGETS.items():
+            slot_rows = {slot: catalog.rows(diet, slot)[:max_slot_meals] for slot in SLOTS}
+            meals = np.sort(np.concatenate(list(slot_rows.values())))
+            nutrients = np.array(catalog.nutrients[meals], dtype=np.float64).reshape(-1, 4)
+            self.meals[diet] = meals
+            self.nutrients[diet] = nutrients
+
+            for slot in SLOTS:
+                indices = np.searchsorted(meals, slot_rows[slot]).tolist()
+                rows = self._candidate_rows(indices, pairs=allow_pairs and slot != 'snack')
+                if rows:
+                    self.candidates[(diet, slot)] = SlotCandidates(rows, nutrients, macro_target)
+
+    @staticmethod
+    def slot_targets(daily_calories: int) -> List[int]:
+        """Calorie target per slot, in SLOTS order"""
+        targets = [int(daily_calories * share) for _, share in SLOT_SHARES]
+        return targets + [daily_calories - sum(targets)]
+
+    def solve(self, diet_type: str, daily_calories: Sequence[int], days: int) -> np.ndarray:
+        """
+        Choose a candidate for every user, day and slot
+
+        Args:
+            diet_type: Diet shared by all users of the call
+            daily_calories: Daily calorie target per user
+            days: Number of days to plan
+
+        Returns:
+            (users, days, slots) array of candidate indices into
+            self.candidates[(diet_type, slot)]
+        """
+        daily_calories = np.asarray(daily_calories, dtype=np.int64)
+        unique_targets, inverse = np.unique(daily_calories, return_inverse=True)
+        users = len(unique_targets)
+        meal_count = len(self.meals[diet_type])
+
+        slot_targets = np.array([self.slot_targets(int(target)) for target in unique_targets],
+                                dtype=np.float64).reshape(users, len(SLOTS))
+        inverse_targets = (1.0 / slot_targets).astype(np.float32)
+        choices = np.zeros((users, days, len(SLOTS)), dtype=np.int64)
+
+        # Per slot: calories and weighted macro error as float32 rows
+        slot_data = []
+        for slot in SLOTS:
+            candidates = self.candidates[(diet_type, slot)]
+            slot_data.append((
+                candidates,
+                candidates.calories.astype(np.float32)[None, :],
+                (self.MACRO_WEIGHT * candidates.macro_error).astype(np.float32)[None, :]
+            ))
+
+        # Decayed use count per meal; the extra last column stands for
+        # "no second meal" and always stays zero
+        recent = np.zeros((users, meal_count + 1), dtype=np.float32)
+        rows = np.arange(users)
+
+        for day in range(days):
+            today = np.zeros_like(recent)
+
+            for slot_index, (candidates, calories, macro_cost) in enumerate(slot_data):
+                # |calories - target| / target, computed in place
+                cost = calories * inverse_targets[:, slot_index:slot_index + 1]
+                cost -= 1
+                np.abs(cost, out=cost)
+                cost += macro_cost
+                cost += (self.VARIETY_WEIGHT * recent[:, candidates.slot_meals]) @ candidates.incidence
+
+                chosen = np.argmin(cost, axis=1)
+                choices[:, day, slot_index] = chosen
+                today[rows, candidates.first[chosen]] += 1
+                today[rows, candidates.second[chosen]] += 1
+
+            today[:, -1] = 0
+            recent *= self.REPEAT_DECAY
+            recent += today
+
+        return choices[inverse]
+
+    def plan(self, diet_type: str, daily_calories: int, days: int) -> List[Dict[str, Any]]:
+        """
+        Build a multi-day meal plan for one user
+
+        Returns:
+            One dict per day with the meals of every slot and daily totals
+        """
+        choices = self.solve(diet_type, [daily_calories], days)[0]
+        return self.materialize(diet_type, daily_calories, choices)
+
+    def plan_batch(self, requests: Sequence[Tuple[str, int]], days: int) -> List[List[Dict[str, Any]]]:
+        """
+        Plan many users at once
+
+        Args:
+            requests: (diet_type, daily_calories) per user
+            days: Number of days to plan
+
+        Returns:
+            Multi-day plan per user, in input order
+        """
+        plans = [None] * len(requests)
+        by_diet = {}
+        for position, (diet_type, daily_calories) in enumerate(requests):
+            by_diet.setdefault(diet_type, []).append((position, daily_calories))
+
+        for diet_type, members in by_diet.items():
+            choices = self.solve(diet_type, [calories for _, calories in members], days)
+            for (position, daily_calories), user_choices in zip(members, choices):
+                plans[position] = self.materialize(diet_type, daily_calories, user_choices)
+
+        return plans
+
+    def materialize(
+        self,
+        diet_type: str,
+        daily_calories: int,
+        choices: np.ndarray,
+        first_day: int = 1
+    ) -> List[Dict[str, Any]]:
+        """Turn a (days, slots) choice array, or a slice of one starting at first_day, into plan dicts"""
+        targets = self.slot_targets(daily_calories)
+        plan = []
+
+        for day, day_choices in enumerate(choices.tolist(), start=first_day):
+            slots = [
+                self._slot_dict(diet_type, slot, target, candidate)
+                for slot, target, candidate in zip(SLOTS, targets, day_choices)
+            ]
+            plan.append({
+                'day': day,
+                'meals': slots,
+                'totals': {
+                    nutrient: round(sum(slot[nutrient] for slot in slots), 1)
+                    for nutrient in ('calories', 'protein', 'carbs', 'fats')
+                }
+            })
+
+        return plan
+
+    def quality(self, diet_type: str, daily_calories: Sequence[int], choices: np.ndarray) -> Dict[str, float]:
+        """
+        Plan quality metrics for a solve() result
+
+        Returns:
+            Mean absolute slot calorie error (%), mean macro share error,
+            and mean number of distinct meals per user
+        """
+        daily_calories = np.asarray(daily_calories)
+        targets = np.array([self.slot_targets(int(target)) for target in daily_calories],
+                           dtype=np.float64).reshape(len(daily_calories), len(SLOTS))
+        calorie_error = np.zeros(choices.shape[:2] + (len(SLOTS),))
+        macro_error = np.zeros_like(calorie_error)
+        used = []
+
+        for slot_index, slot in enumerate(SLOTS):
+            candidates = self.candidates[(diet_type, slot)]
+            chosen = choices[:, :, slot_index]
+            calorie_error[:, :, slot_index] = (
+                np.abs(candidates.calories[chosen] - targets[:, None, slot_index])
+                / targets[:, None, slot_index]
+            )
+            macro_error[:, :, slot_index] = candidates.macro_error[chosen]
+            used.append(candidates.first[chosen].reshape(len(chosen), -1))
+            used.append(candidates.second[chosen].reshape(len(chosen), -1))
+
+        meals_used = np.concatenate(used, axis=1)
+        distinct = [len(np.setdiff1d(np.unique(row), [-1])) for row in meals_used]
+
+        return {
+            'calorie_error_pct': round(float(calorie_error.mean() * 100), 2),
+            'macro_error': round(float(macro_error.mean()), 4),
+            'distinct_meals': round(float(np.mean(distinct)), 1),
+        }
+
+    def _candidate_rows(self, indices: List[int], pairs: bool) -> List[Tuple[int, int, float, float]]:
+        rows = [(index, -1, portion, 0.0) for index in indices for portion in self.portions]
+        if pairs:
+            for first, second in combinations(indices, 2):
+                for first_portion, second_portion in product(self.pair_portions, repeat=2):
+                    rows.append((first, second, first_portion, second_portion))
+        return rows
+
+    def _slot_dict(self, diet_type: str, slot: str, target: int, candidate: int) -> Dict[str, Any]:
+        key = (diet_type, slot, candidate)
+        content = self._slot_content.get(key)
+        if content is None:
+            first, second, first_portion, second_portion, calories, protein, carbs, fats = \
+                self.candidates[(diet_type, slot)].rows[candidate]
+            items = [self._portion(diet_type, first, first_portion)]
+            if second >= 0:
+                items.append(self._portion(diet_type, second, second_portion))
+            content = {
+                'calories': int(round(calories)),
+                'protein': round(protein, 1),
+                'carbs': round(carbs, 1),
+                'fats': round(fats, 1),
+                'meals': items
+            }
+            self._slot_content[key] = content
+
+        return {'type': slot, 'target_calories': target, **content}
+
+    def _portion(self, diet_type: str, meal_index: int, portion: float) -> Dict[str, Any]:
+        row = int(self.meals[diet_type][meal_index])
+        calories, protein, carbs, fats = self.nutrients[diet_type][meal_index].tolist()
+        return {
+            'name': self.catalog.name(row),
+            'portion': portion,
+            'calories': int(round(calories * portion)),
+            'protein': round(protein * portion, 1),
+            'carbs': round(carbs * portion, 1),
+            'fats': round(fats * portion, 1),
+            'ingredients': self.catalog.ingredients(row)
+        }
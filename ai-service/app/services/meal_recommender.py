@@ -3,8 +3,13 @@ Meal Plan Recommendation Engine
 Generates personalized meal plans based on user profile and dietary preferences
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from enum import Enum
+import numpy as np
+
+from services.meal_catalog import DIETS, MealCatalog
+from services.meal_planner import MEAL_CATALOG, MealPlanner
+from utils.cache import LRUCache
 
 
 class DietType(str, Enum):
@@ -106,8 +111,22 @@ class MealRecommender:
         }
     }
     
-    def __init__(self):
-        pass
+    def __init__(self, cache_size: int = 1024, catalog: Optional[MealCatalog] = None):
+        """
+        Args:
+            cache_size: Number of meal distributions and multi-day plans kept
+            catalog: Meals and daily templates, e.g. mapped from a compiled
+                catalog file (built from MEAL_CATALOG and MEAL_PLANS by default)
+        """
+        self.catalog = catalog if catalog is not None else MealCatalog.from_records(MEAL_CATALOG, self.MEAL_PLANS)
+        # Macro breakdowns depend only on the static diet data
+        self._macros = {
+            diet_type: self.analyze_macros(self.catalog.plan_meals(diet_type))
+            for diet_type in DIETS
+        }
+        self._daily_meals_cache = LRUCache(max_size=cache_size)
+        self._plan_cache = LRUCache(max_size=cache_size)
+        self.planner = MealPlanner(catalog=self.catalog)
     
     def get_meal_plan(self, user_profile: Dict[str, Any], diet_type: str = 'non_vegetarian',
                       days: int = 7) -> Dict[str, Any]:
@@ -120,34 +139,120 @@ class MealRecommender:
             days: Number of days for meal plan
         
         Returns:
-            Complete meal plan with daily breakdown
+            Complete meal plan with a daily template and one plan per day
         """
-        if diet_type not in self.MEAL_PLANS:
+        if diet_type not in DIETS:
             diet_type = 'non_vegetarian'
         
-        base_plan = self.MEAL_PLANS[diet_type]
-        
         # Calculate daily calorie target
         daily_calories = self._calculate_daily_calories(user_profile)
         
-        # Build meal plan
-        meal_plan = {
-            'name': base_plan['name'],
+        key = (diet_type, daily_calories, days)
+        plan_days = self._plan_cache.get(key)
+        if plan_days is None:
+            plan_days = self.planner.plan(diet_type, daily_calories, days)
+            self._plan_cache.set(key, plan_days)
+        
+        return self._build_meal_plan(diet_type, daily_calories, days, plan_days)
+    
+    def get_meal_plans(
+        self,
+        requests: Sequence[Tuple[Dict[str, Any], str, int]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Get meal plans for many users, solved together per diet and length
+        
+        Args:
+            requests: (user_profile, diet_type, days) per user
+        
+        Returns:
+            Meal plan per user, in input order
+        """
+        targets = []
+        groups = {}
+        for position, (user_profile, diet_type, days) in enumerate(requests):
+            if diet_type not in DIETS:
+                diet_type = 'non_vegetarian'
+            daily_calories = self._calculate_daily_calories(user_profile)
+            targets.append((diet_type, daily_calories, days))
+            groups.setdefault(days, []).append(position)
+        
+        plans = [None] * len(requests)
+        for days, positions in groups.items():
+            batch = [targets[position][:2] for position in positions]
+            for position, plan_days in zip(positions, self.planner.plan_batch(batch, days)):
+                plans[position] = self._build_meal_plan(*targets[position], plan_days)
+        
+        return plans
+    
+    def solve_meal_plan(self, user_profile: Dict[str, Any], diet_type: str = 'non_vegetarian',
+                        days: int = 7) -> Tuple[Dict[str, Any], np.ndarray]:
+        """
+        Plan the days of a meal plan without materializing them
+        
+        Used to stream long plans: the (days, slots) choice array is small,
+        and plan_days() turns slices of it into day dicts as they are sent.
+        
+        Returns:
+            The meal plan of get_meal_plan() without 'days', and the choices
+        """
+        if diet_type not in DIETS:
+            diet_type = 'non_vegetarian'
+        
+        daily_calories = self._calculate_daily_calories(user_profile)
+        choices = self.planner.solve(diet_type, [daily_calories], days)[0]
+        
+        outline = self._build_meal_plan(diet_type, daily_calories, days, [])
+        del outline['days']
+        return outline, choices
+    
+    def plan_days(self, diet_type: str, daily_calories: int, choices: np.ndarray,
+                  first_day: int = 1) -> List[Dict[str, Any]]:
+        """Day dicts for a slice of solve_meal_plan() choices, numbered from first_day"""
+        return self.planner.materialize(diet_type, daily_calories, choices, first_day)
+    
+    def _build_meal_plan(self, diet_type: str, daily_calories: int, days: int,
+                         plan_days: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Assemble the meal plan returned to callers"""
+        return {
+            'name': self.catalog.plan_name(diet_type),
             'diet_type': diet_type,
             'daily_calories': daily_calories,
             'duration_days': days,
-            'daily_meals': self._distribute_meals(base_plan['meals'], daily_calories)
+            'daily_meals': self._get_daily_meals(diet_type, daily_calories),
+            'days': plan_days
         }
-        
-        return meal_plan
+    
+    def get_macros(self, diet_type: str) -> Dict[str, float]:
+        """Precomputed macronutrient breakdown for a diet (read-only)"""
+        if diet_type not in self._macros:
+            diet_type = 'non_vegetarian'
+        return self._macros[diet_type]
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Counters of the daily meal distribution and multi-day plan caches"""
+        return {
+            'daily_meals': self._daily_meals_cache.stats(),
+            'plans': self._plan_cache.stats()
+        }
+    
+    def _get_daily_meals(self, diet_type: str, daily_calories: int) -> List[Dict]:
+        """Memoized _distribute_meals; the returned list is shared and read-only"""
+        key = (diet_type, daily_calories)
+        daily_meals = self._daily_meals_cache.get(key)
+        if daily_meals is None:
+            daily_meals = self._distribute_meals(self.catalog.plan_meals(diet_type), daily_calories)
+            self._daily_meals_cache.set(key, daily_meals)
+        return daily_meals
     
     def _calculate_daily_calories(self, profile: Dict[str, Any]) -> int:
         """Calculate daily calorie requirement using Mifflin-St Jeor equation"""
-        age = profile.get('age', 30)
-        gender = profile.get('gender', 'male')
-        height = profile.get('height', 175)  # cm
-        weight = profile.get('weight', 70)   # kg
-        activity_level = profile.get('activity_level', 1.5)  # Default: moderate
+        # Missing or null profile fields fall back to defaults
+        age = profile.get('age') or 30
+        gender = profile.get('gender') or 'male'
+        height = profile.get('height') or 175  # cm
+        weight = profile.get('weight') or 70   # kg
+        activity_level = profile.get('activity_level') or 1.5  # Default: moderate
         
         # Mifflin-St Jeor calculation
         if gender.lower() == 'male':
@@ -0,0 +1,373 @@
+"""
+Pose Analyzer
+Form checking over batches of pose keypoint frames.
+
+Frames are COCO-17 keypoints in MoveNet / PoseNet joint order, given as an
+(N frames x 17 joints x 2 or 3) array of x, y and optional confidence.
+Joint angles, left/right symmetry, body-line alignment and range of motion
+are computed for the whole batch at once, so a second of 30 fps video is a
+single call instead of one request per rep.
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+
+KEYPOINTS = (
+    'nose', 'left_eye', 'right_eye', 'left_ear', 'right_ear',
+    'left_shoulder', 'right_shoulder', 'left_elbow', 'right_elbow',
+    'left_wrist', 'right_wrist', 'left_hip', 'right_hip',
+    'left_knee', 'right_knee', 'left_ankle', 'right_ankle',
+)
+JOINT = {name: index for index, name in enumerate(KEYPOINTS)}
+
+# Angle name -> (first point, vertex, second point)
+ANGLES = {
+    'left_elbow': ('left_shoulder', 'left_elbow', 'left_wrist'),
+    'right_elbow': ('right_shoulder', 'right_elbow', 'right_wrist'),
+    'left_shoulder': ('left_hip', 'left_shoulder', 'left_elbow'),
+    'right_shoulder': ('right_hip', 'right_shoulder', 'right_elbow'),
+    'left_hip': ('left_shoulder', 'left_hip', 'left_knee'),
+    'right_hip': ('right_shoulder', 'right_hip', 'right_knee'),
+    'left_knee': ('left_hip', 'left_knee', 'left_ankle'),
+    'right_knee': ('right_hip', 'right_knee', 'right_ankle'),
+    'left_body_line': ('left_shoulder', 'left_hip', 'left_ankle'),
+    'right_body_line': ('right_shoulder', 'right_hip', 'right_ankle'),
+}
+ANGLE_NAMES = tuple(ANGLES)
+ANGLE_INDEX = {name: index for index, name in enumerate(ANGLE_NAMES)}
+# (A, 3) joint indices of each angle's points
+ANGLE_JOINTS = np.array([[JOINT[point] for point in points] for points in ANGLES.values()])
+
+# Joints compared left vs right: symmetry name -> (left angle, right angle)
+SYMMETRY_PAIRS = {
+    'elbow': ('left_elbow', 'right_elbow'),
+    'shoulder': ('left_shoulder', 'right_shoulder'),
+    'hip': ('left_hip', 'right_hip'),
+    'knee': ('left_knee', 'right_knee'),
+}
+
+# Exercise rules.
+#   primary: angles whose range of motion defines a rep, with the angle to
+#            reach at the bottom (flexed) and top (extended) of the movement
+#   symmetry: pairs checked for left/right balance
+#   posture: per-frame limits (angle, 'min' | 'max', degrees, feedback)
+EXERCISES = {
+    'squat': {
+        'primary': {'left_knee': (100, 160), 'right_knee': (100, 160)},
+        'symmetry': ('knee', 'hip'),
+        'posture': [
+            ('left_hip', 'min', 50, 'Keep your chest up and avoid folding forward'),
+            ('right_hip', 'min', 50, 'Keep your chest up and avoid folding forward'),
+        ],
+        'depth_feedback': 'Squat deeper - aim for thighs parallel to the floor',
+        'extension_feedback': 'Stand up fully at the top of each rep',
+    },
+    'pushup': {
+        'primary': {'left_elbow': (90, 155), 'right_elbow': (90, 155)},
+        'symmetry': ('elbow', 'shoulder'),
+        'posture': [
+            ('left_body_line', 'min', 160, 'Keep your body in a straight line from shoulders to ankles'),
+            ('right_body_line', 'min', 160, 'Keep your body in a straight line from shoulders to ankles'),
+        ],
+        'depth_feedback': 'Lower your chest further - bend elbows to about 90 degrees',
+        'extension_feedback': 'Fully extend your arms at the top',
+    },
+    'lunge': {
+        'primary': {'left_knee': (100, 160), 'right_knee': (100, 160)},
+        'symmetry': (),
+        'posture': [
+            ('left_hip', 'min', 70, 'Keep your torso upright'),
+            ('right_hip', 'min', 70, 'Keep your torso upright'),
+        ],
+        'depth_feedback': 'Lunge deeper - bring your front knee towards 90 degrees',
+        'extension_feedback': 'Return to standing between reps',
+    },
+    'bicep_curl': {
+        'primary': {'left_elbow': (60, 150), 'right_elbow': (60, 150)},
+        'symmetry': ('elbow',),
+        'posture': [
+            ('left_shoulder', 'max', 35, 'Keep your upper arms still at your sides'),
+            ('right_shoulder', 'max', 35, 'Keep your upper arms still at your sides'),
+        ],
+        'depth_feedback': 'Curl the weight higher',
+        'extension_feedback': 'Lower the weight until your arms are nearly straight',
+    },
+    'shoulder_press': {
+        'primary': {'left_elbow': (95, 155), 'right_elbow': (95, 155)},
+        'symmetry': ('elbow', 'shoulder'),
+        'posture': [],
+        'depth_feedback': 'Lower the weight to shoulder height',
+        'extension_feedback': 'Press all the way up until your arms are straight',
+    },
+    'generic': {
+        'primary': {},
+        'symmetry': ('elbow', 'shoulder', 'hip', 'knee'),
+        'posture': [],
+        'depth_feedback': '',
+        'extension_feedback': '',
+    },
+}
+
+
+class FrameScores(NamedTuple):
+    """Per-frame results of PoseAnalyzer.score_frames"""
+    angles: np.ndarray                # (N, A) degrees, NaN where not measurable
+    symmetry: np.ndarray              # (N, pairs) left/right difference
+    accuracy: np.ndarray              # (N,) 0-100
+    valid: np.ndarray                 # (N,) primary joints visible
+    issues: Dict[str, np.ndarray]     # feedback message -> (N,) mask
+
+
+class PoseAnalyzer:
+    """Vectorized form analysis over keypoint frame batches"""
+
+    # Keypoints below this confidence are treated as missing
+    MIN_CONFIDENCE = 0.3
+
+    # Left/right angle difference (degrees) tolerated before penalizing
+    SYMMETRY_TOLERANCE = 15.0
+
+    # Shoulder/hip line tilt (degrees) tolerated before penalizing
+    TILT_TOLERANCE = 8.0
+
+    # Penalty weights (accuracy points at full violation)
+    SYMMETRY_PENALTY = 10.0
+    TILT_PENALTY = 10.0
+    POSTURE_PENALTY = 15.0
+    RANGE_PENALTY = 10.0
+
+    # Feedback is reported when an issue appears in more than this share of frames
+    ISSUE_SHARE = 0.3
+
+    def analyze(
+        self,
+        frames: np.ndarray,
+        exercise: str = 'generic',
+        min_confidence: Optional[float] = None,
+        include_angles: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Analyze a batch of frames
+
+        Args:
+            frames: (N, 17, 2 or 3) keypoints as x, y[, confidence]
+            exercise: Key of EXERCISES
+            min_confidence: Override of MIN_CONFIDENCE
+            include_angles: Also return per-frame angles
+
+        Returns:
+            Per-frame accuracy (None where key joints are not visible),
+            overall accuracy, angle and symmetry statistics and feedback
+        """
+        frames = self.validate_frames(frames)
+        rules = EXERCISES[exercise]
+        angles, symmetry, accuracy, valid, issues = self.score_frames(frames, rules, min_confidence)
+        valid_count = int(valid.sum())
+
+        feedback = self._feedback(issues, valid, rules)
+        range_feedback = self._range_feedback(angles[valid], rules)
+        feedback.extend(range_feedback)
+
+        overall = float(accuracy[valid].mean()) if valid_count else None
+        if overall is not None and range_feedback:
+            overall = max(0.0, overall - self.RANGE_PENALTY * len(range_feedback))
+
+        result = {
+            'exercise': exercise,
+            'frameCount': len(frames),
+            'validFrames': valid_count,
+            'accuracy': [round(value, 1) if ok else None for value, ok in zip(accuracy.tolist(), valid.tolist())],
+            'overallAccuracy': round(overall) if overall is not None else None,
+            'angles': self._angle_stats(angles[valid]),
+            'symmetry': {
+                name: _round_or_none(np.nanmean(symmetry[:, index]) if valid_count else np.nan)
+                for index, name in enumerate(SYMMETRY_PAIRS)
+            },
+            'feedback': feedback,
+            'issues': {
+                message: round(float(mask[valid].mean()), 3)
+                for message, mask in issues.items() if valid_count and mask[valid].any()
+            },
+            'frameAngles': {
+                name: [_round_or_none(value) for value in angles[:, index].tolist()]
+                for index, name in enumerate(ANGLE_NAMES)
+            } if include_angles else None,
+        }
+        return result
+
+    def score_frames(self, frames: np.ndarray, rules: Dict[str, Any],
+                     min_confidence: Optional[float] = None) -> FrameScores:
+        """
+        Per-frame angles and accuracy for validated frames
+
+        A frame is valid when every primary angle of the exercise is
+        measurable (any angle at all for exercises without primary joints).
+        """
+        threshold = self.MIN_CONFIDENCE if min_confidence is None else min_confidence
+
+        points, visible = self._points(frames, threshold)
+        angles = self.joint_angles(points, visible)
+        symmetry = self.symmetry(angles)
+        tilt = self.tilt(points, visible)
+
+        penalties, issues = self._penalties(angles, symmetry, tilt, rules)
+        accuracy = np.clip(100.0 - penalties, 0.0, 100.0)
+
+        if rules['primary']:
+            valid = ~np.isnan(angles[:, [ANGLE_INDEX[name] for name in rules['primary']]]).any(axis=1)
+        else:
+            valid = ~np.isnan(angles).all(axis=1)
+
+        return FrameScores(angles, symmetry, accuracy, valid, issues)
+
+    @staticmethod
+    def validate_frames(frames: Any) -> np.ndarray:
+        """(N, 17, 2|3) float array, or ValueError"""
+        frames = np.asarray(frames, dtype=np.float64)
+        if frames.ndim != 3 or frames.shape[1] != len(KEYPOINTS) or frames.shape[2] not in (2, 3):
+            raise ValueError(
+                f"frames must have shape (N, {len(KEYPOINTS)}, 2 or 3), got {tuple(frames.shape)}"
+            )
+        if len(frames) == 0:
+            raise ValueError("No frames provided")
+        return frames
+
+    @staticmethod
+    def _points(frames: np.ndarray, threshold: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(N, K, 2) coordinates and (N, K) visibility mask"""
+        points = frames[:, :, :2]
+        visible = np.isfinite(points).all(axis=2)
+        if frames.shape[2] == 3:
+            visible &= frames[:, :, 2] >= threshold
+        return points, visible
+
+    @staticmethod
+    def joint_angles(points: np.ndarray, visible: np.ndarray) -> np.ndarray:
+        """
+        (N, A) interior angles in degrees for ANGLE_NAMES
+
+        NaN where any of the three points is missing or degenerate.
+        """
+        first = points[:, ANGLE_JOINTS[:, 0]]
+        vertex = points[:, ANGLE_JOINTS[:, 1]]
+        second = points[:, ANGLE_JOINTS[:, 2]]
+
+        u = first - vertex
+        v = second - vertex
+        cross = u[..., 0] * v[..., 1] - u[..., 1] * v[..., 0]
+        dot = (u * v).sum(axis=-1)
+        angles = np.degrees(np.arctan2(np.abs(cross), dot))
+
+        measurable = visible[:, ANGLE_JOINTS].all(axis=2)
+        measurable &= (np.abs(u).sum(axis=-1) > 0) & (np.abs(v).sum(axis=-1) > 0)
+        return np.where(measurable, angles, np.nan)
+
+    @staticmethod
+    def symmetry(angles: np.ndarray) -> np.ndarray:
+        """(N, pairs) absolute left/right angle difference for SYMMETRY_PAIRS"""
+        left = [ANGLE_INDEX[pair[0]] for pair in SYMMETRY_PAIRS.values()]
+        right = [ANGLE_INDEX[pair[1]] for pair in SYMMETRY_PAIRS.values()]
+        return np.abs(angles[:, left] - angles[:, right])
+
+    @staticmethod
+    def tilt(points: np.ndarray, visible: np.ndarray) -> np.ndarray:
+        """(N, 2) tilt of the shoulder and hip lines from horizontal, in degrees"""
+        pairs = np.array([
+            [JOINT['left_shoulder'], JOINT['right_shoulder']],
+            [JOINT['left_hip'], JOINT['right_hip']],
+        ])
+        delta = points[:, pairs[:, 0]] - points[:, pairs[:, 1]]
+        tilt = np.degrees(np.arctan2(np.abs(delta[..., 1]), np.abs(delta[..., 0])))
+        return np.where(visible[:, pairs].all(axis=2), tilt, np.nan)
+
+    def _penalties(self, angles: np.ndarray, symmetry: np.ndarray, tilt: np.ndarray,
+                   rules: Dict[str, Any]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Per-frame accuracy penalty and a per-frame mask for each issue"""
+        # One column per check: how far past its tolerance each frame is
+        messages, columns, tolerances, weights = [], [], [], []
+
+        def check(message: str, excess: np.ndarray, tolerance: float, weight: float) -> None:
+            messages.append(message)
+            columns.append(excess)
+            tolerances.append(tolerance)
+            weights.append(weight)
+
+        for name in rules['symmetry']:
+            column = list(SYMMETRY_PAIRS).index(name)
+            check(f"Keep your left and right {name}s moving evenly",
+                  symmetry[:, column] - self.SYMMETRY_TOLERANCE, self.SYMMETRY_TOLERANCE, self.SYMMETRY_PENALTY)
+
+        check('Keep shoulders level and aligned',
+              tilt[:, 0] - self.TILT_TOLERANCE, self.TILT_TOLERANCE, self.TILT_PENALTY)
+        check('Keep hips level',
+              tilt[:, 1] - self.TILT_TOLERANCE, self.TILT_TOLERANCE, self.TILT_PENALTY)
+
+        for angle, bound, limit, message in rules['posture']:
+            values = angles[:, ANGLE_INDEX[angle]]
+            # Both sides share a message and half the weight each
+            check(message, limit - values if bound == 'min' else values - limit, 20.0, self.POSTURE_PENALTY / 2)
+
+        # Linear penalty from the tolerance up to twice the tolerance
+        excess = np.column_stack(columns)
+        excess[np.isnan(excess)] = 0.0
+        penalties = (np.clip(excess / np.array(tolerances), 0.0, 1.0) * np.array(weights)).sum(axis=1)
+
+        flagged = excess > 0
+        issues: Dict[str, np.ndarray] = {}
+        for index, message in enumerate(messages):
+            issues[message] = issues[message] | flagged[:, index] if message in issues else flagged[:, index]
+        return penalties, issues
+
+    def _feedback(self, issues: Dict[str, np.ndarray], valid: np.ndarray, rules: Dict[str, Any]) -> List[str]:
+        """Issues present in more than ISSUE_SHARE of the valid frames, most frequent first"""
+        if not valid.any():
+            return ['Move into full view of the camera so your joints are visible']
+        shares = {message: float(mask[valid].mean()) for message, mask in issues.items()}
+        return [message for message, share in sorted(shares.items(), key=lambda item: -item[1])
+                if share > self.ISSUE_SHARE]
+
+    @staticmethod
+    def _range_feedback(angles: np.ndarray, rules: Dict[str, Any]) -> List[str]:
+        """Depth and extension checks over the batch's range of motion"""
+        if not rules['primary'] or len(angles) == 0:
+            return []
+
+        feedback = []
+        columns = [ANGLE_INDEX[name] for name in rules['primary']]
+        bottoms = np.array([target[0] for target in rules['primary'].values()])
+        tops = np.array([target[1] for target in rules['primary'].values()])
+
+        with np.errstate(invalid='ignore'):
+            lowest = np.nanmin(angles[:, columns], axis=0)
+            highest = np.nanmax(angles[:, columns], axis=0)
+
+        if np.nanmin(lowest - bottoms) > 0:
+            feedback.append(rules['depth_feedback'])
+        if np.nanmax(highest - tops) < 0:
+            feedback.append(rules['extension_feedback'])
+        return feedback
+
+    @staticmethod
+    def _angle_stats(angles: np.ndarray) -> Dict[str, Dict[str, Optional[float]]]:
+        """Min, max, mean and range of motion per angle over valid frames"""
+        stats = {}
+        with np.errstate(invalid='ignore'):
+            for index, name in enumerate(ANGLE_NAMES):
+                column = angles[:, index]
+                column = column[~np.isnan(column)]
+                if len(column) == 0:
+                    stats[name] = {'min': None, 'max': None, 'mean': None, 'rangeOfMotion': None}
+                    continue
+                low, high = float(column.min()), float(column.max())
+                stats[name] = {
+                    'min': round(low, 1),
+                    'max': round(high, 1),
+                    'mean': round(float(column.mean()), 1),
+                    'rangeOfMotion': round(high - low, 1),
+                }
+        return stats
+
+
+def _round_or_none(value: float) -> Optional[float]:
+    return None if value is None or np.isnan(value) else round(float(value), 1)
@@ -0,0 +1,259 @@
+"""
+Rep Counter
+Online rep detection and form scoring for live pose streams.
+
+One RepCounter holds the state of one streaming session. Frames are scored
+with PoseAnalyzer as they arrive, the exercise's primary joint angle is
+smoothed with an exponential moving average, and reps are found by
+peak/valley detection with hysteresis: a rep ends when the angle has gone
+from an extended peak down to a flexed valley and back up to a peak.
+
+State is constant-size: the last `window` frames live in a ring buffer and
+everything older is folded into running totals, so a session can stream
+for hours without growing.
+"""
+
+from collections import deque
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+from services.pose_analyzer import ANGLE_INDEX, EXERCISES, PoseAnalyzer
+
+# Exercises with primary joints to count reps on
+REP_EXERCISES = tuple(name for name, rules in EXERCISES.items() if rules['primary'])
+
+
+class RepCounter:
+    """Rep detection and per-rep form scores for one live session"""
+
+    # Weight of the newest frame in the smoothed angle
+    SMOOTHING = 0.35
+
+    # The smoothed angle must move back this far from an extreme to confirm it,
+    # or HYSTERESIS_SHARE of the recent range of motion when that is larger
+    MIN_HYSTERESIS = 15.0
+    HYSTERESIS_SHARE = 0.3
+
+    # Completed reps kept for the session summary
+    MAX_REP_HISTORY = 20
+
+    def __init__(
+        self,
+        exercise: str,
+        analyzer: PoseAnalyzer,
+        window: int = 256,
+        fps: Optional[float] = None,
+        min_confidence: Optional[float] = None
+    ):
+        if exercise not in REP_EXERCISES:
+            raise ValueError(f"Rep counting is not available for exercise: {exercise}")
+
+        self.exercise = exercise
+        self.analyzer = analyzer
+        self.fps = fps
+        self.min_confidence = min_confidence
+        self.rules = EXERCISES[exercise]
+        self._columns = [ANGLE_INDEX[name] for name in self.rules['primary']]
+        self._bottom = float(np.mean([target[0] for target in self.rules['primary'].values()]))
+        self._top = float(np.mean([target[1] for target in self.rules['primary'].values()]))
+
+        # Ring buffer of the most recent frames
+        self.window = window
+        self._angles = np.full(window, np.nan, dtype=np.float32)
+        self._accuracy = np.full(window, np.nan, dtype=np.float32)
+        self._head = 0
+
+        # Signal state
+        self.frames = 0
+        self._smoothed: Optional[float] = None
+        self._phase = 'up'              # looking for a peak ('up') or a valley ('down')
+        self._extreme: Optional[float] = None
+        self._last_peak: Optional[float] = None
+        self._valley: Optional[float] = None
+
+        # Current rep accumulators, reset at every peak
+        self._rep_frames = 0
+        self._rep_accuracy = 0.0
+        self._rep_issues: Dict[str, int] = {}
+        self._rep_start = 0
+
+        # Session totals
+        self.reps = 0
+        self._valid_frames = 0
+        self._total_accuracy = 0.0
+        self._issues: Dict[str, int] = {}
+        self.recent_reps = deque(maxlen=self.MAX_REP_HISTORY)
+
+    def push(self, frames: Any) -> List[Dict[str, Any]]:
+        """
+        Score new frames and advance rep detection
+
+        Args:
+            frames: (N, 17, 2 or 3) keypoints, N <= window
+
+        Returns:
+            One 'rep' event per completed rep, then a 'state' event
+        """
+        frames = self.analyzer.validate_frames(frames)
+        if len(frames) > self.window:
+            raise ValueError(f"Too many frames in one message: {len(frames)} (max {self.window})")
+
+        scores = self.analyzer.score_frames(frames, self.rules, self.min_confidence)
+        signal = scores.angles[:, self._columns].mean(axis=1)
+        issue_masks = [(message, mask.tolist()) for message, mask in scores.issues.items()]
+
+        events = []
+        for index, (value, accuracy, valid) in enumerate(zip(
+            signal.tolist(), scores.accuracy.tolist(), scores.valid.tolist()
+        )):
+            frame = self.frames
+            self.frames += 1
+
+            if not valid:
+                self._record(np.nan, np.nan)
+                continue
+
+            self._smoothed = value if self._smoothed is None else \
+                self._smoothed + self.SMOOTHING * (value - self._smoothed)
+            self._record(self._smoothed, accuracy)
+
+            self._rep_frames += 1
+            self._rep_accuracy += accuracy
+            self._valid_frames += 1
+            self._total_accuracy += accuracy
+            for message, mask in issue_masks:
+                if mask[index]:
+                    self._rep_issues[message] = self._rep_issues.get(message, 0) + 1
+                    self._issues[message] = self._issues.get(message, 0) + 1
+
+            event = self._detect(frame)
+            if event is not None:
+                events.append(event)
+
+        valid_accuracy = scores.accuracy[scores.valid]
+        events.append({
+            'type': 'state',
+            'frame': self.frames,
+            'reps': self.reps,
+            'phase': self._phase,
+            'angle': round(self._smoothed, 1) if self._smoothed is not None else None,
+            'accuracy': round(float(valid_accuracy.mean()), 1) if len(valid_accuracy) else None,
+            'recentAccuracy': self._recent_accuracy(),
+        })
+        return events
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """
+        End the session
+
+        A rep that is back on its way up from the valley would only be
+        confirmed by the next descent; it is counted here instead.
+
+        Returns:
+            The pending 'rep' event, if any, then the 'summary' event
+        """
+        events = []
+        if self._phase == 'up' and self._valley is not None and self._last_peak is not None:
+            events.append(self._complete_rep(self._extreme, self.frames))
+            self._valley = None
+        events.append(self.summary())
+        return events
+
+    def summary(self) -> Dict[str, Any]:
+        """Totals for the whole session"""
+        frames = self._valid_frames
+        feedback = [
+            message for message, count in sorted(self._issues.items(), key=lambda item: -item[1])
+            if frames and count / frames > self.analyzer.ISSUE_SHARE
+        ]
+        rep_scores = [rep['accuracy'] for rep in self.recent_reps]
+        return {
+            'type': 'summary',
+            'exercise': self.exercise,
+            'frames': self.frames,
+            'validFrames': frames,
+            'reps': self.reps,
+            'averageAccuracy': round(self._total_accuracy / frames) if frames else None,
+            'recentRepAccuracy': round(float(np.mean(rep_scores))) if rep_scores else None,
+            'feedback': feedback,
+            'recentReps': list(self.recent_reps),
+        }
+
+    def _record(self, angle: float, accuracy: float) -> None:
+        self._angles[self._head] = angle
+        self._accuracy[self._head] = accuracy
+        self._head = (self._head + 1) % self.window
+
+    def _recent_accuracy(self) -> Optional[float]:
+        """Mean accuracy over the ring buffer window"""
+        recent = self._accuracy[~np.isnan(self._accuracy)]
+        return round(float(recent.mean()), 1) if len(recent) else None
+
+    def _hysteresis(self) -> float:
+        """Confirmation distance, scaled to the range of motion in the window"""
+        recent = self._angles[~np.isnan(self._angles)]
+        span = float(recent.max() - recent.min()) if len(recent) else 0.0
+        return max(self.MIN_HYSTERESIS, self.HYSTERESIS_SHARE * span)
+
+    def _detect(self, frame: int) -> Optional[Dict[str, Any]]:
+        """Advance the peak/valley state machine; a rep event when one completes"""
+        value = self._smoothed
+        if self._extreme is None:
+            self._extreme = value
+            return None
+
+        if self._phase == 'up':
+            if value > self._extreme:
+                self._extreme = value
+            elif value < self._extreme - self._hysteresis():
+                peak = self._extreme
+                event = self._complete_rep(peak, frame) if self._valley is not None else None
+                self._start_rep(peak, frame)
+                self._phase = 'down'
+                self._extreme = value
+                return event
+        else:
+            if value < self._extreme:
+                self._extreme = value
+            elif value > self._extreme + self._hysteresis():
+                self._valley = self._extreme
+                self._phase = 'up'
+                self._extreme = value
+        return None
+
+    def _start_rep(self, peak: float, frame: int) -> None:
+        self._last_peak = peak
+        self._valley = None
+        self._rep_frames = 0
+        self._rep_accuracy = 0.0
+        self._rep_issues = {}
+        self._rep_start = frame
+
+    def _complete_rep(self, peak: float, frame: int) -> Dict[str, Any]:
+        """Score the rep that ended at this peak"""
+        self.reps += 1
+        frames = max(self._rep_frames, 1)
+        feedback = [
+            message for message, count in sorted(self._rep_issues.items(), key=lambda item: -item[1])
+            if count / frames > self.analyzer.ISSUE_SHARE
+        ]
+        accuracy = self._rep_accuracy / frames
+        if self._valley > self._bottom:
+            feedback.append(self.rules['depth_feedback'])
+            accuracy -= self.analyzer.RANGE_PENALTY
+        if min(peak, self._last_peak) < self._top:
+            feedback.append(self.rules['extension_feedback'])
+            accuracy -= self.analyzer.RANGE_PENALTY
+
+        rep = {
+            'type': 'rep',
+            'rep': self.reps,
+            'accuracy': round(max(0.0, accuracy)),
+            'bottomAngle': round(self._valley, 1),
+            'topAngle': round(peak, 1),
+            'frames': frame - self._rep_start,
+            'durationSeconds': round((frame - self._rep_start) / self.fps, 2) if self.fps else None,
+            'feedback': feedback,
+        }
+        self.recent_reps.append(rep)
+        return rep
@@ -0,0 +1,251 @@
+"""
+Trend Estimation
+Slope, confidence and label per metric of a health history, for all
+metrics at once.
+
+    split    - second-half mean vs first-half mean (the original labels)
+    ols      - least-squares slope
+    theilsen - median of pairwise slopes; all pairs for short histories and
+               a fixed sample of pairs for long ones, so the cost stays
+               O(n) however long the history is
+    ewma     - least-squares slope with exponentially decaying weights, so
+               recent days count more than old ones
+
+Histories of the same length are stacked and fitted together, so a batch
+of users costs one NumPy pass per distinct history length.
+
+Slopes are in units per day. Confidence is one minus the two-sided p-value
+of the slope against its residual standard error. Slope methods label a
+metric 'improving' or 'declining' when the fitted change over half the
+(effective) window is at least CHANGE of the metric's level and the
+confidence reaches CONFIDENCE; the split method keeps the original
+10% rule.
+"""
+
+from typing import List, Dict, Any, Sequence, Tuple
+from functools import lru_cache
+import math
+import numpy as np
+
+from services.anomaly_detector import UNTRACKED_ZERO
+from services.health_series import HealthSeries
+
+
+LABELS = ('declining', 'stable', 'improving')
+
+# Relative change and confidence needed for an 'improving'/'declining' label
+CHANGE = 0.1
+CONFIDENCE = 0.9
+
+
+@lru_cache(maxsize=64)
+def _pairs(days: int, max_pairs: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Index pairs (i < j) of a Theil-Sen fit: all of them, or a fixed sample"""
+    if days * (days - 1) // 2 <= max_pairs:
+        first, second = np.triu_indices(days, k=1)
+    else:
+        # Seeded by the length so a history always gets the same slope
+        rng = np.random.default_rng(days)
+        first = rng.integers(0, days, max_pairs)
+        second = rng.integers(0, days - 1, max_pairs)
+        second += second >= first
+        first, second = np.minimum(first, second), np.maximum(first, second)
+    first.flags.writeable = second.flags.writeable = False
+    return first, second
+
+
+def _nanmedian(values: np.ndarray) -> np.ndarray:
+    """Median of the non-NaN values of each row (NaN for empty rows, without warnings)"""
+    ordered = np.sort(values, axis=1)
+    valid = np.count_nonzero(~np.isnan(values), axis=1)
+    pick = np.stack([np.maximum(valid - 1, 0) // 2, valid // 2], axis=1)
+    pick = np.minimum(pick, values.shape[1] - 1)
+    median = np.take_along_axis(ordered, pick, axis=1).mean(axis=1)
+    median[valid == 0] = np.nan
+    return median
+
+
+def _confidence(t: np.ndarray, df: np.ndarray) -> np.ndarray:
+    """
+    1 - two-sided p-value of Student's t statistics
+
+    The t statistic is mapped to a normal deviate with the approximation
+    z = t (1 - 1/(4 df)) / sqrt(1 + t^2/(2 df)), which avoids a SciPy
+    dependency and is within about 0.01 for df >= 3.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.abs(t)
+        z = t * (1 - 1 / (4 * df)) / np.sqrt(1 + t * t / (2 * df))
+    z = np.where(np.isposinf(t), np.inf, z)
+    erf = np.vectorize(math.erf, otypes=[np.float64])
+    confidence = erf(np.nan_to_num(z, nan=0.0, posinf=40.0) / math.sqrt(2))
+    return np.where(df >= 1, confidence, 0.0)
+
+
+class TrendEngine:
+    """Vectorized trend fits over a (metrics, days) array"""
+
+    METHODS = ('split', 'ols', 'theilsen', 'ewma')
+
+    # Values (or pairwise slopes) held by one fit (bounds the memory of a batch)
+    FIT_CELLS = 1 << 21
+
+    def __init__(
+        self,
+        method: str = 'theilsen',
+        metrics: Tuple[str, ...] = ('steps', 'sleepHours', 'waterIntake', 'calories'),
+        max_pairs: int = 4096,
+        halflife: float = 14.0
+    ):
+        """
+        Args:
+            method: One of METHODS
+            metrics: Record fields that receive a trend
+            max_pairs: Most pairwise slopes in a Theil-Sen fit
+            halflife: Days over which an EWMA weight halves
+        """
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown trend method: {method} (expected one of {', '.join(self.METHODS)})")
+        self.method = method
+        self.metrics = tuple(metrics)
+        self.max_pairs = max_pairs
+        self.halflife = halflife
+
+    def trends(self, series: HealthSeries) -> Dict[str, Dict[str, Any]]:
+        """{metric: {slope, confidence, label}} of one history (empty below 2 days)"""
+        return self.trends_batch([series])[0]
+
+    def trends_batch(self, histories: Sequence[HealthSeries]) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        Trends of many histories, fitted together
+
+        Histories of each length are stacked into one (histories x metrics,
+        days) array. Lengths are not padded into a shared array: padding
+        would change the Theil-Sen pair sample and the split halves, and a
+        history must get the same trends alone or in a batch.
+
+        Returns:
+            Per history, {metric: {slope, confidence, label}} (empty below 2 days)
+        """
+        results = [{} for _ in histories]
+        groups = {}
+        for index, series in enumerate(histories):
+            if len(series) >= 2:
+                groups.setdefault(len(series), []).append(index)
+
+        for days, members in groups.items():
+            if self.method == 'theilsen':
+                cells = len(_pairs(days, self.max_pairs)[0])
+            else:
+                cells = days
+            step = max(1, self.FIT_CELLS // (len(self.metrics) * cells))
+
+            for start in range(0, len(members), step):
+                chunk = members[start:start + step]
+                slope, confidence, labels = self.fit(self._values([histories[index] for index in chunk]))
+                slope = np.nan_to_num(slope).reshape(len(chunk), -1).tolist()
+                confidence = confidence.reshape(len(chunk), -1).tolist()
+                labels = labels.reshape(len(chunk), -1).tolist()
+
+                for index, slopes, confidences, label_indexes in zip(chunk, slope, confidence, labels):
+                    results[index] = {
+                        metric: {
+                            'slope': round(metric_slope, 4),
+                            'confidence': round(metric_confidence, 3),
+                            'label': LABELS[label]
+                        }
+                        for metric, metric_slope, metric_confidence, label in zip(
+                            self.metrics, slopes, confidences, label_indexes
+                        )
+                    }
+        return results
+
+    def fit(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Fit every row of a (metrics, days) float array
+
+        Args:
+            values: Daily values, NaN where a day has no value
+
+        Returns:
+            (slope, confidence, label index into LABELS) per row
+        """
+        if self.method == 'split':
+            return self._split(values)
+
+        days = np.arange(values.shape[1], dtype=np.float64)
+        valid = ~np.isnan(values)
+        if self.method == 'ewma':
+            weights = np.exp2((days - days[-1]) / self.halflife) * valid
+        else:
+            weights = valid.astype(np.float64)
+        filled = np.where(valid, values, 0.0)
+
+        # Weighted means of day and value
+        total = weights.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            day_mean = (weights * days).sum(axis=1) / total
+            level = (weights * filled).sum(axis=1) / total
+            offset = days - day_mean[:, None]
+            sxx = (weights * offset * offset).sum(axis=1)
+            if self.method == 'theilsen':
+                slope = self._theil_sen_slope(values)
+                intercept = _nanmedian(values - slope[:, None] * offset)
+            else:
+                slope = (weights * offset * (filled - level[:, None])).sum(axis=1) / sxx
+                intercept = level
+            residuals = np.where(valid, filled - intercept[:, None] - slope[:, None] * offset, 0.0)
+
+            # Effective number of days (the valid count without weights)
+            effective = total * total / (weights * weights).sum(axis=1)
+            df = effective - 2
+            variance = (weights * residuals * residuals).sum(axis=1) / total * effective / df
+            standard_error = np.sqrt(variance * (weights * weights * offset * offset).sum(axis=1)) / sxx
+            t = slope / standard_error
+
+        confidence = _confidence(t, df)
+        change = slope * effective / 2
+        labels = np.ones(len(values), dtype=np.int64)
+        significant = confidence >= CONFIDENCE
+        with np.errstate(invalid='ignore'):
+            labels[significant & (change >= CHANGE * np.abs(level))] = 2
+            labels[significant & (change <= -CHANGE * np.abs(level))] = 0
+        return slope, confidence, labels
+
+    def _theil_sen_slope(self, values: np.ndarray) -> np.ndarray:
+        """Median pairwise slope per row (pairs with a missing value are skipped)"""
+        first, second = _pairs(values.shape[1], self.max_pairs)
+        slopes = (values[:, second] - values[:, first]) / (second - first)
+        return _nanmedian(slopes)
+
+    def _split(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Second-half vs first-half means, with a Welch t-test as confidence"""
+        # Untracked days count as 0, as in the original labels
+        values = np.nan_to_num(values)
+        count = values.shape[1]
+        mid = count // 2
+        first, second = values[:, :mid], values[:, mid:]
+        first_mean = first.mean(axis=1) if mid > 0 else np.zeros(len(values))
+        second_mean = second.mean(axis=1)
+
+        # Half centers are count / 2 days apart
+        slope = (second_mean - first_mean) / (count / 2)
+        first_variance = first.var(axis=1, ddof=1) / mid if mid > 1 else np.zeros(len(values))
+        second_variance = second.var(axis=1, ddof=1) / (count - mid) if count - mid > 1 else np.zeros(len(values))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t = (second_mean - first_mean) / np.sqrt(first_variance + second_variance)
+        confidence = _confidence(t, np.full(len(values), count - 2.0))
+
+        labels = np.ones(len(values), dtype=np.int64)
+        labels[second_mean > first_mean * 1.1] = 2
+        labels[second_mean < first_mean * 0.9] = 0
+        return slope, confidence, labels
+
+    def _values(self, histories: List[HealthSeries]) -> np.ndarray:
+        """(histories x metrics, days) float array of equal-length histories, untracked days as NaN"""
+        values = np.empty((len(histories), len(self.metrics), len(histories[0])))
+        for row, metric in enumerate(self.metrics):
+            values[:, row] = HealthSeries.stack_column(histories, metric)
+            if metric in UNTRACKED_ZERO:
+                values[:, row][values[:, row] == 0] = np.nan
+        return values.reshape(-1, values.shape[2])
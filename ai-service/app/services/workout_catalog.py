@@ -0,0 +1,337 @@
+"""
+Workout Catalog
+Indexed, columnar store of workouts with fast filtered top-k retrieval.
+Workout attributes live in NumPy arrays with precomputed row indexes per
+goal, intensity, duration band and equipment set; ranking is a vectorized
+scoring function over the user profile.
+
+Every array, including the indexes and a string table holding ids, names
+and exercises, can be written to a packed file (see services.catalogs) and
+memory-mapped back, so API workers share a single copy of the catalog.
+"""
+
+from typing import List, Dict, Any, Iterable, Optional, Sequence, Tuple
+import numpy as np
+
+from utils.cache import LRUCache
+from utils.packed_store import StringPool, StringTable, pack_ragged
+
+
+GOALS = ('weight_loss', 'muscle_gain', 'endurance', 'flexibility')
+INTENSITIES = ('low', 'moderate', 'high')
+EQUIPMENT = (
+    'mat', 'dumbbells', 'barbell', 'kettlebell', 'machine', 'bands',
+    'pull_up_bar', 'jump_rope', 'bike', 'treadmill', 'pool',
+)
+
+# Upper bounds (minutes, exclusive) of the duration bands; the last band is open
+DURATION_BANDS = (20, 40, 60)
+
+# Age bands with the profile adjustment applied to each
+AGE_BANDS = ('young', 'adult', 'senior')
+
+LOW, MODERATE, HIGH = range(len(INTENSITIES))
+
+# How well each (adjusted) intensity suits an age band
+INTENSITY_FIT = np.array([
+    # low  moderate  high
+    [0.4, 0.7, 1.0],   # young
+    [0.6, 1.0, 0.8],   # adult
+    [1.0, 0.9, 0.3],   # senior
+])
+
+
+def age_band(age: Optional[int]) -> int:
+    """Age band index; unknown ages count as adult"""
+    if age is None or 25 <= age <= 50:
+        return AGE_BANDS.index('adult')
+    return AGE_BANDS.index('young') if age < 25 else AGE_BANDS.index('senior')
+
+
+class WorkoutCatalog:
+    """
+    Columnar workout catalog.
+
+    Per-age-band variants (reduced intensity for seniors, raised intensity
+    for young users) are precomputed as arrays. Their dicts are built on
+    first use and kept in a bounded cache, so requests never copy the
+    catalog and large catalogs never turn into per-process object graphs.
+    Returned dicts must be treated as read-only.
+    """
+
+    # Preferred session length when the user gives no limit
+    PREFERRED_DURATION = 45
+
+    # BMI above which high-impact sessions are down-weighted
+    HIGH_BMI = 30
+
+    # Workout dicts (per age band) kept for reuse
+    VARIANT_CACHE_SIZE = 4096
+
+    def __init__(self, columns: Dict[str, np.ndarray], strings: StringTable):
+        """
+        Args:
+            columns: Arrays as produced by from_records (or mapped from a packed file)
+            strings: Ids, names and exercise names referenced by the columns
+        """
+        self.columns = columns
+        self.strings = strings
+
+        self.goal = columns['goal']
+        self.intensity = columns['intensity']
+        self.duration = columns['duration']
+        self.calories = columns['calories']
+        self.equipment = columns['equipment']
+        self.duration_band = columns['duration_band']
+
+        # Age-band variants: (bands, workouts) intensity codes and calories
+        self.band_intensity = columns['band_intensity']
+        self.band_calories = columns['band_calories']
+
+        # Facet indexes: value -> sorted row ids (views into the index columns)
+        self.by_goal = self._facet(columns, 'goal_index')
+        self.by_duration_band = self._facet(columns, 'duration_band_index')
+        self.by_band_intensity = [
+            self._facet(columns, 'band_intensity_index', band) for band in range(len(AGE_BANDS))
+        ]
+        self.by_equipment = dict(zip(columns['equipment_index.values'].tolist(),
+                                     self._facet(columns, 'equipment_index')))
+
+        self._variants = LRUCache(max_size=self.VARIANT_CACHE_SIZE)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'WorkoutCatalog':
+        """
+        Build from workout dicts
+
+        Args:
+            records: Workout dicts with id, name, goal, duration, intensity,
+                calories, exercises and optional equipment list
+        """
+        records = list(records)
+        count = len(records)
+        strings = StringPool()
+
+        columns = {
+            'goal': np.fromiter((GOALS.index(r['goal']) for r in records), dtype=np.uint8, count=count),
+            'intensity': np.fromiter(
+                (INTENSITIES.index(r['intensity']) for r in records), dtype=np.uint8, count=count
+            ),
+            'duration': np.fromiter((r['duration'] for r in records), dtype=np.int32, count=count),
+            'calories': np.fromiter((r['calories'] for r in records), dtype=np.int32, count=count),
+            'equipment': np.fromiter(
+                (cls._equipment_mask(r.get('equipment', [])) for r in records), dtype=np.uint16, count=count
+            ),
+            'id': np.fromiter((strings.add(r['id']) for r in records), dtype=np.uint32, count=count),
+            'name': np.fromiter((strings.add(r['name']) for r in records), dtype=np.uint32, count=count),
+        }
+        columns['exercises.offsets'], columns['exercises'] = pack_ragged(
+            [[strings.add(exercise) for exercise in r['exercises']] for r in records]
+        )
+        columns['duration_band'] = np.searchsorted(DURATION_BANDS, columns['duration'], side='right').astype(np.uint8)
+
+        columns['band_intensity'] = np.empty((len(AGE_BANDS), count), dtype=np.uint8)
+        columns['band_calories'] = np.empty((len(AGE_BANDS), count), dtype=np.int32)
+        for band in range(len(AGE_BANDS)):
+            columns['band_intensity'][band], columns['band_calories'][band] = cls._adjust(
+                band, columns['intensity'], columns['calories']
+            )
+
+        columns['goal_index.rows'], columns['goal_index.offsets'] = _index(columns['goal'], len(GOALS))
+        columns['duration_band_index.rows'], columns['duration_band_index.offsets'] = _index(
+            columns['duration_band'], len(DURATION_BANDS) + 1
+        )
+        band_indexes = [_index(columns['band_intensity'][band], len(INTENSITIES)) for band in range(len(AGE_BANDS))]
+        columns['band_intensity_index.rows'] = np.stack([rows for rows, _ in band_indexes])
+        columns['band_intensity_index.offsets'] = np.stack([offsets for _, offsets in band_indexes])
+        masks, inverse = np.unique(columns['equipment'], return_inverse=True)
+        columns['equipment_index.values'] = masks
+        columns['equipment_index.rows'], columns['equipment_index.offsets'] = _index(inverse, len(masks))
+
+        return cls(columns, strings.table())
+
+    @classmethod
+    def from_goal_map(cls, workouts: Dict[str, List[Dict[str, Any]]]) -> 'WorkoutCatalog':
+        """Build from {goal: [workout, ...]} as in WorkoutRecommender.WORKOUTS"""
+        return cls.from_records({**workout, 'goal': goal} for goal, items in workouts.items() for workout in items)
+
+    def sections(self, prefix: str = 'workouts') -> Dict[str, np.ndarray]:
+        """Arrays to store in a packed file"""
+        sections = {f"{prefix}.{name}": array for name, array in self.columns.items()}
+        sections.update(self.strings.sections(f"{prefix}.strings"))
+        return sections
+
+    @classmethod
+    def from_sections(cls, sections: Dict[str, np.ndarray], prefix: str = 'workouts') -> 'WorkoutCatalog':
+        """Catalog over arrays read from a packed file (no copies)"""
+        columns = {
+            name[len(prefix) + 1:]: array for name, array in sections.items()
+            if name.startswith(f"{prefix}.") and not name.startswith(f"{prefix}.strings.")
+        }
+        return cls(columns, StringTable.from_sections(sections, f"{prefix}.strings"))
+
+    def __len__(self) -> int:
+        return len(self.goal)
+
+    def top_k(
+        self,
+        user_profile: Dict[str, Any],
+        goal: str,
+        count: int,
+        intensity: Optional[str] = None,
+        max_duration: Optional[int] = None,
+        equipment: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Best matching workouts for a profile
+
+        Args:
+            user_profile: User demographic data
+            goal: Fitness goal
+            count: Number of workouts to return
+            intensity: Only workouts of this (age-adjusted) intensity
+            max_duration: Only workouts up to this many minutes
+            equipment: Equipment available to the user (None means no restriction)
+
+        Returns:
+            Up to `count` workout dicts, best first
+        """
+        band = age_band(user_profile.get('age'))
+        rows = self._candidates(band, goal, intensity, max_duration, equipment)
+        if len(rows) == 0:
+            return []
+
+        scores = self._score(rows, band, goal, user_profile, max_duration)
+
+        if len(rows) > count:
+            top = np.argpartition(-scores, count - 1)[:count]
+        else:
+            top = np.arange(len(rows))
+        # Highest score first; catalog order breaks ties
+        top = top[np.lexsort((rows[top], -scores[top]))]
+
+        return [self._variant(band, row) for row in rows[top].tolist()]
+
+    def _candidates(self, band: int, goal: str, intensity: Optional[str],
+                    max_duration: Optional[int], equipment: Optional[Sequence[str]]) -> np.ndarray:
+        """Intersect facet indexes, smallest first"""
+        facets = [self.by_goal[GOALS.index(goal)]]
+
+        if intensity is not None:
+            facets.append(self.by_band_intensity[band][INTENSITIES.index(intensity)])
+
+        if max_duration is not None:
+            last_band = int(np.searchsorted(DURATION_BANDS, max_duration, side='right'))
+            facets.append(np.concatenate(self.by_duration_band[:last_band + 1]))
+
+        if equipment is not None:
+            available = self._equipment_mask(item for item in equipment if item in EQUIPMENT)
+            allowed = [rows for mask, rows in self.by_equipment.items() if mask & ~available == 0]
+            facets.append(np.concatenate(allowed) if allowed else np.empty(0, dtype=np.int64))
+
+        facets.sort(key=len)
+        rows = np.sort(facets[0])
+        for facet in facets[1:]:
+            rows = np.intersect1d(rows, facet, assume_unique=True)
+
+        # Duration bands are coarse; apply the exact limit on the survivors
+        if max_duration is not None:
+            rows = rows[self.duration[rows] <= max_duration]
+        return rows
+
+    def _score(self, rows: np.ndarray, band: int, goal: str,
+               user_profile: Dict[str, Any], max_duration: Optional[int]) -> np.ndarray:
+        """
+        Score in [0, 1] (before penalties) combining intensity fit for the
+        age band, goal-specific fit and closeness to the preferred duration
+        """
+        intensity = self.band_intensity[band, rows]
+        calories = self.band_calories[band, rows].astype(np.float64)
+        duration = self.duration[rows].astype(np.float64)
+
+        intensity_fit = INTENSITY_FIT[band, intensity]
+
+        if goal == 'weight_loss':
+            burn_rate = calories / duration
+            goal_fit = burn_rate / burn_rate.max()
+        elif goal == 'muscle_gain':
+            goal_fit = intensity / HIGH
+        elif goal == 'endurance':
+            goal_fit = duration / duration.max()
+        else:
+            goal_fit = 1 - intensity / HIGH
+
+        preferred = min(max_duration or self.PREFERRED_DURATION, self.PREFERRED_DURATION)
+        duration_fit = 1 / (1 + np.abs(duration - preferred) / preferred)
+
+        score = 0.4 * intensity_fit + 0.4 * goal_fit + 0.2 * duration_fit
+
+        height = user_profile.get('height')
+        weight = user_profile.get('weight')
+        if height and weight and weight / (height / 100) ** 2 >= self.HIGH_BMI:
+            score -= 0.2 * (intensity == HIGH)
+
+        return score
+
+    @staticmethod
+    def _adjust(band: int, intensity: np.ndarray, calories: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Intensity codes and calories of every workout for an age band"""
+        intensity = intensity.copy()
+        calories = calories.copy()
+
+        if AGE_BANDS[band] == 'senior':
+            # Reduce intensity for older users
+            lowered = intensity == HIGH
+            intensity[lowered] = MODERATE
+            calories[lowered] = (calories[lowered] * 0.8).astype(np.int32)
+        elif AGE_BANDS[band] == 'young':
+            # Increase challenge for younger users
+            raised = intensity != HIGH
+            intensity[raised] = HIGH
+            calories[raised] = (calories[raised] * 1.2).astype(np.int32)
+
+        return intensity, calories
+
+    def _variant(self, band: int, row: int) -> Dict[str, Any]:
+        """Cached dict of a workout as adjusted for an age band"""
+        key = (band, row)
+        variant = self._variants.get(key)
+        if variant is None:
+            strings = self.strings
+            offsets = self.columns['exercises.offsets']
+            exercises = self.columns['exercises'][offsets[row]:offsets[row + 1]].tolist()
+            mask = int(self.equipment[row])
+            variant = {
+                'id': strings[self.columns['id'][row]],
+                'name': strings[self.columns['name'][row]],
+                'duration': int(self.duration[row]),
+                'intensity': INTENSITIES[self.band_intensity[band, row]],
+                'calories': int(self.band_calories[band, row]),
+                'exercises': [strings[exercise] for exercise in exercises],
+                'equipment': [item for bit, item in enumerate(EQUIPMENT) if mask >> bit & 1]
+            }
+            self._variants.set(key, variant)
+        return variant
+
+    @staticmethod
+    def _equipment_mask(items: Iterable[str]) -> int:
+        mask = 0
+        for item in items:
+            mask |= 1 << EQUIPMENT.index(item)
+        return mask
+
+    @staticmethod
+    def _facet(columns: Dict[str, np.ndarray], name: str, *position: int) -> List[np.ndarray]:
+        """Per-value row lists of a stored index"""
+        rows = columns[f"{name}.rows"][position]
+        offsets = columns[f"{name}.offsets"][position].tolist()
+        return [rows[start:end] for start, end in zip(offsets, offsets[1:])]
+
+
+def _index(values: np.ndarray, size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row ids grouped by value (ascending within each value) and group offsets"""
+    rows = np.argsort(values, kind='stable').astype(np.int32)
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(values, minlength=size), out=offsets[1:])
+    return rows, offsets
+
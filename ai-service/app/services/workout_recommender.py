@@ -3,8 +3,9 @@ Workout Recommendation Engine
 Generates personalized workout plans based on user profile and goals
 """
 
-from typing import List, Dict, Any
-import random
+from typing import List, Dict, Any, Optional, Sequence
+
+from services.workout_catalog import GOALS, WorkoutCatalog
 
 
 class WorkoutRecommender:
@@ -18,7 +19,8 @@ class WorkoutRecommender:
                 'duration': 30,
                 'intensity': 'high',
                 'calories': 350,
-                'exercises': ['Burpees', 'Mountain Climbers', 'Jump Squats', 'High Knees']
+                'exercises': ['Burpees', 'Mountain Climbers', 'Jump Squats', 'High Knees'],
+                'equipment': []
             },
             {
                 'id': 'running_45',
@@ -26,7 +28,8 @@ class WorkoutRecommender:
                 'duration': 45,
                 'intensity': 'moderate',
                 'calories': 400,
-                'exercises': ['Running']
+                'exercises': ['Running'],
+                'equipment': []
             },
             {
                 'id': 'cardio_circuit_30',
@@ -34,7 +37,8 @@ class WorkoutRecommender:
                 'duration': 30,
                 'intensity': 'high',
                 'calories': 320,
-                'exercises': ['Jumping Jacks', 'Skipping Rope', 'Cycling']
+                'exercises': ['Jumping Jacks', 'Skipping Rope', 'Cycling'],
+                'equipment': ['jump_rope', 'bike']
             }
         ],
         'muscle_gain': [
@@ -44,7 +48,8 @@ class WorkoutRecommender:
                 'duration': 60,
                 'intensity': 'high',
                 'calories': 280,
-                'exercises': ['Bench Press', 'Pull-ups', 'Dips', 'Rows']
+                'exercises': ['Bench Press', 'Pull-ups', 'Dips', 'Rows'],
+                'equipment': ['barbell', 'pull_up_bar']
             },
             {
                 'id': 'lower_body_60',
@@ -52,7 +57,8 @@ class WorkoutRecommender:
                 'duration': 60,
                 'intensity': 'high',
                 'calories': 290,
-                'exercises': ['Squats', 'Deadlifts', 'Leg Press', 'Lunges']
+                'exercises': ['Squats', 'Deadlifts', 'Leg Press', 'Lunges'],
+                'equipment': ['barbell', 'machine']
             },
             {
                 'id': 'full_body_50',
@@ -60,7 +66,8 @@ class WorkoutRecommender:
                 'duration': 50,
                 'intensity': 'high',
                 'calories': 260,
-                'exercises': ['Compound Lifts', 'Free Weights', 'Resistance Bands']
+                'exercises': ['Compound Lifts', 'Free Weights', 'Resistance Bands'],
+                'equipment': ['dumbbells', 'bands']
             }
         ],
         'endurance': [
@@ -70,7 +77,8 @@ class WorkoutRecommender:
                 'duration': 60,
                 'intensity': 'moderate',
                 'calories': 450,
-                'exercises': ['Distance Running']
+                'exercises': ['Distance Running'],
+                'equipment': []
             },
             {
                 'id': 'cycling_90',
@@ -78,7 +86,8 @@ class WorkoutRecommender:
                 'duration': 90,
                 'intensity': 'moderate',
                 'calories': 480,
-                'exercises': ['Steady Cycling']
+                'exercises': ['Steady Cycling'],
+                'equipment': ['bike']
             },
             {
                 'id': 'swimming_45',
@@ -86,7 +95,8 @@ class WorkoutRecommender:
                 'duration': 45,
                 'intensity': 'moderate',
                 'calories': 420,
-                'exercises': ['Swimming']
+                'exercises': ['Swimming'],
+                'equipment': ['pool']
             }
         ],
         'flexibility': [
@@ -96,7 +106,8 @@ class WorkoutRecommender:
                 'duration': 60,
                 'intensity': 'low',
                 'calories': 180,
-                'exercises': ['Yoga Poses', 'Stretching']
+                'exercises': ['Yoga Poses', 'Stretching'],
+                'equipment': ['mat']
             },
             {
                 'id': 'pilates_45',
@@ -104,7 +115,8 @@ class WorkoutRecommender:
                 'duration': 45,
                 'intensity': 'moderate',
                 'calories': 200,
-                'exercises': ['Core Strengthening', 'Flexibility']
+                'exercises': ['Core Strengthening', 'Flexibility'],
+                'equipment': ['mat']
             },
             {
                 'id': 'stretching_30',
@@ -112,16 +124,24 @@ class WorkoutRecommender:
                 'duration': 30,
                 'intensity': 'low',
                 'calories': 100,
-                'exercises': ['Dynamic Stretching']
+                'exercises': ['Dynamic Stretching'],
+                'equipment': []
             }
         ]
     }
     
-    def __init__(self):
-        pass
+    def __init__(self, catalog: Optional[WorkoutCatalog] = None):
+        """
+        Args:
+            catalog: Workout catalog to query, e.g. one mapped from a compiled
+                catalog file (built from WORKOUTS by default)
+        """
+        self.catalog = catalog if catalog is not None else WorkoutCatalog.from_goal_map(self.WORKOUTS)
     
     def get_recommendations(self, user_profile: Dict[str, Any], goal: str = 'weight_loss', 
-                          count: int = 3) -> List[Dict[str, Any]]:
+                          count: int = 3, intensity: Optional[str] = None,
+                          max_duration: Optional[int] = None,
+                          equipment: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
         """
         Get personalized workout recommendations
         
@@ -129,42 +149,25 @@ class WorkoutRecommender:
             user_profile: User demographic data
             goal: Fitness goal (weight_loss, muscle_gain, endurance, flexibility)
             count: Number of recommendations to return
+            intensity: Optional intensity filter (low, moderate, high)
+            max_duration: Optional maximum duration in minutes
+            equipment: Optional list of equipment available to the user
         
         Returns:
-            List of recommended workouts
+            List of recommended workouts, best match first
         """
-        if goal not in self.WORKOUTS:
+        if goal not in GOALS:
             goal = 'weight_loss'
         
-        available_workouts = self.WORKOUTS[goal]
-        
-        # Adjust recommendations based on user profile
-        recommendations = self._adjust_by_profile(available_workouts, user_profile)
-        
-        # Return top recommendations
-        return recommendations[:count]
-    
-    def _adjust_by_profile(self, workouts: List[Dict], profile: Dict[str, Any]) -> List[Dict]:
-        """Adjust workout recommendations based on user profile"""
-        age = profile.get('age', 30)
-        
-        adjusted = []
-        for workout in workouts:
-            adjusted_workout = workout.copy()
-            
-            # Reduce intensity for older users
-            if age > 50 and workout['intensity'] == 'high':
-                adjusted_workout['intensity'] = 'moderate'
-                adjusted_workout['calories'] = int(adjusted_workout['calories'] * 0.8)
-            
-            # Increase challenge for younger users
-            if age < 25 and workout['intensity'] in ['low', 'moderate']:
-                adjusted_workout['intensity'] = 'high'
-                adjusted_workout['calories'] = int(adjusted_workout['calories'] * 1.2)
-            
-            adjusted.append(adjusted_workout)
-        
-        return adjusted
+        # Ranked retrieval with workouts already adjusted for the user's age band
+        return self.catalog.top_k(
+            user_profile,
+            goal,
+            count,
+            intensity=intensity,
+            max_duration=max_duration,
+            equipment=equipment
+        )
     
     def estimate_calories(self, workout_duration: int, intensity: str) -> int:
         """Estimate calories burned during workout"""
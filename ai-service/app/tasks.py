@@ -0,0 +1,170 @@
+"""
+Service Tasks
+Module-level entry points for the CPU-bound service calls.
+
+Every process owns one set of engines created by init_services(). In
+process execution mode each pool worker runs init_services() once as its
+initializer, so only the (picklable) arguments and results of these
+functions cross the process boundary.
+
+With lazy initialization the engine modules are imported and the engines
+(catalogs, indexes, lookup tables) built by load_services() on first use
+or by an explicit warm-up, instead of at startup. With a catalog path the
+workout and meal catalogs are mapped from a compiled file instead of built.
+"""
+
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+import threading
+
+if TYPE_CHECKING:
+    from services.health_analyzer import HealthAnalyzer
+    from services.health_series import HealthSeries
+    from services.meal_recommender import MealRecommender
+    from services.pose_analyzer import PoseAnalyzer
+    from services.workout_recommender import WorkoutRecommender
+
+analyzer: Optional['HealthAnalyzer'] = None
+workout_recommender: Optional['WorkoutRecommender'] = None
+meal_recommender: Optional['MealRecommender'] = None
+pose_analyzer: Optional['PoseAnalyzer'] = None
+
+_settings = {'meal_plan_cache_size': 1024, 'catalog_path': None, 'anomaly_method': 'mad', 'trend_method': 'theilsen'}
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def init_services(
+    meal_plan_cache_size: int = 1024,
+    lazy: bool = False,
+    catalog_path: Optional[str] = None,
+    anomaly_method: str = 'mad',
+    trend_method: str = 'theilsen'
+) -> None:
+    """
+    Configure this process's analysis and recommendation engines
+
+    Args:
+        meal_plan_cache_size: Meal distribution cache entries
+        lazy: Defer building the engines to their first use
+        catalog_path: Compiled catalog file to map (see services.catalogs)
+        anomaly_method: Anomaly detection method of the analyzer ('off' disables it)
+        trend_method: Trend estimation method of the analyzer
+    """
+    _settings['meal_plan_cache_size'] = meal_plan_cache_size
+    _settings['catalog_path'] = catalog_path
+    _settings['anomaly_method'] = anomaly_method
+    _settings['trend_method'] = trend_method
+    if not lazy:
+        load_services()
+
+
+def load_services() -> None:
+    """Import and build the engines unless already done (safe to call from any thread)"""
+    global analyzer, workout_recommender, meal_recommender, pose_analyzer, _loaded
+    if _loaded:
+        return
+
+    with _load_lock:
+        if _loaded:
+            return
+
+        from services.health_analyzer import HealthAnalyzer
+        from services.meal_recommender import MealRecommender
+        from services.pose_analyzer import PoseAnalyzer
+        from services.workout_recommender import WorkoutRecommender
+
+        workout_catalog = meal_catalog = None
+        if _settings['catalog_path']:
+            from services.catalogs import load_catalogs
+            workout_catalog, meal_catalog = load_catalogs(_settings['catalog_path'])
+
+        analyzer = HealthAnalyzer(anomaly_method=_settings['anomaly_method'], trend_method=_settings['trend_method'])
+        workout_recommender = WorkoutRecommender(catalog=workout_catalog)
+        meal_recommender = MealRecommender(cache_size=_settings['meal_plan_cache_size'], catalog=meal_catalog)
+        pose_analyzer = PoseAnalyzer()
+        _loaded = True
+
+
+def warm_up() -> bool:
+    """
+    Build the engines and run each once on a tiny input
+
+    Used as a warm-up step so first requests don't pay one-time costs;
+    in process mode it also starts the pool worker that runs it.
+    """
+    load_services()
+    profile = {'age': 30, 'gender': 'female', 'height': 165.0, 'weight': 60.0}
+    workout_recommender.get_recommendations(profile, 'endurance', 1)
+    meal_recommender.get_meal_plan(profile, 'vegetarian', 1)
+    return True
+
+
+def analyze(health_series: 'HealthSeries', user_profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Health score, recommendations and insights for one user"""
+    load_services()
+    return analyzer.analyze(health_series, user_profile)
+
+
+def analyze_batch(batch: List[Tuple[str, 'HealthSeries', Dict[str, Any]]], details: bool = True) -> Dict[str, Any]:
+    """Analysis for many users; see HealthAnalyzer.analyze_batch"""
+    load_services()
+    return analyzer.analyze_batch(batch, details)
+
+
+def forecast(health_series: 'HealthSeries', days: int) -> Dict[str, Any]:
+    """Projected health score of one user for the next days"""
+    load_services()
+    return analyzer.forecast(health_series, days)
+
+
+def forecast_batch(batch: List[Tuple[str, 'HealthSeries']], days: int) -> Dict[str, Any]:
+    """Forecasts for many users; see HealthAnalyzer.forecast_batch"""
+    load_services()
+    return analyzer.forecast_batch(batch, days)
+
+
+def recommend_workouts(
+    user_profile: Dict[str, Any],
+    goal: str,
+    count: int,
+    intensity: Optional[str] = None,
+    max_duration: Optional[int] = None,
+    equipment: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """Top workouts for a profile and goal"""
+    load_services()
+    return workout_recommender.get_recommendations(
+        user_profile, goal, count,
+        intensity=intensity, max_duration=max_duration, equipment=equipment
+    )
+
+
+def plan_meals(user_profile: Dict[str, Any], diet_type: str, days: int) -> Dict[str, Any]:
+    """Multi-day meal plan for one user"""
+    load_services()
+    return meal_recommender.get_meal_plan(user_profile, diet_type, days)
+
+
+def solve_meal_plan(user_profile: Dict[str, Any], diet_type: str, days: int) -> Tuple[Dict[str, Any], Any]:
+    """Meal plan outline and per-day choices, for streaming; see MealRecommender.solve_meal_plan"""
+    load_services()
+    return meal_recommender.solve_meal_plan(user_profile, diet_type, days)
+
+
+def plan_meals_batch(requests: List[Tuple[Dict[str, Any], str, int]]) -> List[Dict[str, Any]]:
+    """Meal plans for many (profile, diet_type, days) requests"""
+    load_services()
+    return meal_recommender.get_meal_plans(requests)
+
+
+def analyze_pose(
+    frames: Any,
+    exercise: str,
+    min_confidence: Optional[float] = None,
+    include_angles: bool = False
+) -> Dict[str, Any]:
+    """Form analysis for a batch of keypoint frames"""
+    load_services()
+    return pose_analyzer.analyze(
+        frames, exercise, min_confidence=min_confidence, include_angles=include_angles
+    )
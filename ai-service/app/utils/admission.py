@@ -0,0 +1,297 @@
+"""
+Admission Control
+Priority lanes in front of the CPU-bound work.
+
+Requests are sorted into lanes (interactive before bulk) by route; a
+priority header can move a request to a lower lane, never a higher one.
+All lanes share a fixed number of concurrency slots; each lane has its own
+cap, so bulk work can never hold every slot, and its own bounded queue.
+When a slot frees up, the highest-priority waiting request gets it.
+
+Every request carries a deadline: the time the caller is willing to wait,
+from a header or the lane's default. A request that cannot be admitted in
+time to finish before its deadline (judged from the lane's recent service
+time) is shed with 503 instead of being computed for a caller that has
+already given up.
+
+The middleware only classifies requests; a slot is taken when a request
+hands work to the executor (AdmissionController.slot). Cache hits and
+requests coalesced onto an identical computation never queue for one.
+"""
+
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+import asyncio
+import time
+
+from utils.executor import ExecutorBusyError
+from utils.metrics import registry as metrics
+
+# (lane, deadline as time.perf_counter, time budget in seconds) of the request being handled
+_ticket: ContextVar[Optional[Tuple[str, float, float]]] = ContextVar('healthsync_admission_ticket', default=None)
+
+
+class AdmissionRejected(ExecutorBusyError):
+    """Raised when a request is shed instead of admitted"""
+
+    def __init__(self, lane: str, reason: str, message: str):
+        super().__init__(message)
+        self.lane = lane
+        self.reason = reason
+
+
+class Lane:
+    """Concurrency cap, queue and service-time estimate of one priority class"""
+
+    # Weight of the newest request in the service time average
+    SMOOTHING = 0.2
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, deadline: float):
+        """
+        Args:
+            name: Lane name, as selected by route or header
+            concurrency: Slots this lane may hold at once
+            queue_size: Requests allowed to wait for a slot
+            deadline: Default time budget in seconds
+        """
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.deadline = deadline
+        self.running = 0
+        self.waiters: deque = deque()
+        self.service_time = 0.0
+        self.admitted = 0
+        self.queued = 0
+        self.shed = {'queue_full': 0, 'deadline': 0}
+        self.wait_time = 0.0
+
+    def observe(self, seconds: float) -> None:
+        if self.service_time == 0.0:
+            self.service_time = seconds
+        else:
+            self.service_time += self.SMOOTHING * (seconds - self.service_time)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'concurrency': self.concurrency,
+            'queue_size': self.queue_size,
+            'deadline_ms': round(self.deadline * 1000),
+            'running': self.running,
+            'waiting': len(self.waiters),
+            'admitted': self.admitted,
+            'queued': self.queued,
+            'shed': dict(self.shed),
+            'avg_wait_ms': round(self.wait_time / self.admitted * 1000, 3) if self.admitted else 0.0,
+            'service_time_ms': round(self.service_time * 1000, 3),
+        }
+
+
+class AdmissionController:
+    """
+    Shares `capacity` slots between lanes in priority order
+
+    Lanes are given highest priority first. A waiting request of an earlier
+    lane is always admitted before any request of a later one.
+    """
+
+    def __init__(self, capacity: int, lanes: Sequence[Lane], enabled: bool = True):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.lanes = {lane.name: lane for lane in lanes}
+        self.order = list(lanes)
+        self.running = 0
+
+    async def acquire(self, name: str, deadline: float) -> float:
+        """
+        Wait for a slot in a lane
+
+        Args:
+            name: Lane name
+            deadline: time.perf_counter() by which the work must be done
+
+        Returns:
+            Admission time (time.perf_counter) to pass to release()
+
+        Raises:
+            AdmissionRejected: When the lane's queue is full or the request
+                could not finish before its deadline
+        """
+        lane = self.lanes[name]
+        start = time.perf_counter()
+
+        if self.running < self.capacity and lane.running < lane.concurrency and not lane.waiters:
+            return self._admit(lane, start)
+
+        if len(lane.waiters) >= lane.queue_size:
+            raise self._shed(lane, 'queue_full', f"Server busy: {lane.name} queue is full ({lane.queue_size} waiting)")
+        if start + self._expected_wait(lane) + lane.service_time > deadline:
+            raise self._shed(lane, 'deadline', f"Server busy: {lane.name} request cannot finish before its deadline")
+
+        waiter = asyncio.get_running_loop().create_future()
+        lane.waiters.append(waiter)
+        lane.queued += 1
+        try:
+            # Give up early enough to leave time for the work itself
+            await asyncio.wait_for(waiter, max(0.0, deadline - time.perf_counter() - lane.service_time))
+        except asyncio.TimeoutError:
+            self._discard(lane, waiter)
+            raise self._shed(lane, 'deadline', f"Server busy: {lane.name} request timed out waiting for a slot")
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Admitted just as the caller went away: pass the slot on
+                self._leave(lane)
+            else:
+                self._discard(lane, waiter)
+            raise
+
+        lane.wait_time += time.perf_counter() - start
+        return time.perf_counter()
+
+    def release(self, name: str, admitted_at: float) -> None:
+        """Free a slot and hand it to the next waiting request"""
+        lane = self.lanes[name]
+        lane.observe(time.perf_counter() - admitted_at)
+        self._leave(lane)
+
+    @asynccontextmanager
+    async def slot(self, renew: bool = False):
+        """
+        Hold a slot of the current request's lane
+
+        A no-op outside a classified request or when admission is disabled.
+
+        Args:
+            renew: Measure the deadline from now rather than from the
+                request's arrival, for each chunk of a streamed response
+        """
+        ticket = _ticket.get()
+        if ticket is None or not self.enabled:
+            yield
+            return
+
+        name, deadline, budget = ticket
+        if renew:
+            deadline = time.perf_counter() + budget
+        admitted_at = await self.acquire(name, deadline)
+        try:
+            yield
+        finally:
+            self.release(name, admitted_at)
+
+    def lane_for(self, requested: Optional[str], default: Optional[str]) -> Optional[str]:
+        """
+        Lane from a priority header value, else the route's default
+
+        The header can only lower a request's priority: a lane ahead of the
+        route's default is ignored, so callers can't move bulk work into
+        the interactive lane.
+        """
+        requested = requested.lower() if requested else None
+        if requested not in self.lanes:
+            return default
+        if default in self.lanes and self.order.index(self.lanes[requested]) < self.order.index(self.lanes[default]):
+            return default
+        return requested
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'enabled': self.enabled,
+            'capacity': self.capacity,
+            'running': self.running,
+            'lanes': {lane.name: lane.stats() for lane in self.order},
+        }
+
+    def _admit(self, lane: Lane, now: float) -> float:
+        lane.running += 1
+        lane.admitted += 1
+        self.running += 1
+        return now
+
+    def _leave(self, lane: Lane) -> None:
+        lane.running -= 1
+        self.running -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Fill free slots from the queues, highest priority first"""
+        for lane in self.order:
+            while lane.waiters and self.running < self.capacity and lane.running < lane.concurrency:
+                waiter = lane.waiters.popleft()
+                if waiter.done():
+                    continue
+                self._admit(lane, time.perf_counter())
+                waiter.set_result(None)
+
+    def _discard(self, lane: Lane, waiter: asyncio.Future) -> None:
+        try:
+            lane.waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _expected_wait(self, lane: Lane) -> float:
+        """Rough queueing delay: requests ahead in this and higher lanes over the lane's slots"""
+        ahead = 0
+        for other in self.order:
+            ahead += len(other.waiters)
+            if other is lane:
+                break
+        slots = max(1, min(lane.concurrency, self.capacity))
+        return (ahead + 1) * lane.service_time / slots
+
+    def _shed(self, lane: Lane, reason: str, message: str) -> AdmissionRejected:
+        lane.shed[reason] += 1
+        if metrics.enabled:
+            metrics.admission_shed.inc((lane.name, reason))
+        return AdmissionRejected(lane.name, reason, message)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware assigning HTTP requests a lane and a deadline
+
+    Only paths listed in `routes` (path -> default lane) are classified;
+    everything else, such as /health and /metrics, passes straight through.
+    """
+
+    def __init__(
+        self,
+        app: Callable,
+        controller: AdmissionController,
+        routes: Dict[str, str],
+        priority_header: str = 'X-Priority',
+        deadline_header: str = 'X-Deadline-Ms'
+    ):
+        self.app = app
+        self.controller = controller
+        self.routes = routes
+        self.priority_header = priority_header.lower().encode()
+        self.deadline_header = deadline_header.lower().encode()
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope['type'] != 'http' or not self.controller.enabled or scope['path'] not in self.routes:
+            await self.app(scope, receive, send)
+            return
+
+        requested = None
+        budget = None
+        for key, value in scope['headers']:
+            if key == self.priority_header:
+                requested = value.decode('latin-1')
+            elif key == self.deadline_header:
+                try:
+                    budget = max(0.0, float(value) / 1000)
+                except ValueError:
+                    pass
+
+        lane = self.controller.lane_for(requested, self.routes[scope['path']])
+        if budget is None:
+            budget = self.controller.lanes[lane].deadline
+
+        token = _ticket.set((lane, time.perf_counter() + budget, budget))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _ticket.reset(token)
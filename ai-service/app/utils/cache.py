@@ -0,0 +1,233 @@
+"""
+Result Cache
+Pluggable cache for computed results: a bounded in-process LRU with TTL,
+or any Redis-compatible server when several workers share one cache.
+"""
+
+from typing import Any, Dict, Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(namespace: str, *parts: Any) -> str:
+    """
+    Stable key for a computation's inputs
+
+    Parts are serialized as canonical JSON (sorted keys, no whitespace) and
+    bytes are hashed as-is, so equal inputs always map to the same key
+    across processes.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, (bytes, bytearray, memoryview)):
+            digest.update(part)
+        else:
+            digest.update(json.dumps(part, sort_keys=True, separators=(',', ':'), default=str).encode())
+        digest.update(b'\x00')
+    return f"{namespace}:{digest.hexdigest()}"
+
+
+class CacheBackend(ABC):
+    """Interface shared by cache backends"""
+
+    name = 'base'
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        """Store a value"""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop all entries"""
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """get() for use on the event loop"""
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """set() for use on the event loop"""
+        self.set(key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class LRUCache(CacheBackend):
+    """
+    In-process LRU cache with an optional time-to-live.
+    Values are stored by reference and must be treated as read-only.
+    """
+
+    name = 'memory'
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            max_size: Maximum number of entries before the least recently used is evicted
+            ttl: Seconds an entry stays valid (None for no expiry)
+        """
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats['size'] = len(self)
+        stats['max_size'] = self.max_size
+        stats['ttl'] = self.ttl
+        return stats
+
+
+class RedisCache(CacheBackend):
+    """
+    Cache backed by a Redis-compatible server (Redis, Valkey, KeyDB, ...).
+    Size bounds and LRU eviction are delegated to the server's maxmemory policy;
+    TTL is applied per key (in milliseconds). Values are stored as JSON.
+
+    A server that can't be reached is never fatal: failed lookups count as
+    misses and failed writes are skipped, and both are logged. The async
+    methods run the blocking client calls in a worker thread.
+    """
+
+    name = 'redis'
+
+    def __init__(self, client: Any, ttl: Optional[float] = None, prefix: str = 'healthsync:'):
+        """
+        Args:
+            client: Client exposing get/set(px=)/scan_iter/delete, e.g. redis.Redis
+            ttl: Seconds an entry stays valid (None for no expiry)
+            prefix: Namespace for keys written by this cache
+        """
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.errors = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            raw = self.client.get(self.prefix + key)
+            value = json.loads(raw) if raw is not None else None
+        except Exception as e:
+            # Connection, timeout or corrupt entry: served as a miss
+            self.errors += 1
+            logger.warning("Result cache lookup failed: %s", e)
+            raw = value = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        # Milliseconds, rounded up, so a sub-second TTL never becomes 0
+        expiry = math.ceil(self.ttl * 1000) if self.ttl else None
+        try:
+            self.client.set(self.prefix + key, json.dumps(value, separators=(',', ':')), px=expiry)
+        except Exception as e:
+            self.errors += 1
+            logger.warning("Result cache write skipped: %s", e)
+
+    def clear(self) -> None:
+        for key in self.client.scan_iter(match=self.prefix + '*'):
+            self.client.delete(key)
+
+    async def aget(self, key: str) -> Optional[Any]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        await asyncio.to_thread(self.set, key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        # No entry count: counting keys would scan the server's whole keyspace
+        stats = super().stats()
+        stats['ttl'] = self.ttl
+        stats['errors'] = self.errors
+        return stats
+
+
+def create_cache(url: str = '', max_size: int = 1024, ttl: Optional[float] = None) -> CacheBackend:
+    """
+    Build a cache backend from configuration
+
+    Args:
+        url: Empty for the in-process LRU, or a redis:// / rediss:// URL
+        max_size: Entry limit for the in-process LRU
+        ttl: Seconds an entry stays valid (None for no expiry)
+    """
+    if not url:
+        return LRUCache(max_size=max_size, ttl=ttl)
+
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("The 'redis' package is required for a shared result cache")
+        return RedisCache(redis.Redis.from_url(url), ttl=ttl)
+
+    raise ValueError(f"Unsupported cache URL: {url}")
@@ -0,0 +1,145 @@
+"""
+Work Executor
+Runs CPU-bound service calls off the event loop in a bounded thread or
+process pool, with backpressure when too much work is queued.
+"""
+
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import asyncio
+import contextvars
+import functools
+import os
+
+from utils.profiling import active_session, profile_call
+
+
+def _noop() -> None:
+    """Picklable no-op used to start pool workers"""
+
+
+class ExecutorBusyError(Exception):
+    """Raised when the executor's queue is full and new work is rejected"""
+
+    status_code = 503
+
+
+class WorkExecutor:
+    """
+    Executes functions according to a configurable mode:
+
+        inline  - call directly on the event loop (no offloading)
+        thread  - run in a ThreadPoolExecutor
+        process - run in a ProcessPoolExecutor; functions and arguments
+                  must be picklable (use the module-level functions in tasks.py)
+
+    At most max_workers calls run at once and at most max_queue more wait
+    for a worker; anything beyond that is rejected with ExecutorBusyError.
+    """
+
+    MODES = ('inline', 'thread', 'process')
+
+    def __init__(
+        self,
+        mode: str = 'inline',
+        max_workers: Optional[int] = None,
+        max_queue: int = 64,
+        initializer: Optional[Callable] = None,
+        initargs: tuple = ()
+    ):
+        """
+        Args:
+            mode: One of MODES
+            max_workers: Pool size (defaults to the CPU count)
+            max_queue: Calls allowed to wait for a free worker
+            initializer: Called once in every process-pool worker
+            initargs: Arguments for initializer
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown execution mode: {mode} (expected one of {', '.join(self.MODES)})")
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+        if mode == 'thread':
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='healthsync-worker')
+        elif mode == 'process':
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=initializer, initargs=initargs
+            )
+        else:
+            self._pool = None
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        Run fn(*args) according to the execution mode
+
+        Raises:
+            ExecutorBusyError: When max_workers + max_queue calls are already pending
+        """
+        if self._pool is None:
+            self.completed += 1
+            return fn(*args)
+
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusyError(
+                f"Server busy: {self.pending} tasks pending (limit {self.max_workers + self.max_queue})"
+            )
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            
+            # Profile the call in the worker when the current request is profiled
+            session = active_session()
+            if session is not None:
+                fn, args = profile_call, (fn, *args)
+            
+            if self.mode == 'thread':
+                # Carry context variables (e.g. the request being timed) into the worker thread
+                call = functools.partial(contextvars.copy_context().run, fn, *args)
+            else:
+                call = functools.partial(fn, *args)
+            result = await loop.run_in_executor(self._pool, call)
+            
+            if session is not None:
+                result, stats = result
+                session.add_worker_stats(stats)
+            return result
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def warm_up(self, fn: Optional[Callable] = None) -> None:
+        """
+        Start every pool worker now instead of on first use
+
+        Submits fn (or a no-op) once per worker and waits for the calls to
+        finish; blocking, so call it from a background thread.
+        """
+        if self._pool is None:
+            return
+        futures = [self._pool.submit(fn or _noop) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        """Current load and counters"""
+        return {
+            'mode': self.mode,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'pending': self.pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,163 @@
+"""
+Packed Store
+Read-only NumPy arrays in one binary file, opened with mmap.
+
+Layout: an 8-byte magic, a little-endian uint32 header length and a JSON
+header ({"meta": {...}, "sections": {name: {dtype, shape, offset}}}),
+followed by the raw little-endian arrays, each aligned to ALIGNMENT bytes.
+Opening a file maps it read-only and returns zero-copy array views, so every
+process that opens the same file shares one copy of its pages through the
+OS page cache.
+
+Strings are stored as a StringTable: one UTF-8 blob plus an offsets array.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'HSPACK01'
+ALIGNMENT = 64
+
+
+class StringTable:
+    """Strings packed into one UTF-8 blob; string i is blob[offsets[i]:offsets[i + 1]]"""
+
+    def __init__(self, offsets: np.ndarray, blob: np.ndarray):
+        self.offsets = offsets
+        self.blob = blob
+
+    @classmethod
+    def build(cls, strings: Iterable[str]) -> 'StringTable':
+        encoded = [string.encode('utf-8') for string in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.blob[int(self.offsets[index]):int(self.offsets[index + 1])].tobytes().decode('utf-8')
+
+    def sections(self, prefix: str) -> Dict[str, np.ndarray]:
+        return {f"{prefix}.offsets": self.offsets, f"{prefix}.blob": self.blob}
+
+    @classmethod
+    def from_sections(cls, sections: Dict[str, np.ndarray], prefix: str) -> 'StringTable':
+        return cls(sections[f"{prefix}.offsets"], sections[f"{prefix}.blob"])
+
+
+class StringPool:
+    """Deduplicating builder for a StringTable"""
+
+    def __init__(self):
+        self._ids: Dict[str, int] = {}
+
+    def add(self, string: str) -> int:
+        """Id of a string, adding it if new"""
+        index = self._ids.get(string)
+        if index is None:
+            index = self._ids[string] = len(self._ids)
+        return index
+
+    def table(self) -> StringTable:
+        return StringTable.build(self._ids)
+
+
+def pack_ragged(lists: List[List[int]], dtype: Any = np.uint32) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Store a list of int lists as (offsets, values)
+
+    List i is values[offsets[i]:offsets[i + 1]].
+    """
+    offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+    np.cumsum([len(items) for items in lists], out=offsets[1:])
+    values = np.fromiter((item for items in lists for item in items), dtype=dtype, count=int(offsets[-1]))
+    return offsets, values
+
+
+class PackedFile:
+    """An opened packed file: read-only array views over one shared mapping"""
+
+    def __init__(self, path: str, meta: Dict[str, Any], sections: Dict[str, np.ndarray], mapping: mmap.mmap):
+        self.path = path
+        self.meta = meta
+        self.sections = sections
+        self._mapping = mapping
+
+    @property
+    def size(self) -> int:
+        return len(self._mapping)
+
+
+def write_packed(path: str, sections: Dict[str, np.ndarray], meta: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Write arrays to a packed file
+
+    Args:
+        path: Output file; written to a temporary name and renamed into place
+        sections: Section name -> array (any numeric dtype)
+        meta: JSON-serializable metadata stored in the header
+
+    Returns:
+        File size in bytes
+    """
+    arrays = {name: np.ascontiguousarray(array, dtype=array.dtype.newbyteorder('<'))
+              for name, array in sections.items()}
+
+    # Section offsets are relative to the aligned end of the header
+    layout = {}
+    position = 0
+    for name, array in arrays.items():
+        position = _align(position)
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': position}
+        position += array.nbytes
+
+    header = json.dumps({'meta': meta or {}, 'sections': layout}, separators=(',', ':')).encode()
+    base = _align(len(MAGIC) + 4 + len(header))
+
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as out:
+        out.write(MAGIC)
+        out.write(struct.pack('<I', len(header)))
+        out.write(header)
+        for name, array in arrays.items():
+            out.write(b'\x00' * (base + layout[name]['offset'] - out.tell()))
+            out.write(array.tobytes())
+        size = out.tell()
+    os.replace(temporary, path)
+    return size
+
+
+def open_packed(path: str) -> PackedFile:
+    """
+    Map a packed file read-only
+
+    Raises:
+        ValueError: When the file is not a packed file
+    """
+    with open(path, 'rb') as source:
+        if source.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a packed file")
+        header_length, = struct.unpack('<I', source.read(4))
+        header = json.loads(source.read(header_length))
+        mapping = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ)
+
+    base = _align(len(MAGIC) + 4 + header_length)
+    sections = {}
+    for name, entry in header['sections'].items():
+        dtype = np.dtype(entry['dtype'])
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        array = np.frombuffer(mapping, dtype=dtype, count=count, offset=base + entry['offset'])
+        sections[name] = array.reshape(entry['shape'])
+
+    return PackedFile(path, header['meta'], sections, mapping)
+
+
+def _align(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
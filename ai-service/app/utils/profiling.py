@@ -0,0 +1,291 @@
+"""
+Request Profiling
+Opt-in cProfile capture of individual requests, triggered by a request
+header carrying a token or by random sampling. Each profile is written to a
+local directory as a .prof file (readable with pstats or snakeviz), and a
+summary of the hottest functions of recent profiles is kept in memory.
+
+The profiler only runs while the request's own handler code runs: it is
+switched off whenever the handler awaits, so coroutines of other requests
+that run on the event loop meanwhile are not counted. Work the executor
+sends to a thread or process pool is profiled in the worker and merged into
+the request's profile. Requests that are not profiled only pay for a header
+lookup (and a random draw when sampling is on).
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+import asyncio
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import re
+import threading
+import time
+
+from fastapi.routing import APIRoute
+
+
+class ProfileSession:
+    """Profile of one request, plus stats collected in pool workers"""
+
+    def __init__(self, route: str):
+        self.route = route
+        self.profile = cProfile.Profile()
+        self.worker_stats: List[dict] = []
+
+    def add_worker_stats(self, stats: dict) -> None:
+        if stats:
+            self.worker_stats.append(stats)
+
+    def stats(self) -> pstats.Stats:
+        stats = pstats.Stats(self.profile)
+        for worker_stats in self.worker_stats:
+            stats.add(_RawStats(worker_stats))
+        return stats
+
+
+class _RawStats:
+    """Adapter letting pstats.Stats.add() load a plain stats dict"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+_current_session: ContextVar[Optional[ProfileSession]] = ContextVar('healthsync_profile_session', default=None)
+
+
+def active_session() -> Optional[ProfileSession]:
+    """Profile session of the current request, if it is being profiled"""
+    return _current_session.get()
+
+
+class _ProfiledCoroutine:
+    """
+    Awaitable driving a coroutine with the profiler on only during its steps
+
+    Each step is the handler's synchronous code up to its next await; while
+    it is suspended, the event loop runs other tasks unprofiled.
+    """
+
+    def __init__(self, coroutine: Any, profile: cProfile.Profile):
+        self.coroutine = coroutine
+        self.profile = profile
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            self.profile.enable()
+            try:
+                if error is not None:
+                    pending = self.coroutine.throw(error)
+                else:
+                    pending = self.coroutine.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.profile.disable()
+
+            try:
+                value, error = (yield pending), None
+            except GeneratorExit:
+                self.coroutine.close()
+                raise
+            except BaseException as e:
+                value, error = None, e
+
+
+def profile_call(fn: Callable, *args: Any) -> Tuple[Any, dict]:
+    """
+    Run fn(*args) under its own profiler
+
+    Module-level so it can be sent to a process pool. Returns the result
+    and the raw pstats dict for merging into the request's profile.
+    """
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler already covers this thread (Python 3.12+ profiles
+        # all threads from one tool); its profile includes this call
+        return fn(*args), {}
+    try:
+        result = fn(*args)
+    finally:
+        profile.disable()
+    profile.create_stats()
+    return result, profile.stats
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their profiles"""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        directory: str = './profiles',
+        sample_rate: float = 0.0,
+        header: str = 'X-Profile',
+        token: str = '',
+        keep: int = 50,
+        top: int = 25
+    ):
+        """
+        Args:
+            enabled: Master switch; when off no request is ever profiled
+            directory: Where .prof files are written
+            sample_rate: Fraction of requests profiled without the header (0-1)
+            header: Request header that asks for a profile
+            token: Value the header must carry; when empty the header is
+                ignored and only sampled requests are profiled
+            keep: Number of recent profiles (files and summaries) to keep
+            top: Functions kept per profile summary
+        """
+        self.enabled = enabled
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.header = header.lower()
+        self.token = token
+        self.keep = keep
+        self.top = top
+        self.skipped = 0
+        self._recent = deque(maxlen=keep)
+        self._files = deque()
+        # One request is profiled (and its file written) at a time
+        self._busy = threading.Lock()
+
+    def wants_profile(self, headers: Any) -> bool:
+        """Whether a request with these headers should be profiled"""
+        value = headers.get(self.header)
+        if value is not None and self.token:
+            return hmac.compare_digest(value.encode(), self.token.encode())
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def route_class(self, base: type = APIRoute, routes: Optional[List[str]] = None) -> type:
+        """
+        APIRoute subclass profiling requests to the given route paths
+
+        Args:
+            base: Route class to extend (e.g. an instrumented route class)
+            routes: Route paths that may be profiled (None for all routes)
+        """
+        profiler = self
+        allowed = set(routes) if routes is not None else None
+
+        class ProfiledRoute(base):
+            def get_route_handler(self) -> Callable:
+                handler = super().get_route_handler()
+                route = self.path
+                if not profiler.enabled or (allowed is not None and route not in allowed):
+                    return handler
+
+                async def profiled_handler(request):
+                    if not profiler.wants_profile(request.headers):
+                        return await handler(request)
+                    return await profiler._profile(route, handler, request)
+
+                return profiled_handler
+
+        return ProfiledRoute
+
+    async def _profile(self, route: str, handler: Callable, request: Any):
+        if not self._busy.acquire(blocking=False):
+            self.skipped += 1
+            return await handler(request)
+
+        try:
+            session = ProfileSession(route)
+            token = _current_session.set(session)
+            start = time.perf_counter()
+            try:
+                response = await _ProfiledCoroutine(handler(request), session.profile)
+            finally:
+                _current_session.reset(token)
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # Stats aggregation and the file write stay off the event loop
+            profile_id = await asyncio.to_thread(self._save, session, elapsed_ms)
+        finally:
+            self._busy.release()
+
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    def _save(self, session: ProfileSession, elapsed_ms: float) -> str:
+        stats = session.stats()
+        timestamp = datetime.now()
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', session.route).strip('_') or 'root'
+        profile_id = f"{timestamp.strftime('%Y%m%dT%H%M%S%f')}-{slug}-{elapsed_ms:.0f}ms"
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{profile_id}.prof")
+        stats.dump_stats(path)
+        self._files.append(path)
+        while len(self._files) > self.keep:
+            try:
+                os.remove(self._files.popleft())
+            except OSError:
+                pass
+
+        self._recent.append({
+            'id': profile_id,
+            'route': session.route,
+            'durationMs': round(elapsed_ms, 3),
+            'timestamp': timestamp.isoformat(),
+            'workerCalls': len(session.worker_stats),
+            'functions': self._summarize(stats),
+        })
+        return profile_id
+
+    def _summarize(self, stats: pstats.Stats) -> Dict[str, Tuple[int, float, float]]:
+        """Top functions by own time: name -> (calls, tottime, cumtime)"""
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+        return {
+            pstats.func_std_string(func): (calls, tottime, cumtime)
+            for func, (_, calls, tottime, cumtime, _) in rows
+        }
+
+    def recent(self, limit: int = 20, route: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Recent profiles and their hottest functions
+
+        Functions are aggregated over the selected profiles and ranked by
+        total own time.
+        """
+        profiles = [item for item in self._recent if route is None or item['route'] == route][-limit:]
+
+        totals: Dict[str, List[float]] = {}
+        for item in profiles:
+            for name, (calls, tottime, cumtime) in item['functions'].items():
+                total = totals.setdefault(name, [0, 0.0, 0.0, 0])
+                total[0] += calls
+                total[1] += tottime
+                total[2] += cumtime
+                total[3] += 1
+
+        hot = sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:self.top]
+
+        return {
+            'profiles': [
+                {key: value for key, value in item.items() if key != 'functions'}
+                for item in reversed(profiles)
+            ],
+            'hotFunctions': [
+                {
+                    'function': name,
+                    'calls': int(calls),
+                    'tottimeMs': round(tottime * 1000, 3),
+                    'cumtimeMs': round(cumtime * 1000, 3),
+                    'profiles': int(seen),
+                }
+                for name, (calls, tottime, cumtime, seen) in hot
+            ],
+            'skipped': self.skipped,
+        }
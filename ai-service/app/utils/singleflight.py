@@ -0,0 +1,75 @@
+"""
+Request Coalescing
+Single-flight execution of identical concurrent computations.
+
+When several requests with the same key arrive while the first is still
+being computed, they wait on that computation and share its result instead
+of starting their own. Results are not kept once the computation finishes;
+the result cache covers repeat requests that arrive later.
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+
+from utils.metrics import registry as metrics
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key onto one computation"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._flights: Dict[str, asyncio.Future] = {}
+        self._leaders: Dict[str, int] = {}
+        self._coalesced: Dict[str, int] = {}
+
+    async def run(self, group: str, key: str, fn: Callable[..., Awaitable[Any]], *args: Any) -> Any:
+        """
+        Await fn(*args), sharing it with concurrent calls for the same key
+
+        Args:
+            group: Counter label (e.g. the kind of computation)
+            key: Content key of the computation's inputs
+            fn: Coroutine function doing the work
+
+        Returns:
+            The result of fn; an exception raised by fn is raised to every
+            waiting caller
+        """
+        if not self.enabled:
+            return await fn(*args)
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._coalesced[group] = self._coalesced.get(group, 0) + 1
+            if metrics.enabled:
+                metrics.coalesced.inc((group,))
+            return await asyncio.shield(flight)
+
+        self._leaders[group] = self._leaders.get(group, 0) + 1
+        # A task, so a disconnecting first caller doesn't cancel the others
+        flight = asyncio.ensure_future(fn(*args))
+        self._flights[key] = flight
+        flight.add_done_callback(lambda done: self._land(key, done))
+        return await asyncio.shield(flight)
+
+    def _land(self, key: str, flight: asyncio.Future) -> None:
+        self._flights.pop(key, None)
+        # Mark the exception retrieved even if every caller has gone away
+        if not flight.cancelled():
+            flight.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Computations started and requests coalesced, per group"""
+        groups = sorted(set(self._leaders) | set(self._coalesced))
+        return {
+            'enabled': self.enabled,
+            'in_flight': len(self._flights),
+            'groups': {
+                group: {
+                    'computed': self._leaders.get(group, 0),
+                    'coalesced': self._coalesced.get(group, 0),
+                }
+                for group in groups
+            },
+        }
@@ -0,0 +1,233 @@
+"""
+Startup Timing
+Import, initialization and time-to-first-response measurements for one
+API process.
+
+ImportTimer hooks the import system while the app module loads and
+records each module's own and inclusive import time. StartupReport adds
+named initialization phases, the state of the background warm-up and the
+time from process start until the first response of each route, and is
+served on /api/startup.
+"""
+
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+import os
+import sys
+import threading
+import time
+
+
+def _process_age() -> Optional[float]:
+    """Seconds since this process started (Linux /proc), or None"""
+    try:
+        with open('/proc/self/stat') as stat_file:
+            # Fields after the parenthesized command name; starttime is field 22
+            fields = stat_file.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime') as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+        return max(0.0, uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _TimedLoader:
+    """Wraps a module loader to time exec_module; unwrapped once the module is loaded"""
+
+    def __init__(self, loader: Any, timer: 'ImportTimer'):
+        self._loader = loader
+        self._timer = timer
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        timer = self._timer
+        start = time.perf_counter()
+        timer._children.append(0.0)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = timer._children.pop()
+            if timer._children:
+                timer._children[-1] += elapsed
+            timer.timings[module.__name__] = (elapsed, elapsed - children)
+
+            # Leave the module with its real loader
+            module.__loader__ = self._loader
+            if getattr(module, '__spec__', None) is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportTimer:
+    """Meta path finder recording (inclusive, self) import seconds per module"""
+
+    def __init__(self):
+        self.timings: Dict[str, tuple] = {}
+        self._children: List[float] = []
+        self._thread: Optional[int] = None
+
+    def install(self) -> None:
+        if self not in sys.meta_path:
+            self._thread = threading.get_ident()
+            sys.meta_path.insert(0, self)
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path=None, target=None):
+        # Only time imports made by the thread loading the app
+        if threading.get_ident() != self._thread:
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def packages(self) -> Dict[str, float]:
+        """Import seconds per top-level package (sum of its modules' own time)"""
+        totals: Dict[str, float] = {}
+        for name, (_, own) in self.timings.items():
+            package = name.split('.', 1)[0]
+            totals[package] = totals.get(package, 0.0) + own
+        return totals
+
+
+class StartupReport:
+    """Startup phases and time to first response of one process"""
+
+    # Distinct paths recorded (paths with IDs would otherwise grow the table)
+    MAX_PATHS = 100
+
+    def __init__(self):
+        self.created = time.perf_counter()
+        self.age_at_creation = _process_age()
+        self.imports = ImportTimer()
+        self.import_seconds: Optional[float] = None
+        self.phases: Dict[str, float] = {}
+        self.first_responses: Dict[str, float] = {}
+        self.warmup: Dict[str, Any] = {'state': 'not started'}
+        self._import_start: Optional[float] = None
+
+    def start_imports(self) -> None:
+        """Begin timing imports (call before the app's own imports)"""
+        self._import_start = time.perf_counter()
+        self.imports.install()
+
+    def stop_imports(self) -> None:
+        """Stop timing imports; the app module has finished loading"""
+        self.imports.uninstall()
+        if self._import_start is not None:
+            self.import_seconds = time.perf_counter() - self._import_start
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time one initialization step"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def since_start(self) -> float:
+        """Seconds since process start (since this module loaded if unknown)"""
+        return (self.age_at_creation or 0.0) + time.perf_counter() - self.created
+
+    def observe_response(self, path: str) -> None:
+        if path not in self.first_responses and len(self.first_responses) < self.MAX_PATHS:
+            self.first_responses[path] = self.since_start()
+
+    def start_warmup(self, steps: List[tuple]) -> threading.Thread:
+        """
+        Run (name, fn) warm-up steps in a background thread
+
+        Each step is timed as phase 'warmup:<name>'; a failing step is
+        recorded and the remaining steps still run.
+        """
+        def run():
+            self.warmup = {'state': 'running'}
+            start = time.perf_counter()
+            errors = {}
+            for name, fn in steps:
+                try:
+                    with self.phase(f"warmup:{name}"):
+                        fn()
+                except Exception as e:
+                    errors[name] = str(e)
+            self.warmup = {
+                'state': 'failed' if errors else 'done',
+                'ms': round((time.perf_counter() - start) * 1000, 1),
+                'finished_after_start_ms': round(self.since_start() * 1000, 1),
+            }
+            if errors:
+                self.warmup['errors'] = errors
+
+        thread = threading.Thread(target=run, name='healthsync-warmup', daemon=True)
+        thread.start()
+        return thread
+
+    def report(self, top: int = 20) -> Dict[str, Any]:
+        """Startup timings in milliseconds"""
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 2) if seconds is not None else None
+
+        before_app = None
+        if self.age_at_creation is not None and self._import_start is not None:
+            before_app = self.age_at_creation + self._import_start - self.created
+
+        slowest = sorted(self.imports.timings.items(), key=lambda item: -item[1][1])[:top]
+        packages = sorted(self.imports.packages().items(), key=lambda item: -item[1])[:top]
+        return {
+            'process_start_known': self.age_at_creation is not None,
+            'before_app_import_ms': ms(before_app),
+            'app_import_ms': ms(self.import_seconds),
+            'import_packages_ms': {name: ms(seconds) for name, seconds in packages},
+            'slowest_modules': [
+                {'module': name, 'self_ms': ms(own), 'total_ms': ms(total)}
+                for name, (total, own) in slowest
+            ],
+            'phases_ms': {name: ms(seconds) for name, seconds in self.phases.items()},
+            'warmup': self.warmup,
+            'first_response_after_start_ms': {
+                path: ms(seconds) for path, seconds in sorted(self.first_responses.items(), key=lambda item: item[1])
+            },
+        }
+
+
+class StartupMiddleware:
+    """ASGI middleware recording when each path first sends a response"""
+
+    def __init__(self, app: Callable, report: StartupReport):
+        self.app = app
+        self.report = report
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        path = scope.get('path')
+        if (scope['type'] != 'http' or path in self.report.first_responses
+                or len(self.report.first_responses) >= self.report.MAX_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_observed(message):
+            if message['type'] == 'http.response.start':
+                self.report.observe_response(path)
+            await send(message)
+
+        await self.app(scope, receive, send_observed)
+
+
+startup = StartupReport()
@@ -0,0 +1,227 @@
+"""
+Streaming Responses
+NDJSON responses written while they are computed.
+
+A route hands ndjson_response() an async generator that yields groups of
+records (lists of dicts); every group is encoded and sent as one chunk, so
+the server only ever holds the group in progress and the client can start
+on the first records while later ones are still being computed.
+
+The first group is produced before the response starts. Errors up to that
+point (a busy executor, an invalid request) still become ordinary HTTP
+error responses. Once the status line is sent, an exception ends the stream
+with a final record built by `on_error`. Streams always end with such a
+closing record, so a client that sees none knows the connection was cut.
+"""
+
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Mapping, Optional, Union
+import codecs
+import json
+
+from fastapi.responses import StreamingResponse
+
+from utils.responses import dumps
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+def iter_ndjson(body: Union[bytes, bytearray]) -> Iterator[Any]:
+    """
+    Decode an NDJSON body one line at a time
+
+    Blank lines are skipped; a line that is not valid JSON yields None so
+    the caller can report it in place.
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    start = 0
+    while start < len(body):
+        end = body.find(b'\n', start)
+        if end < 0:
+            end = len(body)
+        line = body[start:end]
+        start = end + 1
+        if not line.strip():
+            continue
+        try:
+            yield loads(line)
+        except ValueError:
+            yield None
+
+
+def loads(body: Union[bytes, bytearray]) -> Any:
+    """
+    Decode a JSON body with orjson when it is installed
+
+    What orjson refuses but json accepts (NaN and Infinity literals, numbers
+    beyond float range, lone surrogates) is decoded by json, so the same
+    bodies are accepted as by json.loads; a body neither accepts raises
+    json.JSONDecodeError. orjson returns integers beyond 64 bits as floats.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(body)
+
+
+async def read_body(request: Any) -> bytearray:
+    """
+    Request body in one growing buffer
+
+    Request.body() joins the received chunks into a new bytes object, which
+    briefly holds the body twice.
+    """
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+    return body
+
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _TextWindow:
+    """Decoded text of a UTF-8 body, WINDOW bytes at a time from the current position on"""
+
+    WINDOW = 1 << 20
+
+    def __init__(self, body: Union[bytes, bytearray]):
+        self.body = body
+        self.offset = 0
+        self.text = ''
+        self.position = 0
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    def more(self) -> bool:
+        """Extend the window; False at the end of the body"""
+        if self.offset >= len(self.body):
+            return False
+        chunk = self.body[self.offset:self.offset + self.WINDOW]
+        self.offset += len(chunk)
+        self.text = self.text[self.position:] + self._utf8.decode(chunk, final=self.offset >= len(self.body))
+        self.position = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at the end)"""
+        while True:
+            text = self.text
+            position = self.position
+            while position < len(text) and text[position] in _WHITESPACE:
+                position += 1
+            self.position = position
+            if position < len(text):
+                return text[position]
+            if not self.more():
+                return ''
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at byte {self.offset - len(self.text[self.position:].encode())}")
+        self.position += 1
+
+    def value(self) -> Any:
+        """Decode the next JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.text, self.position)
+            except json.JSONDecodeError:
+                # Possibly cut off by the window
+                if self.more():
+                    continue
+                raise
+            if end == len(self.text) and self.more():
+                # A number may continue past the window
+                continue
+            self.position = end
+            return value
+
+
+def iter_json_array(body: Union[bytes, bytearray], key: str) -> Iterator[Any]:
+    """
+    Decode the items of one array member of a JSON object one at a time
+
+    Only the current item is held as Python objects, rather than the whole
+    document as with json.loads, and the body is decoded to text a window
+    at a time. Other members are decoded and dropped.
+
+    Raises:
+        ValueError: When the body is not a JSON object, or `key` is missing
+            or not an array (raised during iteration)
+    """
+    window = _TextWindow(body)
+    window.expect('{')
+    while True:
+        if window.peek() == '}':
+            raise ValueError(f"Field required: {key}")
+        name = window.value()
+        window.expect(':')
+        if name != key:
+            window.value()
+            if window.peek() == ',':
+                window.position += 1
+            continue
+
+        window.expect('[')
+        if window.peek() == ']':
+            return
+        while True:
+            yield window.value()
+            if window.peek() == ',':
+                window.position += 1
+                continue
+            window.expect(']')
+            return
+
+
+def encode_records(records: List[Dict[str, Any]]) -> bytes:
+    """NDJSON bytes, one line per record"""
+    return b''.join(dumps(record) + b'\n' for record in records)
+
+
+async def ndjson_response(
+    groups: AsyncIterator[List[Dict[str, Any]]],
+    on_error: Callable[[Exception], Dict[str, Any]],
+    headers: Optional[Mapping[str, str]] = None
+) -> StreamingResponse:
+    """
+    Stream record groups as NDJSON
+
+    Args:
+        groups: Async generator of record lists, each sent as one chunk
+        on_error: Closing record for an exception raised mid-stream
+        headers: Extra response headers
+
+    Returns:
+        A StreamingResponse; exceptions raised while producing the first
+        group propagate to the caller instead
+    """
+    try:
+        first = await groups.__anext__()
+    except StopAsyncIteration:
+        first = []
+    except BaseException:
+        await groups.aclose()
+        raise
+
+    async def body():
+        try:
+            if first:
+                yield encode_records(first)
+            async for records in groups:
+                yield encode_records(records)
+        except Exception as e:
+            yield encode_records([on_error(e)])
+        finally:
+            # Runs the generator's cleanup when the client disconnects early
+            await groups.aclose()
+
+    return StreamingResponse(body(), media_type=NDJSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,76 @@
+"""
+Anomaly detection benchmark
+
+Times AnomalyDetector on a cohort three ways: a plain Python loop over
+days (statistics.median / stdev of each baseline), one detect() call per
+user, and a single detect_batch() call for the whole cohort. Also times
+one long history. The batched results are checked against the per-user
+ones.
+
+Usage (from ai-service/):
+    python benchmarks/bench_anomalies.py [--users 5000] [--days 30] [--long-days 3650]
+"""
+
+import argparse
+import statistics
+import time
+
+from common import make_cohort, make_history
+
+from services.anomaly_detector import METRICS, AnomalyDetector
+from services.health_series import HealthSeries
+
+
+def python_loop(detector: AnomalyDetector, series: HealthSeries) -> int:
+    """Day-by-day baseline with the statistics module; returns the flagged count"""
+    flagged = 0
+    for metric in METRICS:
+        values = series.column(metric).tolist()
+        for day in range(detector.min_periods, len(values)):
+            baseline = values[max(0, day - detector.window):day]
+            if detector.method == 'zscore':
+                center, spread = statistics.fmean(baseline), statistics.stdev(baseline)
+            else:
+                center = statistics.median(baseline)
+                spread = detector.MAD_SCALE * statistics.median(abs(value - center) for value in baseline)
+            if abs(values[day] - center) / max(spread, 1e-9) >= detector.threshold:
+                flagged += 1
+    return flagged
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--long-days', type=int, default=3650)
+    args = parser.parse_args()
+
+    histories = [HealthSeries.from_records(history) for _, history, _ in make_cohort(args.users, args.days)]
+    long_history = HealthSeries.from_records(make_history(args.long_days, seed=1))
+    print(f"{args.users} users x {args.days} days; long history {args.long_days} days\n")
+
+    print(f"{'method':<7} {'python loop s':>14} {'per user s':>11} {'batched s':>10} {'users/s':>9} "
+          f"{'long ms':>8} {'flagged':>8}")
+    for method in AnomalyDetector.METHODS:
+        detector = AnomalyDetector(method)
+        loop = timed(lambda: [python_loop(detector, series) for series in histories])
+        per_user = [None]
+        per_user_s = timed(lambda: per_user.__setitem__(0, [detector.detect(series) for series in histories]))
+        batched = [None]
+        batched_s = timed(lambda: batched.__setitem__(0, detector.detect_batch(histories)))
+        if batched[0] != per_user[0]:
+            raise RuntimeError(f"{method}: batched results differ from per-user results")
+        long_ms = timed(lambda: detector.detect(long_history)) * 1000
+        flagged = sum(len(found) for found in batched[0])
+        print(f"{method:<7} {loop:>14.2f} {per_user_s:>11.2f} {batched_s:>10.3f} "
+              f"{args.users / batched_s:>9.0f} {long_ms:>8.2f} {flagged:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Batch analysis throughput benchmark
+
+Sends the same cohort through the API two ways, end to end through the
+in-process ASGI client: one POST /api/analyze per user, and a single POST
+/api/analyze/batch, without and with "details". The result cache and
+request coalescing are off, so every user is analyzed in every run.
+Reports users/s and the speed-up of the batch over sequential calls, and
+checks that the batch with details returns the same analysis as
+/api/analyze for every user, and the batch without the same health score.
+
+Usage (from ai-service/):
+    python benchmarks/bench_batch_analysis.py [--users 500] [--days 7 30 365] [--min-time 2.0]
+"""
+
+import argparse
+import json
+import os
+
+os.environ['RESULT_CACHE_ENABLED'] = 'false'
+os.environ['COALESCING_ENABLED'] = 'false'
+os.environ.setdefault('EXECUTION_MODE', 'inline')
+os.environ.setdefault('WARMUP_ENABLED', 'false')
+
+from common import make_cohort
+from harness import ASGIClient, measure
+
+import main
+from utils.responses import JSON_ENCODER
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--days', type=int, nargs='+', default=[7, 30, 365])
+    parser.add_argument('--min-time', type=float, default=2.0, help='seconds spent on each measurement')
+    args = parser.parse_args()
+
+    client = ASGIClient(main.app)
+    print(f"{args.users} users, EXECUTION_MODE={main.EXECUTION_MODE}, "
+          f"RESPONSE_MODE={main.RESPONSE_MODE}, JSON encoder={JSON_ENCODER}\n")
+    print(f"{'days':>5} {'sequential ms':>14} {'batch ms':>9} {'seq users/s':>12} {'batch users/s':>14} "
+          f"{'speed-up':>9} {'details ms':>11} {'speed-up':>9}")
+
+    for days in args.days:
+        cohort = make_cohort(args.users, days)
+        # Bodies are encoded up front so client-side JSON stays out of the timing
+        singles = [
+            json.dumps({'healthData': history, 'userProfile': profile}).encode()
+            for _, history, profile in cohort
+        ]
+        users = [
+            {'userId': user_id, 'healthData': history, 'userProfile': profile}
+            for user_id, history, profile in cohort
+        ]
+        batch = json.dumps({'users': users}).encode()
+        detailed = json.dumps({'users': users, 'details': True}).encode()
+
+        def sequential():
+            return [client.request_bytes('POST', '/api/analyze', body) for body in singles]
+
+        def batched(body=batch):
+            return client.request_bytes('POST', '/api/analyze/batch', body)
+
+        responses = sequential()
+        summaries = batched()
+        details = batched(detailed)
+        summary_results = json.loads(summaries[2])['results'] if summaries[0] == 200 else {}
+        detail_results = json.loads(details[2])['results'] if details[0] == 200 else {}
+        for (user_id, _, _), (single_status, _, single_body) in zip(cohort, responses):
+            single = json.loads(single_body) if single_status == 200 else None
+            if single is None or detail_results.get(user_id) != single:
+                raise RuntimeError(f"days={days}: batch result for {user_id} differs from /api/analyze")
+            if summary_results.get(user_id, {}).get('healthScore') != single['healthScore']:
+                raise RuntimeError(f"days={days}: batch health score for {user_id} differs from /api/analyze")
+
+        per_user = measure(sequential, min_time=args.min_time, warmup=0)['median_ms']
+        whole = measure(batched, min_time=args.min_time, warmup=0)['median_ms']
+        whole_details = measure(lambda: batched(detailed), min_time=args.min_time, warmup=0)['median_ms']
+        print(f"{days:>5} {per_user:>14.1f} {whole:>9.1f} {args.users / per_user * 1000:>12.0f} "
+              f"{args.users / whole * 1000:>14.0f} {per_user / whole:>8.1f}x "
+              f"{whole_details:>11.1f} {per_user / whole_details:>8.1f}x")
+
+    client.close()
+
+
+if __name__ == '__main__':
+    main_cli()
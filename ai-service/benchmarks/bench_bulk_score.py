@@ -0,0 +1,69 @@
+"""
+Bulk scoring benchmark
+
+Writes a synthetic mongoexport-style HealthData export (extended JSON,
+sorted by userId) plus a users export, then scores it with bulk_score at
+several pool sizes and reports users per second. The output of every run
+is compared with the in-process run.
+
+Usage (from ai-service/):
+    python benchmarks/bench_bulk_score.py [--users 20000] [--days 30] [--workers 0 1 4]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+
+from common import make_history, make_profile
+
+from bulk_score import BulkScorer
+
+
+def write_exports(directory: str, users: int, days: int) -> tuple:
+    """HealthData and users exports as written by mongoexport --sort"""
+    source = os.path.join(directory, 'healthdatas.jsonl')
+    profiles = os.path.join(directory, 'users.jsonl')
+    with open(source, 'w') as data, open(profiles, 'w') as people:
+        for user in range(users):
+            user_id = f"{user:024x}"
+            for entry in make_history(days, seed=user):
+                document = {'_id': {'$oid': os.urandom(12).hex()}, 'userId': {'$oid': user_id}, **entry}
+                document['date'] = {'$date': f"{entry['date']}T00:00:00Z"}
+                data.write(json.dumps(document) + '\n')
+            # Every other user has a profile
+            if user % 2 == 0:
+                people.write(json.dumps({'_id': {'$oid': user_id}, **make_profile(user)}) + '\n')
+    return source, profiles
+
+
+def digest(path: str) -> str:
+    with open(path, 'rb') as source:
+        return hashlib.sha256(source.read()).hexdigest()[:12]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, os.cpu_count() or 1])
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    source, profiles = write_exports(directory, args.users, args.days)
+    print(f"{args.users} users x {args.days} days; export {os.path.getsize(source) / 2**20:.1f} MiB\n")
+
+    print(f"{'workers':>7} {'seconds':>8} {'users/s':>9} {'errors':>7} {'output':>13}")
+    for workers in args.workers:
+        output = os.path.join(directory, f"scores-{workers}.jsonl")
+        scorer = BulkScorer(source, output, profiles=profiles, workers=workers,
+                            batch_size=args.batch_size, progress_seconds=3600, log=lambda message: None)
+        summary = scorer.run(restart=True)
+        print(f"{workers:>7} {summary['seconds']:>8.2f} {summary['users_per_second']:>9.0f} "
+              f"{summary['errors']:>7} {digest(output):>13}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Catalog memory benchmark: Python objects vs memory-mapped compiled file
+
+Starts 1 and 16 worker processes (spawned, like uvicorn --workers) that each
+load a large synthetic workout and meal catalog, run a few recommendation
+and meal plan queries and then report their memory from
+/proc/<pid>/smaps_rollup:
+
+- objects: every worker holds the catalog as Python dicts (as the class
+  literals do) plus the columnar catalogs built from them
+- mapped:  every worker maps one compiled catalog file (CATALOG_PATH)
+
+Memory of empty workers (imports only) is measured the same way and
+subtracted, so "catalog PSS" is what the catalogs cost across all workers.
+PSS splits shared pages between the processes mapping them. What remains
+private per worker in mapped mode is derived, bounded state: the meal
+planner's candidate tables (MealPlanner.MAX_SLOT_MEALS meals per slot) and
+the caches of recently returned dicts.
+
+Usage (from ai-service/):
+    python benchmarks/bench_catalog_memory.py [--workouts 50000] [--meals 50000] [--workers 1 16]
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+
+from common import make_catalogs, make_profile
+
+MODES = ('none', 'objects', 'mapped')
+
+
+def memory(pid: int) -> dict:
+    """Rss, Pss and private (unshared) memory of a process in KiB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as rollup:
+        for line in rollup:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': values['Rss'],
+        'pss': values['Pss'],
+        'private': values['Private_Clean'] + values['Private_Dirty'],
+    }
+
+
+def worker(mode: str, path: str, sizes: tuple, conn) -> None:
+    from services.catalogs import load_catalogs
+    from services.meal_catalog import MealCatalog
+    from services.meal_recommender import MealRecommender
+    from services.workout_catalog import GOALS, WorkoutCatalog
+    from services.workout_recommender import WorkoutRecommender
+
+    records = None
+    if mode != 'none':
+        if mode == 'objects':
+            records = make_catalogs(*sizes)
+            workouts = WorkoutCatalog.from_records(records[0])
+            meals = MealCatalog.from_records(records[1], MealRecommender.MEAL_PLANS)
+        else:
+            workouts, meals = load_catalogs(path)
+
+        workout_recommender = WorkoutRecommender(catalog=workouts)
+        meal_recommender = MealRecommender(catalog=meals)
+        for seed in range(20):
+            profile = make_profile(seed)
+            for goal in GOALS:
+                workout_recommender.get_recommendations(profile, goal, 10)
+            meal_recommender.get_meal_plan(profile, 'vegetarian', 7)
+
+    conn.send(os.getpid())
+    conn.recv()
+
+
+def measure(mode: str, workers: int, path: str, sizes: tuple) -> dict:
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    for _ in range(workers):
+        parent, child = context.Pipe()
+        process = context.Process(target=worker, args=(mode, path, sizes, child))
+        process.start()
+        processes.append((process, parent))
+
+    try:
+        usage = [memory(parent.recv()) for _, parent in processes]
+    finally:
+        for process, parent in processes:
+            parent.send('exit')
+            process.join()
+
+    return {key: sum(item[key] for item in usage) for key in ('rss', 'pss', 'private')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workouts', type=int, default=50000)
+    parser.add_argument('--meals', type=int, default=50000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 16])
+    args = parser.parse_args()
+
+    from services.catalogs import compile_catalogs
+    from services.meal_catalog import MealCatalog
+    from services.meal_recommender import MealRecommender
+    from services.workout_catalog import WorkoutCatalog
+
+    sizes = (args.workouts, args.meals)
+    workout_records, meal_records = make_catalogs(*sizes)
+    path = os.path.join(tempfile.mkdtemp(), 'catalogs.bin')
+    size = compile_catalogs(
+        path,
+        WorkoutCatalog.from_records(workout_records),
+        MealCatalog.from_records(meal_records, MealRecommender.MEAL_PLANS),
+    )
+    print(f"{args.workouts} workouts, {args.meals} meals; compiled file {size / 2**20:.1f} MiB\n")
+
+    mib = 1024
+    print(f"{'mode':<8} {'workers':>7} {'catalog PSS MiB':>16} {'per worker MiB':>15} "
+          f"{'private/worker MiB':>19} {'total RSS MiB':>14}")
+    for workers in args.workers:
+        empty = measure('none', workers, path, sizes)
+        for mode in MODES[1:]:
+            used = measure(mode, workers, path, sizes)
+            catalog_pss = (used['pss'] - empty['pss']) / mib
+            private = (used['private'] - empty['private']) / workers / mib
+            print(f"{mode:<8} {workers:>7} {catalog_pss:>16.1f} {catalog_pss / workers:>15.2f} "
+                  f"{private:>19.2f} {used['rss'] / mib:>14.1f}")
+
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
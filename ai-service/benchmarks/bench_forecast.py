@@ -0,0 +1,104 @@
+"""
+Health score forecast benchmark
+
+Times HealthForecaster on a synthetic cohort, one forecast() call per user
+vs one forecast_batch() call per batch, and backtests the projected scores:
+histories (half of them drifting) are cut `horizon` days early and the forecast
+is compared with the scores of the days that were held back. Baselines are
+the last score carried forward and the mean of the last 14 scores.
+
+Usage (from ai-service/):
+    python benchmarks/bench_forecast.py [--users 20000] [--days 90] [--horizon 14] [--batch-size 5000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from common import make_cohort
+
+from services.health_analyzer import HealthAnalyzer
+from services.health_series import HealthSeries
+
+MOODS = ['excellent', 'good', 'okay', 'bad', 'terrible']
+
+
+def drifting_history(rng: np.random.Generator, days: int) -> tuple:
+    """Daily entries around a random level, and whether they drift (half the users do)"""
+    day = np.arange(days)
+    drifting = rng.random() < 0.5
+    drift = rng.normal(0, 1, 3) * np.array([40, 0.01, 0.01]) * drifting
+    steps = rng.uniform(3000, 12000) + drift[0] * day + rng.normal(0, 1500, days)
+    sleep = rng.uniform(5.5, 8.5) + drift[1] * day + rng.normal(0, 0.6, days)
+    water = rng.uniform(1, 3.5) + drift[2] * day + rng.normal(0, 0.4, days)
+    calories = rng.uniform(1500, 2600) + rng.normal(0, 250, days)
+    return drifting, [
+        {
+            'date': '2024-01-01',
+            'steps': int(max(0, steps[index])),
+            'sleepHours': round(float(np.clip(sleep[index], 0, 24)), 1),
+            'waterIntake': round(float(max(0, water[index])), 1),
+            'calories': int(max(0, calories[index])),
+            'mood': MOODS[rng.integers(0, len(MOODS))],
+        }
+        for index in range(days)
+    ]
+
+
+def backtest(analyzer: HealthAnalyzer, users: int, days: int, horizon: int) -> dict:
+    """Mean absolute error of the projected scores and of two baselines, for all and drifting users"""
+    rng = np.random.default_rng(0)
+    drifting, histories = zip(*[drifting_history(rng, days + horizon) for _ in range(users)])
+    drifting = np.array(drifting)
+    past = [HealthSeries.from_records(history[:days]) for history in histories]
+    actual = np.array([analyzer.score_history(history[days:]) for history in histories])
+    scores = [analyzer.score_history(series) for series in past]
+
+    outcome = analyzer.forecast_batch(list(enumerate(past)), horizon)['results']
+    projected = np.array([[day['healthScore'] for day in outcome[user]['forecast']] for user in range(users)])
+    last = np.array([history[-1] for history in scores])[:, None]
+    recent = np.array([np.mean(history[-14:]) for history in scores])[:, None]
+    return {
+        name: (np.abs(guess - actual).mean(), np.abs(guess - actual)[drifting].mean())
+        for name, guess in (('forecast', projected), ('last score', last), ('mean of last 14', recent))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--horizon', type=int, default=14)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--backtest-users', type=int, default=2000)
+    args = parser.parse_args()
+
+    analyzer = HealthAnalyzer()
+    histories = [HealthSeries.from_records(history) for _, history, _ in make_cohort(args.users, args.days)]
+    print(f"{args.users} users x {args.days} days, {args.horizon}-day forecast\n")
+
+    sample = histories[:min(len(histories), 1000)]
+    start = time.perf_counter()
+    for series in sample:
+        analyzer.forecast(series, args.horizon)
+    per_user = (time.perf_counter() - start) / len(sample)
+
+    start = time.perf_counter()
+    for offset in range(0, len(histories), args.batch_size):
+        chunk = histories[offset:offset + args.batch_size]
+        analyzer.forecast_batch(list(enumerate(chunk)), args.horizon)
+    batched = (time.perf_counter() - start) / len(histories)
+
+    print(f"{'path':<24} {'ms/user':>8} {'users/s':>9} {'1M users min':>13}")
+    for name, seconds in (('forecast() per user', per_user), (f"batches of {args.batch_size}", batched)):
+        print(f"{name:<24} {seconds * 1000:>8.3f} {1 / seconds:>9.0f} {seconds * 1e6 / 60:>13.1f}")
+
+    print(f"\nBacktest, {args.backtest_users} users, mean absolute score error over {args.horizon} days")
+    print(f"  {'':<16} {'all':>6} {'drifting':>9}")
+    for name, (error, drifting_error) in backtest(analyzer, args.backtest_users, args.days, args.horizon).items():
+        print(f"  {name:<16} {error:>6.2f} {drifting_error:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
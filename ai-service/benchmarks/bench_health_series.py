@@ -0,0 +1,82 @@
+"""
+HealthSeries vs list-of-dicts benchmark
+
+Compares the previous request path (model_dump() per entry, then one
+Python list per metric for the trend split) with the columnar HealthSeries
+path, for peak memory and per-request latency.
+
+Usage (from ai-service/):
+    python benchmarks/bench_health_series.py [--days 365] [--repeat 200]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from common import make_history, make_profile
+
+from main import HealthDataEntry
+from services.health_analyzer import HealthAnalyzer
+from services.health_series import HealthSeries
+
+TREND_METRICS = ['steps', 'sleepHours', 'waterIntake', 'calories']
+
+
+def dict_path(analyzer, entries, profile):
+    """Previous request path: dicts per entry and per-metric lists"""
+    records = [entry.model_dump() for entry in entries]
+    latest = records[-1]
+    scores = analyzer._calculate_component_scores(latest)
+    analyzer._calculate_health_score(scores)
+    for metric in TREND_METRICS:
+        values = [record.get(metric, 0) for record in records]
+        mid = len(values) // 2
+        np.mean(values[:mid]) if mid > 0 else 0
+        np.mean(values[mid:])
+    return records
+
+
+def series_path(analyzer, entries, profile):
+    """Columnar request path"""
+    series = HealthSeries.from_entries(entries)
+    analyzer.analyze(series, profile)
+    return series
+
+
+def measure(fn, analyzer, entries, profile, repeat):
+    tracemalloc.start()
+    fn(analyzer, entries, profile)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(analyzer, entries, profile)
+    elapsed = (time.perf_counter() - start) / repeat
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--days', type=int, nargs='+', default=[7, 90, 365, 3650])
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    analyzer = HealthAnalyzer()
+    profile = make_profile()
+
+    print(f"{'days':>6} {'dict peak KiB':>14} {'series peak KiB':>16} {'dict ms':>9} {'series ms':>10}")
+    for days in args.days:
+        entries = [HealthDataEntry(**record) for record in make_history(days)]
+        dict_peak, dict_time = measure(dict_path, analyzer, entries, profile, args.repeat)
+        series_peak, series_time = measure(series_path, analyzer, entries, profile, args.repeat)
+        print(
+            f"{days:>6} {dict_peak / 1024:>14.1f} {series_peak / 1024:>16.1f} "
+            f"{dict_time * 1000:>9.3f} {series_time * 1000:>10.3f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Upload format benchmark
+
+Times /api/analyze with a JSON body against /api/analyze/upload with
+NDJSON, MessagePack (row and column shapes, when msgpack is installed) and
+the struct-packed columnar layout, end to end through the in-process ASGI
+client, for long histories. Body sizes are reported alongside.
+
+Usage (from ai-service/):
+    python benchmarks/bench_ingest.py [--days 365 3650] [--min-time 1.0]
+"""
+
+import argparse
+import json
+import os
+
+os.environ.setdefault('RESULT_CACHE_ENABLED', 'false')
+os.environ.setdefault('EXECUTION_MODE', 'inline')
+
+from common import make_history, make_profile
+from harness import ASGIClient, measure
+
+import main
+from services.health_ingest import COLUMNAR_CONTENT_TYPE, ENTRY_FIELDS, msgpack, pack_columns
+
+
+def payloads(history, profile):
+    """(name, path, content type, body) per upload format"""
+    formats = [
+        ('json', '/api/analyze', 'application/json',
+         json.dumps({'healthData': history, 'userProfile': profile}).encode()),
+        ('ndjson', '/api/analyze/upload', 'application/x-ndjson',
+         '\n'.join([json.dumps({'userProfile': profile})] + [json.dumps(entry) for entry in history]).encode()),
+    ]
+    if msgpack is not None:
+        columns = {field: [entry[field] for entry in history] for field in ENTRY_FIELDS}
+        formats += [
+            ('msgpack rows', '/api/analyze/upload', 'application/msgpack',
+             msgpack.packb({'healthData': history, 'userProfile': profile})),
+            ('msgpack columns', '/api/analyze/upload', 'application/msgpack',
+             msgpack.packb({'columns': columns, 'userProfile': profile})),
+        ]
+    formats.append(('columnar', '/api/analyze/upload', COLUMNAR_CONTENT_TYPE, pack_columns(history, profile)))
+    return formats
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--days', type=int, nargs='+', default=[365, 3650])
+    parser.add_argument('--min-time', type=float, default=1.0, help='seconds spent on each measurement')
+    args = parser.parse_args()
+
+    client = ASGIClient(main.app)
+    if msgpack is None:
+        print("msgpack is not installed; skipping MessagePack formats\n")
+
+    print(f"{'days':>6} {'format':<16} {'body KiB':>9} {'median ms':>10} {'vs json':>8}")
+    for days in args.days:
+        history = make_history(days)
+        profile = make_profile()
+        baseline = None
+        for name, path, content_type, body in payloads(history, profile):
+            headers = {'content-type': content_type}
+            status, _, content = client.request_bytes('POST', path, body, headers)
+            if status != 200:
+                raise RuntimeError(f"{name} returned {status}: {content[:200]!r}")
+
+            median = measure(lambda: client.request_bytes('POST', path, body, headers),
+                             min_time=args.min_time)['median_ms']
+            baseline = baseline or median
+            print(f"{days:>6} {name:<16} {len(body) / 1024:>9.1f} {median:>10.3f} {baseline / median:>7.1f}x")
+
+    client.close()
+
+
+if __name__ == '__main__':
+    main_cli()
@@ -0,0 +1,59 @@
+"""
+Meal planner quality vs solve time benchmark
+
+Solves 30-day plans for a synthetic cohort with planner configurations of
+increasing search breadth and reports solve time next to plan quality
+(slot calorie error, macro share error, distinct meals per user).
+
+Usage (from ai-service/):
+    python benchmarks/bench_meal_planner.py [--users 1000 5000] [--days 30]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (puts app/ on sys.path)
+
+from services.meal_planner import MealPlanner, MACRO_TARGETS
+
+CONFIGS = {
+    'singles, 3 portions': dict(portions=(0.75, 1.0, 1.5), allow_pairs=False),
+    'singles, 7 portions': dict(allow_pairs=False),
+    'pairs, 3 portions': dict(portions=(0.75, 1.0, 1.5), pair_portions=(0.5, 1.0, 1.5)),
+    'pairs, full grid': dict(),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'config':<22} {'users':>6} {'solve s':>8} {'cal err %':>10} {'macro err':>10} {'distinct':>9}")
+    for name, options in CONFIGS.items():
+        planner = MealPlanner(**options)
+        for users in args.users:
+            calories = rng.integers(1500, 4001, users)
+            elapsed = 0.0
+            quality = []
+            for diet_type in MACRO_TARGETS:
+                start = time.perf_counter()
+                choices = planner.solve(diet_type, calories, args.days)
+                elapsed += time.perf_counter() - start
+                quality.append(planner.quality(diet_type, calories, choices))
+
+            mean = {key: np.mean([q[key] for q in quality]) for key in quality[0]}
+            print(
+                f"{name:<22} {users:>6} {elapsed:>8.3f} {mean['calorie_error_pct']:>10.2f} "
+                f"{mean['macro_error']:>10.4f} {mean['distinct_meals']:>9.1f}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+Response mode benchmark
+
+Times the endpoints end to end (in-process ASGI, request parsing through
+response bytes) in each RESPONSE_MODE, on 30-day meal plans, 365-day
+analyses and batch responses, and checks that every mode returns the same
+JSON document.
+
+Usage (from ai-service/):
+    python benchmarks/bench_responses.py [--min-time 1.0]
+"""
+
+import argparse
+import json
+import os
+
+os.environ.setdefault('RESULT_CACHE_ENABLED', 'false')
+os.environ.setdefault('EXECUTION_MODE', 'inline')
+
+from common import make_cohort, make_history, make_profile
+from harness import ASGIClient, measure
+
+import main
+from utils.responses import JSON_ENCODER, RESPONSE_MODES
+
+
+def cases():
+    profile = make_profile()
+    return [
+        ('POST /api/meals/plan[days=30]', '/api/meals/plan',
+         {'userProfile': profile, 'diet_type': 'high_protein', 'days': 30}),
+        ('POST /api/meals/plan/batch[users=100,days=30]', '/api/meals/plan/batch',
+         {'users': [{'userId': str(user), 'userProfile': make_profile(user), 'days': 30} for user in range(100)]}),
+        ('POST /api/analyze[days=365]', '/api/analyze',
+         {'healthData': make_history(365), 'userProfile': profile}),
+        ('POST /api/analyze/batch[users=500,days=30]', '/api/analyze/batch',
+         {'users': [{'userId': user_id, 'healthData': history, 'userProfile': user_profile}
+                    for user_id, history, user_profile in make_cohort(500, 30)]}),
+        ('POST /api/workouts/recommend', '/api/workouts/recommend',
+         {'userProfile': profile, 'goal': 'endurance', 'count': 10}),
+    ]
+
+
+def normalized(body: bytes):
+    """Parsed response without generation timestamps"""
+    def strip(value):
+        if isinstance(value, dict):
+            return {key: strip(item) for key, item in value.items() if key != 'generated_at'}
+        if isinstance(value, list):
+            return [strip(item) for item in value]
+        return value
+    return strip(json.loads(body))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--min-time', type=float, default=1.0, help='seconds spent on each measurement')
+    args = parser.parse_args()
+
+    client = ASGIClient(main.app)
+    print(f"JSON encoder for trusted mode: {JSON_ENCODER}\n")
+    print(f"{'endpoint':<46} " + ' '.join(f"{mode + ' ms':>18}" for mode in RESPONSE_MODES) + f" {'speedup':>8}")
+
+    for name, path, body in cases():
+        payload = json.dumps(body).encode()
+        timings = {}
+        documents = {}
+        for mode in RESPONSE_MODES:
+            main.RESPONSE_MODE = mode
+            status, _, content = client.request_bytes('POST', path, payload)
+            if status != 200:
+                raise RuntimeError(f"{name} returned {status} in {mode} mode: {content[:200]!r}")
+            documents[mode] = normalized(content)
+            timings[mode] = measure(lambda: client.request_bytes('POST', path, payload),
+                                    min_time=args.min_time)['median_ms']
+
+        if any(document != documents['standard'] for document in documents.values()):
+            raise RuntimeError(f"{name}: response modes returned different documents")
+
+        fastest = min(timings['validate_once'], timings['trusted'])
+        print(f"{name:<46} " + ' '.join(f"{timings[mode]:>18.3f}" for mode in RESPONSE_MODES)
+              + f" {timings['standard'] / fastest:>7.1f}x")
+
+    client.close()
+
+
+if __name__ == '__main__':
+    main_cli()
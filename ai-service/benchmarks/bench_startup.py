@@ -0,0 +1,112 @@
+"""
+Cold start benchmark
+
+Starts the service under uvicorn in a fresh process for each configuration
+(eager or lazy initialization, per execution mode) and measures, from the
+moment the process is spawned, how long until /health answers and until
+the first /api/analyze is served. The service's own /api/startup report
+supplies the import and initialization breakdown.
+
+Usage (from ai-service/):
+    python benchmarks/bench_startup.py [--runs 3] [--modes inline process]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from common import APP_DIR, make_history, make_profile
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def call(url: str, body=None, timeout: float = 5.0):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status, json.loads(response.read())
+
+
+def cold_start(mode: str, lazy: bool, body) -> dict:
+    """Spawn one server and time its first answers"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = dict(
+        os.environ,
+        EXECUTION_MODE=mode,
+        LAZY_INIT='true' if lazy else 'false',
+        RESULT_CACHE_ENABLED='false',
+    )
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIR, env=env
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with {server.returncode}")
+            try:
+                call(f"{base}/health", timeout=1.0)
+                break
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.002)
+        health = time.perf_counter() - start
+
+        status, _ = call(f"{base}/api/analyze", body, timeout=30.0)
+        if status != 200:
+            raise RuntimeError(f"/api/analyze returned {status}")
+        analyze = time.perf_counter() - start
+
+        _, report = call(f"{base}/api/startup")
+        return {'health_ms': health * 1000, 'analyze_ms': analyze * 1000, 'report': report}
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--modes', nargs='+', default=['inline', 'process'])
+    parser.add_argument('--top', type=int, default=8, help='import packages to list')
+    args = parser.parse_args()
+
+    body = {'healthData': make_history(30), 'userProfile': make_profile()}
+    print(f"{'mode':<8} {'init':<6} {'/health ms':>11} {'1st analyze ms':>15} {'app import ms':>14} "
+          f"{'init ms':>8} {'warm-up ms':>11}")
+
+    last_report = None
+    for mode in args.modes:
+        for lazy in (False, True):
+            runs = [cold_start(mode, lazy, body) for _ in range(args.runs)]
+            report = runs[-1]['report']
+            phases = report['phases_ms']
+            warmup = report['warmup']
+            warmup_ms = f"{warmup['ms']:.1f}" if 'ms' in warmup else warmup['state']
+            print(f"{mode:<8} {'lazy' if lazy else 'eager':<6} "
+                  f"{statistics.median(run['health_ms'] for run in runs):>11.0f} "
+                  f"{statistics.median(run['analyze_ms'] for run in runs):>15.0f} "
+                  f"{report['app_import_ms']:>14.0f} "
+                  f"{phases.get('init_services', 0):>8.1f} "
+                  f"{warmup_ms:>11}")
+            last_report = report
+
+    print("\nImport time by package (last run, ms):")
+    for name, ms in list(last_report['import_packages_ms'].items())[:args.top]:
+        print(f"  {name:<24} {ms:>8.1f}")
+
+
+if __name__ == '__main__':
+    main_cli()
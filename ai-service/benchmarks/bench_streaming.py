@@ -0,0 +1,118 @@
+"""
+Streaming response benchmark
+
+Starts a fresh uvicorn server per measurement and sends the same batch to
+/api/analyze/batch (one JSON document) and /api/analyze/batch/stream
+(NDJSON, one record per user), then a long meal plan to
+/api/meals/plan/stream. Reports time to the first byte, total time,
+response size and how far the server's peak RSS (VmHWM) rose above its
+idle peak while serving the request.
+
+Usage (from ai-service/):
+    python benchmarks/bench_streaming.py [--users 5000] [--days 30] [--plan-days 365] [--mode inline]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+
+from bench_startup import free_port
+from common import APP_DIR, make_cohort
+
+
+def peak_rss_kib(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1])
+    return 0
+
+
+def serve(mode: str):
+    port = free_port()
+    env = dict(
+        os.environ, EXECUTION_MODE=mode, RESULT_CACHE_ENABLED='false', MAX_BATCH_SIZE='1000000',
+        MAX_UPLOAD_BYTES=str(1 << 30)
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIR, env=env
+    )
+    while True:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1.0)
+            connection.request('GET', '/health')
+            connection.getresponse().read()
+            return server, port
+        except (ConnectionError, OSError):
+            time.sleep(0.01)
+
+
+def measure(mode: str, path: str, body: bytes) -> dict:
+    """First byte and total time, size and server peak RSS growth of one request"""
+    server, port = serve(mode)
+    try:
+        idle = peak_rss_kib(server.pid)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+        start = time.perf_counter()
+        connection.request('POST', path, body, {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        first = response.read(1)
+        first_byte = time.perf_counter() - start
+        size = len(first)
+        while True:
+            chunk = response.read(65536)
+            if not chunk:
+                break
+            size += len(chunk)
+        total = time.perf_counter() - start
+        if response.status != 200:
+            raise RuntimeError(f"{path} returned {response.status}")
+        return {
+            'first_byte_ms': first_byte * 1000,
+            'total_ms': total * 1000,
+            'mib': size / 2**20,
+            'peak_rise_mib': (peak_rss_kib(server.pid) - idle) / 1024,
+        }
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--plan-days', type=int, default=365)
+    parser.add_argument('--mode', default='inline')
+    args = parser.parse_args()
+
+    users = [
+        {'userId': user_id, 'healthData': history, 'userProfile': profile}
+        for user_id, history, profile in make_cohort(args.users, args.days)
+    ]
+    batch = json.dumps({'users': users}).encode()
+    plan = json.dumps({'userProfile': users[0]['userProfile'], 'days': args.plan_days}).encode()
+    del users
+
+    print(f"{args.users} users x {args.days} days ({len(batch) / 2**20:.1f} MiB request), "
+          f"EXECUTION_MODE={args.mode}\n")
+    print(f"{'route':<28} {'first byte ms':>14} {'total ms':>9} {'response MiB':>13} {'peak RSS rise MiB':>18}")
+    for path, body in (
+        ('/api/analyze/batch', batch),
+        ('/api/analyze/batch/stream', batch),
+        ('/api/meals/plan/stream', plan),
+    ):
+        result = measure(args.mode, path, body)
+        print(f"{path:<28} {result['first_byte_ms']:>14.1f} {result['total_ms']:>9.1f} "
+              f"{result['mib']:>13.2f} {result['peak_rise_mib']:>18.1f}")
+
+
+if __name__ == '__main__':
+    main()
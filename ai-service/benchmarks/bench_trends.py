@@ -0,0 +1,61 @@
+"""
+Trend method benchmark
+
+For each trend method, measures the time to fit all metrics of one history
+at several lengths, and how often labels are wrong on synthetic histories:
+'false' is the share of trend-free histories (daily noise only) labelled
+improving or declining, 'missed' the share of histories with a steady 30%
+rise over the window not labelled improving.
+
+Usage (from ai-service/):
+    python benchmarks/bench_trends.py [--histories 2000] [--days 7 30 365 3650]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (puts app/ on sys.path)
+
+from services.trend_engine import LABELS, TrendEngine
+
+
+def synthetic(rng: np.random.Generator, days: int, rise: float) -> np.ndarray:
+    """(4, days) histories shaped like steps, sleep, water and calories with a relative rise"""
+    levels = np.array([[8000.0], [7.5], [2.5], [2100.0]])
+    noise = np.array([[2500.0], [1.0], [0.7], [350.0]])
+    trend = 1 + rise * np.linspace(0, 1, days)
+    return levels * trend + noise * rng.standard_normal((4, days))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--histories', type=int, default=2000)
+    parser.add_argument('--days', type=int, nargs='+', default=[7, 30, 365, 3650])
+    args = parser.parse_args()
+
+    improving = LABELS.index('improving')
+    stable = LABELS.index('stable')
+
+    print(f"{'method':<9} {'days':>5} {'fit ms':>7} {'false %':>8} {'missed %':>9}")
+    for method in TrendEngine.METHODS:
+        engine = TrendEngine(method)
+        for days in args.days:
+            rng = np.random.default_rng(days)
+            histories = max(50, args.histories * 30 // max(days, 30))
+            flat = [synthetic(rng, days, 0.0) for _ in range(histories)]
+            rising = [synthetic(rng, days, 0.3) for _ in range(histories)]
+
+            start = time.perf_counter()
+            false = sum(int((engine.fit(values)[2] != stable).sum()) for values in flat)
+            elapsed = (time.perf_counter() - start) / histories
+            missed = sum(int((engine.fit(values)[2] != improving).sum()) for values in rising)
+
+            checks = histories * 4
+            print(f"{method:<9} {days:>5} {elapsed * 1000:>7.3f} {100 * false / checks:>8.1f} "
+                  f"{100 * missed / checks:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
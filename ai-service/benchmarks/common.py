@@ -0,0 +1,124 @@
+"""
+Shared helpers for ai-service benchmarks
+Puts the app directory on sys.path and generates synthetic health data
+(single histories, profiles and whole user cohorts) and pose keypoint frames.
+"""
+
+import os
+import math
+import random
+import sys
+from datetime import date, timedelta
+from typing import List, Dict, Any, Tuple
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+MOODS = ['excellent', 'good', 'okay', 'bad', 'terrible']
+
+
+def make_history(days: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Synthetic daily health entries shaped like HealthDataEntry"""
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    return [
+        {
+            'date': (start + timedelta(days=day)).isoformat(),
+            'steps': rng.randint(2000, 16000),
+            'sleepHours': round(rng.uniform(4.5, 9.5), 1),
+            'waterIntake': round(rng.uniform(0.5, 4.5), 1),
+            'calories': rng.randint(1200, 3200),
+            'mood': rng.choice(MOODS),
+        }
+        for day in range(days)
+    ]
+
+
+def make_profile(seed: int = 0) -> Dict[str, Any]:
+    """Synthetic user profile shaped like UserProfile"""
+    rng = random.Random(seed)
+    return {
+        'age': rng.randint(18, 75),
+        'gender': rng.choice(['male', 'female']),
+        'height': round(rng.uniform(150, 195), 1),
+        'weight': round(rng.uniform(48, 120), 1),
+    }
+
+
+def make_cohort(users: int, days: int, seed: int = 0) -> List[Tuple[str, List[Dict[str, Any]], Dict[str, Any]]]:
+    """Synthetic (userId, history, profile) triples for batch benchmarks"""
+    return [
+        (f"user-{user}", make_history(days, seed=seed * 1000003 + user), make_profile(seed=seed * 1000003 + user))
+        for user in range(users)
+    ]
+
+
+# Standing pose in COCO keypoint order (x, y), used as the base of synthetic squats
+STANDING_POSE = [
+    (150, 40), (145, 35), (155, 35), (140, 40), (160, 40),
+    (125, 90), (175, 90), (120, 150), (180, 150), (118, 205), (182, 205),
+    (135, 210), (165, 210), (135, 300), (165, 300), (135, 390), (165, 390),
+]
+
+
+def make_pose_frames(frames: int, seed: int = 0, fps: int = 30) -> List[List[List[float]]]:
+    """Synthetic squat clip: frames x 17 keypoints x [x, y, confidence]"""
+    rng = random.Random(seed)
+    clip = []
+    for frame in range(frames):
+        # One rep every two seconds, knees bending to about 90 degrees
+        bend = math.radians(90) * (0.5 - 0.5 * math.cos(2 * math.pi * frame / (2 * fps)))
+        drop = 90 * (1 - math.cos(bend))
+        points = []
+        for index, (x, y) in enumerate(STANDING_POSE):
+            if index >= 15:
+                # Ankles stay planted; hips and everything above sink
+                px, py = x, y
+            elif index >= 13:
+                px, py = x + 90 * math.sin(bend), y + drop - 90 * (1 - math.cos(bend)) * 0.5
+            else:
+                px, py = x, y + drop
+            points.append([px + rng.gauss(0, 1.5), py + rng.gauss(0, 1.5), round(rng.uniform(0.6, 1.0), 2)])
+        clip.append(points)
+    return clip
+
+
+def make_catalogs(workouts: int, meals: int, seed: int = 0) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Synthetic workout and meal records shaped like the built-in catalogs"""
+    from services.meal_catalog import DIETS, SLOTS
+    from services.workout_catalog import EQUIPMENT, GOALS, INTENSITIES
+
+    rng = random.Random(seed)
+    movements = [f"Movement {index}" for index in range(2000)]
+    foods = [f"Ingredient {index}" for index in range(3000)]
+
+    workout_records = []
+    for index in range(workouts):
+        duration = rng.choice([15, 20, 30, 40, 45, 50, 60, 75, 90])
+        workout_records.append({
+            'id': f"workout_{index}",
+            'name': f"Workout {index} {rng.choice(movements)}",
+            'goal': rng.choice(GOALS),
+            'duration': duration,
+            'intensity': rng.choice(INTENSITIES),
+            'calories': duration * rng.randint(3, 11),
+            'exercises': rng.sample(movements, rng.randint(1, 6)),
+            'equipment': rng.sample(EQUIPMENT, rng.randint(0, 2)),
+        })
+
+    meal_records = []
+    for index in range(meals):
+        protein, carbs, fats = rng.randint(5, 60), rng.randint(5, 90), rng.randint(2, 25)
+        meal_records.append({
+            'name': f"Meal {index} with {rng.choice(foods)}",
+            'slot': rng.choice(SLOTS),
+            'diets': tuple(rng.sample(DIETS, rng.randint(1, 3))),
+            'calories': protein * 4 + carbs * 4 + fats * 9,
+            'protein': protein,
+            'carbs': carbs,
+            'fats': fats,
+            'ingredients': rng.sample(foods, rng.randint(2, 6)),
+        })
+
+    return workout_records, meal_records
@@ -0,0 +1,141 @@
+"""
+Benchmark harness
+Timing helpers, an in-process ASGI client and JSON result comparison
+shared by the benchmark suite.
+"""
+
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def measure(fn: Callable[[], Any], min_time: float = 0.2, max_repeat: int = 10000,
+            warmup: int = 1) -> Dict[str, float]:
+    """
+    Time repeated calls of fn
+
+    Runs fn until min_time seconds have passed (at least 3 and at most
+    max_repeat calls) and reports per-call statistics in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_repeat and (len(samples) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Statistics of per-call times in milliseconds"""
+    ordered = sorted(samples)
+    return {
+        'runs': len(ordered),
+        'min_ms': round(ordered[0], 4),
+        'median_ms': round(statistics.median(ordered), 4),
+        'mean_ms': round(statistics.fmean(ordered), 4),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 4),
+        'ops_per_s': round(1000 / statistics.median(ordered), 2) if ordered[0] > 0 else None,
+    }
+
+
+class ASGIClient:
+    """
+    Minimal in-process ASGI client
+
+    Calls the application directly with an HTTP scope, so endpoint
+    benchmarks include routing, validation and serialization but no
+    sockets or server.
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+        self.loop = asyncio.new_event_loop()
+
+    def request(self, method: str, path: str, body: Optional[Any] = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Send one request and return (status, headers, body)"""
+        payload = json.dumps(body).encode() if body is not None else b''
+        return self.loop.run_until_complete(self._call(method, path, payload, headers or {}))
+
+    def request_bytes(self, method: str, path: str, payload: bytes,
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a pre-encoded body (keeps client-side encoding out of the timing)"""
+        return self.loop.run_until_complete(self._call(method, path, payload, headers or {}))
+
+    async def _call(self, method: str, path: str, payload: bytes, headers: Dict[str, str]):
+        headers = {key.lower(): value for key, value in headers.items()}
+        if payload:
+            headers.setdefault('content-type', 'application/json')
+            headers['content-length'] = str(len(payload))
+        raw_headers = [(b'host', b'bench')] + [(key.encode(), value.encode()) for key, value in headers.items()]
+
+        path, _, query = path.partition('?')
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': query.encode(),
+            'root_path': '',
+            'headers': raw_headers,
+            'client': ('127.0.0.1', 0),
+            'server': ('bench', 80),
+        }
+
+        sent = False
+        response = {'status': 0, 'headers': {}, 'body': []}
+
+        async def receive():
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {'type': 'http.request', 'body': payload, 'more_body': False}
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                response['status'] = message['status']
+                response['headers'] = {key.decode(): value.decode() for key, value in message.get('headers', [])}
+            elif message['type'] == 'http.response.body':
+                response['body'].append(message.get('body', b''))
+
+        await self.app(scope, receive, send)
+        return response['status'], response['headers'], b''.join(response['body'])
+
+    def close(self) -> None:
+        self.loop.close()
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float,
+            metric: str = 'median_ms') -> List[Dict[str, Any]]:
+    """
+    Per-benchmark change between two result files
+
+    Returns one row per benchmark present in both runs, with `regressed`
+    set when the current time exceeds the baseline by more than threshold
+    (a fraction, e.g. 0.1 for 10%).
+    """
+    rows = []
+    for name, result in current['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None or not previous.get(metric):
+            continue
+        change = result[metric] / previous[metric] - 1
+        rows.append({
+            'name': name,
+            'baseline': previous[metric],
+            'current': result[metric],
+            'change': change,
+            'regressed': change > threshold,
+        })
+    return rows
@@ -0,0 +1,172 @@
+"""
+/health latency under heavy load, per execution mode
+
+Starts the service with uvicorn once per EXECUTION_MODE, keeps it busy
+with concurrent heavy requests (year-long analyses and batches of 30-day meal
+plans with distinct profiles, result caches disabled) and probes /health
+meanwhile. With inline execution the probes queue behind the heavy work;
+with a thread or process pool they should stay close to the idle latency.
+
+Usage (from ai-service/):
+    python benchmarks/load_health_latency.py [--modes inline thread process] [--seconds 10]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from common import APP_DIR, make_history, make_profile
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def request(url: str, body=None, timeout: float = 60.0) -> int:
+    """Send a GET (or a JSON POST when body is given) and return the status code"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def start_server(mode: str, port: int, workers: int, queue: int) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        EXECUTION_MODE=mode,
+        EXECUTOR_WORKERS=str(workers),
+        EXECUTOR_QUEUE_SIZE=str(queue),
+        RESULT_CACHE_ENABLED='false',
+        MEAL_PLAN_CACHE_SIZE='1',
+    )
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=APP_DIR, env=env
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if request(f"http://127.0.0.1:{port}/health", timeout=1) == 200:
+                return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f"Server did not start in {mode} mode")
+
+
+def probe(url: str, seconds: float, interval: float = 0.02):
+    """/health latencies in milliseconds over a time window"""
+    latencies = []
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        start = time.perf_counter()
+        request(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(interval)
+    return latencies
+
+
+def heavy_load(base: str, stop: threading.Event, worker: int, statuses: list, batch_size: int):
+    """
+    Alternate long-history analyses with meal plan batches; the batches are
+    small to upload but expensive to compute, which is the work the
+    executor can take off the event loop
+    """
+    history = make_history(365, seed=worker)
+    index = 0
+    while not stop.is_set():
+        seed = worker * 100000 + index
+        if index % 2:
+            users = [
+                {'userId': str(user), 'userProfile': make_profile(seed * batch_size + user),
+                 'diet_type': 'high_protein', 'days': 30}
+                for user in range(batch_size)
+            ]
+            statuses.append(request(f"{base}/api/meals/plan/batch", {'users': users}))
+        else:
+            body = {'healthData': history, 'userProfile': make_profile(seed)}
+            statuses.append(request(f"{base}/api/analyze", body))
+        index += 1
+
+
+def summarize(latencies):
+    ordered = sorted(latencies)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        'p50': statistics.median(ordered),
+        'p95': pick(0.95),
+        'p99': pick(0.99),
+        'max': ordered[-1],
+    }
+
+
+def run_mode(mode: str, args) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    server = start_server(mode, port, args.workers, args.queue)
+    try:
+        idle = summarize(probe(f"{base}/health", 2))
+
+        stop = threading.Event()
+        statuses = []
+        clients = [
+            threading.Thread(target=heavy_load, args=(base, stop, worker, statuses, args.batch_size), daemon=True)
+            for worker in range(args.clients)
+        ]
+        for client in clients:
+            client.start()
+        time.sleep(1)
+        loaded = summarize(probe(f"{base}/health", args.seconds))
+        stop.set()
+        for client in clients:
+            client.join()
+
+        return {
+            'idle': idle,
+            'loaded': loaded,
+            'heavy_ok': statuses.count(200),
+            'heavy_503': statuses.count(503),
+            'heavy_per_s': statuses.count(200) / (args.seconds + 1),
+        }
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--modes', nargs='+', default=['inline', 'thread', 'process'])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=8, help='concurrent heavy-request clients')
+    parser.add_argument('--batch-size', type=int, default=20, help='users per meal plan batch')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--queue', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'idle p50':>9} {'load p50':>9} {'p95':>8} {'p99':>8} {'max':>8} "
+          f"{'heavy/s':>8} {'503s':>6}   (latency in ms)")
+    for mode in args.modes:
+        result = run_mode(mode, args)
+        loaded = result['loaded']
+        print(
+            f"{mode:<8} {result['idle']['p50']:>9.2f} {loaded['p50']:>9.2f} {loaded['p95']:>8.2f} "
+            f"{loaded['p99']:>8.2f} {loaded['max']:>8.2f} {result['heavy_per_s']:>8.1f} {result['heavy_503']:>6}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+ai-service benchmark suite
+
+Microbenchmarks for the service hot paths (HealthAnalyzer.analyze and
+_analyze_trends, batch analysis, workout recommendations, meal plans, pose
+analysis) over
+synthetic histories of 7 to 3650 days and cohorts of increasing size, plus
+end-to-end endpoint benchmarks through an in-process ASGI client. The
+result cache is disabled so every call does the full work.
+
+Results can be written as JSON and compared against an earlier run; the
+comparison exits with status 1 when any benchmark is slower than the
+baseline by more than the threshold.
+
+Usage (from ai-service/):
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --compare bench.json [--threshold 0.1]
+    python benchmarks/run_benchmarks.py --filter endpoint --days 30 365
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from itertools import count
+from typing import Any, Callable, Dict, List, Tuple
+
+os.environ.setdefault('RESULT_CACHE_ENABLED', 'false')
+os.environ.setdefault('EXECUTION_MODE', 'inline')
+
+import numpy as np
+
+from common import APP_DIR, make_cohort, make_history, make_pose_frames, make_profile
+from harness import ASGIClient, compare, measure
+
+import main
+from main import HealthDataEntry
+from services.health_analyzer import HealthAnalyzer
+from services.health_series import HealthSeries
+from services.meal_recommender import MealRecommender
+from services.pose_analyzer import PoseAnalyzer
+from services.workout_recommender import WorkoutRecommender
+from utils.responses import JSON_ENCODER
+
+GOALS = ['weight_loss', 'muscle_gain', 'endurance', 'flexibility']
+DIETS = ['vegetarian', 'non_vegetarian', 'high_protein']
+
+# Distinct profiles cycled through so per-profile caches keep missing
+PROFILE_POOL = [make_profile(seed) for seed in range(2000)]
+
+Benchmark = Tuple[str, Callable[[], Any]]
+
+
+def cycling(items: List[Any]) -> Callable[[], Any]:
+    """Next item on every call, wrapping around"""
+    counter = count()
+    return lambda: items[next(counter) % len(items)]
+
+
+def analyzer_benchmarks(days_list: List[int], users_list: List[int]) -> List[Benchmark]:
+    analyzer = HealthAnalyzer()
+    benchmarks = []
+
+    for days in days_list:
+        history = make_history(days)
+        entries = [HealthDataEntry(**record) for record in history]
+        series = HealthSeries.from_entries(entries)
+        profile = make_profile()
+        benchmarks += [
+            (f"series.from_entries[days={days}]", lambda e=entries: HealthSeries.from_entries(e)),
+            (f"analyzer.analyze[days={days}]", lambda s=series, p=profile: analyzer.analyze(s, p)),
+            (f"analyzer.analyze_records[days={days}]", lambda h=history, p=profile: analyzer.analyze(h, p)),
+            (f"analyzer.analyze_trends[days={days}]", lambda s=series: analyzer._analyze_trends(s)),
+        ]
+
+    for users in users_list:
+        batch = [
+            (user_id, HealthSeries.from_records(history), profile)
+            for user_id, history, profile in make_cohort(users, 30)
+        ]
+        benchmarks.append((f"analyzer.analyze_batch[users={users},days=30]",
+                           lambda b=batch: analyzer.analyze_batch(b)))
+
+    return benchmarks
+
+
+def workout_benchmarks() -> List[Benchmark]:
+    recommender = WorkoutRecommender()
+    next_profile = cycling(PROFILE_POOL)
+    benchmarks = [
+        (f"workouts.get_recommendations[goal={goal}]",
+         lambda g=goal: recommender.get_recommendations(next_profile(), g, 3))
+        for goal in GOALS
+    ]
+    benchmarks.append((
+        "workouts.get_recommendations[filtered]",
+        lambda: recommender.get_recommendations(
+            next_profile(), 'endurance', 5, intensity='moderate', max_duration=45, equipment=['mat', 'bike']
+        )
+    ))
+    return benchmarks
+
+
+def meal_benchmarks(users_list: List[int]) -> List[Benchmark]:
+    cold = MealRecommender(cache_size=1)
+    warm = MealRecommender()
+    next_profile = cycling(PROFILE_POOL)
+    profile = make_profile()
+    benchmarks = []
+
+    for days in (7, 30):
+        benchmarks += [
+            (f"meals.get_meal_plan[days={days},cold]",
+             lambda d=days: cold.get_meal_plan(next_profile(), 'high_protein', d)),
+            (f"meals.get_meal_plan[days={days},warm]",
+             lambda d=days: warm.get_meal_plan(profile, 'high_protein', d)),
+        ]
+
+    for users in users_list:
+        requests = [(PROFILE_POOL[user % len(PROFILE_POOL)], DIETS[user % len(DIETS)], 30) for user in range(users)]
+        benchmarks.append((f"meals.get_meal_plans[users={users},days=30]",
+                           lambda r=requests: cold.get_meal_plans(r)))
+
+    return benchmarks
+
+
+def pose_benchmarks() -> List[Benchmark]:
+    analyzer = PoseAnalyzer()
+    benchmarks = []
+    for frames in (30, 300, 1800):
+        clip = np.asarray(make_pose_frames(frames))
+        benchmarks.append((f"pose.analyze[frames={frames}]", lambda c=clip: analyzer.analyze(c, 'squat')))
+    return benchmarks
+
+
+def endpoint_benchmarks(client: ASGIClient, days_list: List[int], users_list: List[int]) -> List[Benchmark]:
+    def post(path: str, body: Any) -> Callable[[], Any]:
+        payload = json.dumps(body).encode()
+
+        def call():
+            status, _, content = client.request_bytes('POST', path, payload)
+            if status != 200:
+                raise RuntimeError(f"POST {path} returned {status}: {content[:200]!r}")
+        return call
+
+    def get(path: str) -> Callable[[], Any]:
+        return lambda: client.request('GET', path)
+
+    benchmarks = [("endpoint.GET /health", get('/health'))]
+
+    for days in days_list:
+        body = {'healthData': make_history(days), 'userProfile': make_profile()}
+        benchmarks.append((f"endpoint.POST /api/analyze[days={days}]", post('/api/analyze', body)))
+
+    for users in users_list:
+        body = {'users': [
+            {'userId': user_id, 'healthData': history, 'userProfile': profile}
+            for user_id, history, profile in make_cohort(users, 30)
+        ]}
+        benchmarks.append((f"endpoint.POST /api/analyze/batch[users={users},days=30]",
+                           post('/api/analyze/batch', body)))
+
+    benchmarks += [
+        ("endpoint.POST /api/workouts/recommend",
+         post('/api/workouts/recommend', {'userProfile': make_profile(), 'goal': 'endurance', 'count': 5})),
+        ("endpoint.POST /api/meals/plan[days=30]",
+         post('/api/meals/plan', {'userProfile': make_profile(), 'diet_type': 'high_protein', 'days': 30})),
+        ("endpoint.POST /api/pose/analyze[frames=300]",
+         post('/api/pose/analyze', {'exercise': 'squat', 'frames': make_pose_frames(300)})),
+    ]
+    return benchmarks
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=APP_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'response_mode': main.RESPONSE_MODE,
+        'json_encoder': JSON_ENCODER,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--days', type=int, nargs='+', default=[7, 30, 90, 365, 3650])
+    parser.add_argument('--users', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this text')
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds spent on each benchmark')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='baseline JSON file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed slowdown as a fraction')
+    args = parser.parse_args()
+
+    client = ASGIClient(main.app)
+    benchmarks = (
+        analyzer_benchmarks(args.days, args.users)
+        + workout_benchmarks()
+        + meal_benchmarks(args.users)
+        + pose_benchmarks()
+        + endpoint_benchmarks(client, args.days, args.users)
+    )
+
+    results = {}
+    print(f"RESPONSE_MODE={main.RESPONSE_MODE}, JSON encoder={JSON_ENCODER}\n")
+    print(f"{'benchmark':<52} {'median ms':>10} {'p95 ms':>10} {'runs':>6}")
+    for name, fn in benchmarks:
+        if args.filter not in name:
+            continue
+        results[name] = measure(fn, min_time=args.min_time)
+        print(f"{name:<52} {results[name]['median_ms']:>10.3f} {results[name]['p95_ms']:>10.3f} "
+              f"{results[name]['runs']:>6}")
+    client.close()
+
+    report = {'environment': environment(), 'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, report, args.threshold)
+        print(f"\n{'benchmark':<52} {'baseline':>10} {'current':>10} {'change':>8}")
+        for row in rows:
+            flag = '  REGRESSION' if row['regressed'] else ''
+            print(f"{row['name']:<52} {row['baseline']:>10.3f} {row['current']:>10.3f} "
+                  f"{row['change']:>+7.1%}{flag}")
+        if any(row['regressed'] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main_cli()
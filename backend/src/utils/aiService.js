@@ -17,6 +17,11 @@ const getHealthAnalysis = async (healthDataArray, userProfile) => {
       },
       {
         timeout: 10000, // 10 second timeout
+        headers: {
+          // Dashboard request: admitted ahead of bulk work, shed if it can't finish in time
+          'X-Priority': 'interactive',
+          'X-Deadline-Ms': '9000',
+        },
       }
     );
 
@@ -25,7 +30,8 @@ const getHealthAnalysis = async (healthDataArray, userProfile) => {
     console.error('AI Service Error:', error.message);
     
     // Fallback to basic calculation if AI service is unavailable
-    if (error.code === 'ECONNREFUSED' || error.code === 'ETIMEDOUT') {
+    // A 503 means the AI service shed the request rather than answer too late
+    if (error.code === 'ECONNREFUSED' || error.code === 'ETIMEDOUT' || error.response?.status === 503) {
       console.warn('⚠️  AI Service unavailable, using fallback calculation');
       return calculateFallbackScore(healthDataArray);
     }